@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Time the estimators and the FA list loading on synthetic FA lists of 10 to 1000 FA.
+All results are written to a JSON file that can be compared with the file of an earlier run.
+
+Run from the program folder:
+    $ python benchmarks/bench_estimators.py --output bench_new.json
+    $ python benchmarks/bench_estimators.py --output bench_new.json --compare bench_old.json
+
+Results of the estimators are cached by TheoOxLipidome, the cache is cleared before each run,
+so the times are the ones of the first call.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import fa_list_loader  # noqa: E402
+from fa_list_loader import load_fa_list  # noqa: E402
+from oxlipidome_estimation import TheoOxLipidome  # noqa: E402
+from unoxlipidome_estimation import TheoLipidome  # noqa: E402
+
+usr_lipid_classes = {
+    'x1': ['FA', 'CholesterolEster', 'LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS',
+           'Monoacylglycerol', 'Ceramide', 'Sphingolipid'],
+    'x2': ['PA', 'PC', 'PE', 'PG', 'PI', 'PS', 'Diacylglycerol'],
+    'x3': ['Triacylglycerol'],
+    'x4': ['Cardiolipin'],
+}
+
+usr_mod_dct = {
+    'm_ocp': ['Aldehyde', 'CarboxylicAcid'],
+    'm_oap': ['OH', 'OOH', 'KETO', 'EPOXY'],
+    'm_p': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J'],
+    'm_o': ['D-IsoK', 'E-IsoK', 'TXA', 'TXB'],
+}
+
+site_lst = ['bis-allylic', 'db', 'allylic']
+default_size_lst = [10, 30, 100, 300, 1000]
+
+
+def get_synthetic_fa_lst(n_fa, max_db=6):
+    """
+    Make a FA list of n_fa different FA as records (FA, Elem, C, DB), C=C bonds 0 .. max_db
+
+    :param n_fa: number of FA
+    :type n_fa: int
+    :param max_db: max number of C=C bond
+    :type max_db: int
+    :return: list of records
+    :rtype: list
+    """
+    fa_lst = []
+    c = 10
+    while len(fa_lst) < n_fa:
+        for n_db in range(min(max_db, c // 3) + 1):
+            if len(fa_lst) < n_fa:
+                fa_lst.append(['FA%i:%i' % (c, n_db), 'C%iH%iO2' % (c, 2 * c - 2 * n_db), c, n_db])
+        c += 1
+    return fa_lst
+
+
+def time_func(func, repeat):
+    # min and median of repeat runs in s
+
+    time_lst = sorted(timeit.repeat(func, number=1, repeat=repeat))
+    return {'min_s': time_lst[0], 'median_s': time_lst[len(time_lst) // 2], 'repeat': repeat}
+
+
+def bench_loading(size_lst, repeat, tmp_dir):
+    """
+    Time load_fa_list for records, .csv, .xlsx without cache and from the cache sidecar
+    """
+    result_lst = []
+    for n_fa in size_lst:
+        fa_lst = get_synthetic_fa_lst(n_fa)
+        fa_df = load_fa_list(fa_lst)
+        csv_path = os.path.join(tmp_dir, 'FA_list_%i.csv' % n_fa)
+        xlsx_path = os.path.join(tmp_dir, 'FA_list_%i.xlsx' % n_fa)
+        fa_df.to_csv(csv_path, index=False)
+        fa_df.to_excel(xlsx_path, index=False)
+
+        def load_sidecar():
+            fa_list_loader._fa_df_memo.clear()
+            load_fa_list(xlsx_path)
+
+        load_fa_list(xlsx_path)  # write the sidecar
+        func_dct = {
+            'load_fa_list[records]': lambda: load_fa_list(fa_lst),
+            'load_fa_list[csv]': lambda: load_fa_list(csv_path, use_cache=False),
+            'load_fa_list[xlsx]': lambda: load_fa_list(xlsx_path, use_cache=False),
+            'load_fa_list[sidecar]': load_sidecar,
+            'load_fa_list[memory]': lambda: load_fa_list(xlsx_path),
+        }
+        for name in func_dct:
+            result = {'benchmark': name, 'n_fa': n_fa}
+            result.update(time_func(func_dct[name], repeat))
+            result_lst.append(result)
+            _print_result(result)
+
+    return result_lst
+
+
+def bench_estimators(size_lst, repeat, exact_lst=(True, False)):
+    """
+    Time TheoLipidome.get_estimation and all TheoOxLipidome methods for all site modes and site_specific settings
+    """
+    result_lst = []
+    for n_fa in size_lst:
+        fa_lst = get_synthetic_fa_lst(n_fa)
+        for exact in exact_lst:
+            unoxlipidome = TheoLipidome(fa_lst, usr_lipid_classes, exact=exact, verbose=False)
+            oxlipidome = TheoOxLipidome(fa_lst, usr_lipid_classes, usr_mod_dct, exact=exact, verbose=False)
+            max_db = max(oxlipidome.n_lst)
+            for site_specific in [False, True]:
+                bench_lst = [('TheoLipidome.get_estimation', None,
+                              lambda: unoxlipidome.get_estimation(site_specific=site_specific))]
+                for method in ['get_oap', 'get_ocp']:
+                    method_func = getattr(oxlipidome, method)
+                    bench_lst.append(('TheoOxLipidome.%s' % method, None,
+                                      lambda method_func=method_func: method_func(max_db, site_specific=site_specific)))
+                bench_lst.append(('TheoOxLipidome.get_cyclic', None,
+                                  lambda: oxlipidome.get_cyclic(max_db, site_specific=site_specific)))
+                for site in site_lst:
+                    for method in ['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa']:
+                        bench_lst.append(('TheoOxLipidome.%s' % method, site,
+                                          lambda method=method, site=site: getattr(oxlipidome, method)(
+                                              site=site, site_specific=site_specific)))
+
+                for name, site, func in bench_lst:
+
+                    def cold_func(func=func):
+                        oxlipidome.result_cache.clear()
+                        func()
+
+                    result = {'benchmark': name, 'n_fa': n_fa, 'exact': exact, 'site': site,
+                              'site_specific': site_specific}
+                    try:
+                        result.update(time_func(cold_func, repeat))
+                    except (TypeError, OverflowError) as _e:
+                        # float mode fails for numbers beyond the float range
+                        result['error'] = type(_e).__name__
+                    result_lst.append(result)
+                    _print_result(result)
+
+    return result_lst
+
+
+def get_meta():
+    """
+    Versions and machine of this run
+    """
+    import numpy
+    import pandas
+
+    meta = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': numpy.__version__, 'pandas': pandas.__version__, 'machine': platform.machine(),
+            'platform': platform.platform()}
+    try:
+        meta['commit'] = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        meta['commit'] = None
+    return meta
+
+
+def compare_results(new_result_lst, old_result_lst, threshold=1.25):
+    """
+    Print the ratio new / old of the min time of all benchmarks in both runs, mark ratios above threshold
+    """
+    key_lst = ['benchmark', 'n_fa', 'exact', 'site', 'site_specific']
+    old_dct = dict((tuple(result.get(key) for key in key_lst), result) for result in old_result_lst)
+    n_slower = 0
+    for result in new_result_lst:
+        old_result = old_dct.get(tuple(result.get(key) for key in key_lst))
+        if old_result is None or 'min_s' not in old_result or 'min_s' not in result:
+            continue
+        ratio = result['min_s'] / max(old_result['min_s'], 1e-9)
+        if ratio > threshold:
+            n_slower += 1
+        print('%s x%.2f  %s' % ('!' if ratio > threshold else ' ', ratio, _get_label(result)))
+    print('%i benchmarks slower than x%.2f' % (n_slower, threshold))
+    return n_slower
+
+
+def _get_label(result):
+
+    label = '%s n_fa=%i' % (result['benchmark'], result['n_fa'])
+    for key in ['exact', 'site', 'site_specific']:
+        if result.get(key) is not None:
+            label += ' %s=%s' % (key, result[key])
+    return label
+
+
+def _print_result(result):
+
+    if 'error' in result:
+        print('%12s  %s' % (result['error'], _get_label(result)))
+    else:
+        print('%9.1f us  %s' % (result['min_s'] * 1e6, _get_label(result)))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the estimators and the FA list loading.')
+    parser.add_argument('-o', '--output', default='bench_estimators.json', help='JSON file of the results')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--sizes', default=','.join(str(n) for n in default_size_lst),
+                        help='numbers of FA of the synthetic FA lists, comma separated')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of each benchmark')
+    parser.add_argument('--skip-loading', action='store_true', help='do not time the FA list loading')
+    args = parser.parse_args()
+
+    usr_size_lst = [int(n) for n in args.sizes.split(',')]
+    bench_result_lst = bench_estimators(usr_size_lst, args.repeat)
+    if not args.skip_loading:
+        usr_tmp_dir = tempfile.mkdtemp()
+        try:
+            bench_result_lst += bench_loading(usr_size_lst, args.repeat, usr_tmp_dir)
+        finally:
+            shutil.rmtree(usr_tmp_dir)
+
+    with open(args.output, 'w') as output_obj:
+        json.dump({'meta': get_meta(), 'results': bench_result_lst}, output_obj, indent=1)
+    print('Results saved as: %s' % args.output)
+
+    if args.compare:
+        with open(args.compare, 'r') as compare_obj:
+            compare_results(bench_result_lst, json.load(compare_obj)['results'])
+
+    print('\nFinished!')
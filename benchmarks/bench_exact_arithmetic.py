@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Compare the float (scipy) and the exact integer arithmetic of TheoOxLipidome on synthetic FA lists
+that produce numbers far beyond 2^53.
+
+Run from the program folder:
+    $ python benchmarks/bench_exact_arithmetic.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from oxlipidome_estimation import TheoOxLipidome  # noqa: E402
+
+usr_fa_lst = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'data', 'FA_list.xlsx')
+
+usr_lipid_classes = {
+    'x1': ['FA', 'CholesterolEster', 'LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS',
+           'Monoacylglycerol', 'Ceramide', 'Sphingolipid'],
+    'x2': ['PA', 'PC', 'PE', 'PG', 'PI', 'PS', 'Diacylglycerol'],
+    'x3': ['Triacylglycerol'],
+    'x4': ['Cardiolipin'],
+}
+
+usr_mod_dct = {
+    'm_ocp': ['Aldehyde', 'CarboxylicAcid'],
+    'm_oap': ['OH', 'OOH', 'KETO', 'EPOXY'],
+    'm_p': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J'],
+    'm_o': ['D-IsoK', 'E-IsoK', 'TXA', 'TXB'],
+}
+
+
+def load_synthetic(exact, max_db, fa_per_db):
+    """
+    Load the default settings and replace the FA list by fa_per_db FA for each n_db in 1..max_db
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=exact)
+    oxlipidome.fa_dct = {n_db: fa_per_db for n_db in range(1, max_db + 1)}
+    oxlipidome.n_lst = list(range(1, max_db + 1))
+    oxlipidome.f = max_db * fa_per_db + fa_per_db  # add the same number of saturated FA
+    return oxlipidome
+
+
+if __name__ == '__main__':
+
+    repeat = 20
+    for max_db in [6, 20, 40, 60]:
+        float_lipidome = load_synthetic(False, max_db, 50)
+        exact_lipidome = load_synthetic(True, max_db, 50)
+        for method in ['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa']:
+
+            def exact_func(method=method):
+                # clear the cached results to time the calculation, not the cache lookup
+                exact_lipidome.result_cache.clear()
+                return getattr(exact_lipidome, method)(site='allylic', site_specific=True)
+
+            def float_func(method=method):
+                float_lipidome.result_cache.clear()
+                return getattr(float_lipidome, method)(site='allylic', site_specific=True)
+
+            exact_count = exact_func()
+            exact_time = min(timeit.repeat(exact_func, number=1, repeat=repeat))
+            try:
+                float_count = float_func()
+                float_time = min(timeit.repeat(float_func, number=1, repeat=repeat))
+                float_info = '%9.1f us abs. error of float: %s' % (float_time * 1e6, abs(exact_count - float_count))
+            except (TypeError, OverflowError) as _e:
+                float_info = '   failed (%s)' % type(_e).__name__
+            print('max_db=%2i %-22s ~1e%-3i exact: %9.1f us float: %s'
+                  % (max_db, method, len(str(exact_count)) - 1, exact_time * 1e6, float_info))
+
+    print('\nFinished!')
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import hashlib
+import os
+
+# numpy and pandas are imported only where needed, to keep the start of command line runs fast
+
+fa_columns = ['FA', 'Elem', 'C', 'DB']
+cache_suffix = '.cache.npz'
+cache_dir_env = 'LIPIDOME_CACHE_DIR'  # environment variable to change the folder of the cache sidecars
+
+_fa_df_memo = {}  # abs. path: (mtime_ns, size, fa_df) of all FA lists loaded in this process
+_fa_summary_memo = {}  # abs. path: (mtime_ns, size, (f, fa_dct, n_lst)) of all FA summaries loaded in this process
+
+
+def load_fa_list(fa_lst, use_cache=True, verbose=False):
+    """
+    Load FA list with at least the columns FA, Elem, C and DB
+
+    Supported inputs are .xlsx/.xls, .csv, .parquet files, a cache sidecar .npz file,
+    a pandas.DataFrame or a list of (FA, Elem, C, DB) records.
+    Files are converted once into a .cache.npz sidecar in the user cache folder (see get_sidecar_path),
+    the sidecar is used as long as mtime and size of the original file are unchanged (or its content hash, if touched).
+    FA lists loaded from files are also kept in memory, later loads of the same file return a copy.
+
+    :param fa_lst: file path, DataFrame or list of records
+    :type fa_lst: str | pandas.DataFrame | list
+    :param use_cache: set to False to always parse the original file
+    :type use_cache: bool
+    :param verbose: set to True to print the FA list
+    :type verbose: bool
+    :return: FA list, one row per FA
+    :rtype: pandas.DataFrame
+    """
+    import pandas as pd
+
+    if isinstance(fa_lst, pd.DataFrame):
+        fa_df = _clean_fa_df(fa_lst)
+    elif isinstance(fa_lst, (list, tuple)):
+        if fa_lst and isinstance(fa_lst[0], dict):
+            fa_df = _clean_fa_df(pd.DataFrame(list(fa_lst)))
+        else:
+            fa_df = _clean_fa_df(pd.DataFrame(list(fa_lst), columns=fa_columns))
+    else:
+        fa_df = _load_fa_file(str(fa_lst), use_cache)
+
+    if verbose is True:
+        print('Load FA list:')
+        print(fa_df)
+
+    return fa_df
+
+
+def load_fa_summary(fa_lst, use_cache=True, verbose=False):
+    """
+    Load only the numbers of FA by C=C bonds needed by the estimators.
+
+    Lists of records and FA files with a valid cache sidecar are read without pandas,
+    records without FA name are skipped like in load_fa_list.
+    The numbers of FA files are kept in memory until the file changes.
+
+    :param fa_lst: file path, DataFrame or list of records, see load_fa_list
+    :type fa_lst: str | pandas.DataFrame | list
+    :param use_cache: set to False to always parse the original file
+    :type use_cache: bool
+    :param verbose: set to True to print the FA list
+    :type verbose: bool
+    :return: total number of FA F, dict of {n_db: number of FA with n_db C=C bonds} and list of all n_db > 0
+    :rtype: tuple
+    """
+    if verbose is False:
+        if isinstance(fa_lst, (list, tuple)):
+            return _count_db(_get_record_db_lst(fa_lst))
+        elif isinstance(fa_lst, str) and use_cache is True:
+            abs_path = os.path.abspath(fa_lst)
+            file_info = _get_file_info(abs_path)
+            memo = _fa_summary_memo.get(abs_path)
+            if memo is not None and memo[:2] == file_info:
+                return _copy_summary(memo[2])
+            df_memo = _fa_df_memo.get(abs_path)
+            if df_memo is not None and df_memo[:2] == file_info:
+                summary = get_fa_db_summary(df_memo[2])
+            else:
+                sidecar_path = _get_valid_sidecar(abs_path)
+                if sidecar_path is not None:
+                    import numpy as np
+                    with np.load(sidecar_path, allow_pickle=False) as sidecar:
+                        summary = _count_db(sidecar['col_DB'].tolist())
+                else:
+                    summary = get_fa_db_summary(load_fa_list(abs_path, use_cache=use_cache))
+            _fa_summary_memo[abs_path] = (file_info[0], file_info[1], summary)
+            return _copy_summary(summary)
+
+    return get_fa_db_summary(load_fa_list(fa_lst, use_cache=use_cache, verbose=verbose))
+
+
+def get_sidecar_path(fa_lst_path):
+    """
+    Get the path of the cache sidecar of a FA list file. The sidecars are kept in the folder
+    of the environment variable LIPIDOME_CACHE_DIR, by default $XDG_CACHE_HOME/lipidome or ~/.cache/lipidome,
+    the folder of the FA list is never written.
+
+    :param fa_lst_path: FA list file
+    :type fa_lst_path: str
+    :return: path of the .cache.npz sidecar
+    :rtype: str
+    """
+    abs_path = os.path.abspath(fa_lst_path)
+    cache_dir = os.environ.get(cache_dir_env)
+    if not cache_dir:
+        cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'lipidome')
+    path_hash = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:16]
+
+    return os.path.join(cache_dir, '%s_%s%s' % (os.path.basename(abs_path), path_hash, cache_suffix))
+
+
+def get_fa_db_summary(fa_df):
+    """
+    Count the FA in the FA list by number of C=C bonds
+
+    :param fa_df: FA list from load_fa_list
+    :type fa_df: pandas.DataFrame
+    :return: total number of FA F, dict of {n_db: number of FA with n_db C=C bonds} and list of all n_db > 0
+    :rtype: tuple
+    """
+    return _count_db(fa_df['DB'].values.tolist())
+
+
+def _count_db(db_lst):
+
+    f = len(db_lst)  # total number of Free Fatty acids F
+    fa_dct = {}
+    n_lst = []
+    for n_db in sorted(set(db_lst)):
+        if n_db > 0:
+            fa_dct[n_db] = db_lst.count(n_db)
+            n_lst.append(n_db)
+
+    return f, fa_dct, n_lst
+
+
+def _get_record_db_lst(fa_lst):
+    # DB of a list of records with the checks of _clean_fa_df, without pandas
+
+    if fa_lst and isinstance(fa_lst[0], dict):
+        missing_lst = [col for col in fa_columns if not any(col in fa for fa in fa_lst)]
+        if missing_lst:
+            raise ValueError('FA list without column(s): %s' % ', '.join(missing_lst))
+        record_lst = [(fa.get('FA'), fa.get('DB')) for fa in fa_lst]
+    else:
+        for fa in fa_lst:
+            if len(fa) != len(fa_columns):
+                raise ValueError('FA records must have %i values (%s): %s' % (len(fa_columns), ', '.join(fa_columns),
+                                                                              fa))
+        record_lst = [(fa[0], fa[3]) for fa in fa_lst]
+
+    db_lst = []
+    for fa_name, n_db in record_lst:
+        if fa_name is None or fa_name != fa_name:  # rows without FA name (None or NaN) are skipped
+            continue
+        db_lst.append(int(n_db))  # same errors as astype(int) for missing or invalid numbers
+
+    return db_lst
+
+
+def _copy_summary(summary):
+    # the estimators keep and change fa_dct and n_lst, the memo must not be shared
+
+    f, fa_dct, n_lst = summary
+    return f, dict(fa_dct), list(n_lst)
+
+
+def _load_fa_file(fa_lst_path, use_cache):
+
+    abs_path = os.path.abspath(fa_lst_path)
+    if abs_path.endswith('.npz'):
+        return _read_sidecar(abs_path)[0]
+
+    file_info = _get_file_info(abs_path)
+    if use_cache is True:
+        memo = _fa_df_memo.get(abs_path)
+        if memo is not None and memo[:2] == file_info:
+            return memo[2].copy()
+
+    sidecar_path = None
+    if use_cache is True:
+        sidecar_path = _get_valid_sidecar(abs_path)
+    if sidecar_path is not None:
+        fa_df = _read_sidecar(sidecar_path)[0]
+    else:
+        fa_df = _clean_fa_df(_read_fa_file(abs_path))
+        if use_cache is True:
+            try:
+                _write_sidecar(get_sidecar_path(abs_path), fa_df, file_info, _get_file_hash(abs_path))
+            except (IOError, OSError):
+                pass  # read-only cache folder, use the memory cache only
+
+    if use_cache is True:
+        _fa_df_memo[abs_path] = (file_info[0], file_info[1], fa_df)
+        fa_df = fa_df.copy()  # the memo must not be changed by the caller
+
+    return fa_df
+
+
+def _get_file_info(file_path):
+
+    file_stat = os.stat(file_path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def _get_valid_sidecar(abs_path):
+    # return the path of the cache sidecar if it still matches the original file, else None
+
+    sidecar_path = get_sidecar_path(abs_path)
+    if not os.path.isfile(sidecar_path):
+        return None
+
+    import numpy as np
+    try:
+        with np.load(sidecar_path, allow_pickle=False) as sidecar:
+            sidecar_info = tuple(sidecar['source_info'].tolist())
+            sidecar_hash = str(sidecar['source_hash'])
+    except (IOError, OSError, KeyError, ValueError):
+        return None
+
+    file_info = _get_file_info(abs_path)
+    if sidecar_info == file_info:
+        return sidecar_path
+    elif sidecar_hash == _get_file_hash(abs_path):
+        # only touched, update the file info stored in the sidecar
+        fa_df = _read_sidecar(sidecar_path)[0]
+        try:
+            _write_sidecar(sidecar_path, fa_df, file_info, sidecar_hash)
+        except (IOError, OSError):
+            pass
+        return sidecar_path
+    else:
+        return None
+
+
+def _read_fa_file(fa_lst_path):
+
+    import pandas as pd
+
+    file_ext = os.path.splitext(fa_lst_path)[1].lower()
+    if file_ext in ['.xlsx', '.xls']:
+        return pd.read_excel(fa_lst_path, header=0)
+    elif file_ext in ['.csv', '.txt']:
+        return pd.read_csv(fa_lst_path, header=0)
+    elif file_ext in ['.parquet', '.pq']:
+        return pd.read_parquet(fa_lst_path)
+    else:
+        raise ValueError('FA list format not supported: %s' % fa_lst_path)
+
+
+def _clean_fa_df(fa_df):
+
+    fa_df = fa_df.rename(columns=lambda col: str(col).strip())
+    fa_df = fa_df[[col for col in fa_df.columns if not col.startswith('Unnamed')]]
+    missing_lst = [col for col in fa_columns if col not in fa_df.columns]
+    if missing_lst:
+        raise ValueError('FA list without column(s): %s' % ', '.join(missing_lst))
+    fa_df = fa_df[fa_df['FA'].notnull()].reset_index(drop=True).copy()
+    fa_df['C'] = fa_df['C'].astype(int)
+    fa_df['DB'] = fa_df['DB'].astype(int)
+
+    return fa_df
+
+
+def _get_file_hash(file_path):
+
+    file_hash = hashlib.sha1()
+    with open(file_path, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def _write_sidecar(sidecar_path, fa_df, file_info, file_hash):
+
+    import numpy as np
+    import pandas as pd
+
+    array_dct = {}
+    for col in fa_df.columns:
+        if fa_df[col].dtype.kind in 'biuf':
+            array_dct['col_' + col] = fa_df[col].values
+        else:
+            # text columns are stored as unicode, empty cells as ''
+            array_dct['col_' + col] = np.array(['' if pd.isnull(v) else str(v) for v in fa_df[col]], dtype=str)
+    array_dct['columns'] = np.array(list(fa_df.columns), dtype=str)
+    array_dct['source_info'] = np.array(file_info, dtype=np.int64)
+    array_dct['source_hash'] = np.array(file_hash)
+    sidecar_dir = os.path.dirname(sidecar_path)
+    if sidecar_dir and not os.path.isdir(sidecar_dir):
+        os.makedirs(sidecar_dir)
+    tmp_path = sidecar_path + '.tmp.npz'
+    np.savez(tmp_path, **array_dct)
+    os.replace(tmp_path, sidecar_path)
+
+
+def _read_sidecar(sidecar_path):
+
+    import numpy as np
+    import pandas as pd
+
+    with np.load(sidecar_path, allow_pickle=False) as sidecar:
+        col_dct = {}
+        for col in sidecar['columns'].tolist():
+            values = sidecar['col_' + col]
+            if values.dtype.kind == 'U':
+                values = np.array([v if v else np.nan for v in values.tolist()], dtype=object)
+            col_dct[col] = values
+        fa_df = pd.DataFrame(col_dct, columns=sidecar['columns'].tolist())
+        file_info = tuple(sidecar['source_info'].tolist())
+
+        return fa_df, (file_info[0], file_info[1], str(sidecar['source_hash']))
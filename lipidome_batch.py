@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Estimation of many FA lists in one run, with the results of all FA lists in one table.
+
+    $ python lipidome_batch.py tissue_fa_lists/ --config my_config.json --output results.csv
+    $ python lipidome_batch.py batch_manifest.json --workers 8 --output results.json
+
+The input is a folder of FA lists (.xlsx, .xls, .csv, .parquet) or a JSON/YAML manifest:
+{"lipid_classes": ..., "modifications": ..., "exact": ..., "estimations": [...],
+ "jobs": ["liver.xlsx", {"name": "brain", "fa_list": "brain.csv", "modifications": {...}}, ...]}
+Keys outside jobs are the defaults of all jobs, see lipidome_cli.load_config. Relative paths are relative
+to the manifest. OAP and OCP of each modification setting are calculated once in the main process
+and shared by all jobs, the jobs run in a process pool.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lipidome_cli import get_settings, load_config, load_lipidome, run_single_estimation
+from lipidome_utils import get_cache_key, update_cache_fingerprint
+
+fa_file_ext_lst = ['.xlsx', '.xls', '.csv', '.parquet']
+result_column_lst = ['job', 'fa_list', 'lipidome', 'site', 'site_specific', 'lipid',
+                     'oxfa', 'oxlipid_1oxfa', 'oxlipid_alloxfa', 'time_s', 'error']
+mod_table_func_lst = ['get_oap', 'get_ocp']
+mod_table_m_max = 20  # m of FA with up to 19 C=C in all site modes, same grid as oxlipidome_tables
+
+_worker_table_dct = {}  # shared OAP/OCP tables of each worker process, set by _init_worker
+
+
+def get_jobs(batch_path, config=None):
+    """
+    Get the jobs of a folder of FA lists or of a manifest file
+
+    :param batch_path: folder of FA lists or JSON/YAML manifest
+    :type batch_path: str
+    :param config: defaults of all jobs, see lipidome_cli.load_config
+    :type config: dict
+    :return: list of {"name": ..., "config": ...}
+    :rtype: list
+    """
+    config = dict(config or {})
+    job_lst = []
+    if os.path.isdir(batch_path):
+        for file_name in sorted(os.listdir(batch_path)):
+            file_stem, file_ext = os.path.splitext(file_name)
+            if file_ext.lower() in fa_file_ext_lst and not file_name.startswith(('~$', '.')):
+                job_lst.append({'name': file_stem,
+                                'config': dict(config, fa_list=os.path.abspath(os.path.join(batch_path, file_name)))})
+    else:
+        manifest = load_config(batch_path)
+        manifest_dir = os.path.dirname(os.path.abspath(batch_path)) if batch_path != '-' else os.getcwd()
+        job_config = dict(config)
+        job_config.update(dict((key, value) for key, value in manifest.items() if key != 'jobs'))
+        for job_idx, job in enumerate(manifest.get('jobs', [])):
+            if not isinstance(job, dict):
+                job = {'fa_list': job}
+            job = dict(job_config, **job)
+            if isinstance(job.get('fa_list'), str):
+                job['fa_list'] = os.path.join(manifest_dir, job['fa_list'])
+            name = job.pop('name', None)
+            if name is None:
+                name = (os.path.splitext(os.path.basename(job['fa_list']))[0]
+                        if isinstance(job.get('fa_list'), str) else 'job_%i' % job_idx)
+            job_lst.append({'name': name, 'config': job})
+
+    name_lst = [job['name'] for job in job_lst]
+    if len(set(name_lst)) != len(name_lst):
+        raise ValueError('job names must be unique: %s' % ', '.join(sorted(set(
+            name for name in name_lst if name_lst.count(name) > 1))))
+
+    return job_lst
+
+
+def get_table_key(config):
+    """
+    Get the key of the OAP/OCP tables of a config, the tables depend only on the modifications, exact and published
+
+    :param config: settings, see lipidome_cli.load_config
+    :type config: dict
+    :return: key
+    :rtype: str
+    """
+    fa_lst, x_dct, mod_dct, exact, estimation_lst = get_settings(config)
+    return json.dumps([mod_dct, exact, config.get('published', True)], sort_keys=True)
+
+
+def get_mod_tables(job_lst, m_max=mod_table_m_max):
+    """
+    Calculate OAP and OCP of the numbers of modification sites m = 0 .. m_max, once per modification setting.
+    The FA lists are not loaded, the workers calculate larger m themselves.
+    Settings that fail are skipped, the worker reports the error in the row of each job.
+
+    :param job_lst: jobs from get_jobs
+    :type job_lst: list
+    :param m_max: largest number of modification sites of the tables
+    :type m_max: int
+    :return: {table key: {"get_oap": {(m, site_specific): value}, "get_ocp": {...}}}
+    :rtype: dict
+    """
+    job_group_dct = {}
+    for job in job_lst:
+        try:
+            if any(estimation.get('lipidome', 'ox') == 'ox' for estimation in get_settings(job['config'])[4]):
+                job_group_dct.setdefault(get_table_key(job['config']), job['config'])
+        except Exception:
+            continue  # the job reports the error
+
+    table_dct = {}
+    for table_key, config in job_group_dct.items():
+        try:
+            # any FA list gives the same tables, the values depend only on the modifications
+            fa_lst, x_dct, mod_dct, exact, estimation_lst = get_settings(config)
+            oxlipidome = load_lipidome('ox', [('FA18:2', 'C18H32O2', 18, 2)], x_dct, mod_dct, exact,
+                                       published=config.get('published', True))
+            table_dct[table_key] = dict((func_name, dict(((m, site_specific), getattr(oxlipidome, func_name)(
+                m, site_specific=site_specific)) for m in range(m_max + 1) for site_specific in [False, True]))
+                                        for func_name in mod_table_func_lst)
+        except Exception:
+            continue  # the jobs of this setting report the error
+
+    return table_dct
+
+
+def set_mod_tables(oxlipidome, mod_table_dct):
+    """
+    Put precalculated OAP and OCP into the result_cache of an estimator, see get_mod_tables
+
+    :param oxlipidome: estimator with the modifications of the tables
+    :type oxlipidome: TheoOxLipidome
+    :param mod_table_dct: {"get_oap": {(m, site_specific): value}, "get_ocp": {...}}
+    :type mod_table_dct: dict
+    """
+    update_cache_fingerprint(oxlipidome)
+    for func_name, value_dct in mod_table_dct.items():
+        for (m, site_specific), value in value_dct.items():
+            key = get_cache_key(oxlipidome, func_name, (m,), {'site_specific': site_specific})
+            oxlipidome.result_cache[key] = value
+
+
+def run_batch(batch_path, config=None, n_workers=None, output_path=None, verbose=True):
+    """
+    Run all estimations of all jobs, one row per job and estimation.
+    Failed jobs are reported in the column error, the other jobs are not stopped.
+
+    :param batch_path: folder of FA lists or JSON/YAML manifest
+    :type batch_path: str
+    :param config: defaults of all jobs, see lipidome_cli.load_config
+    :type config: dict
+    :param n_workers: number of processes, None for the number of CPU, 1 to run in this process
+    :type n_workers: int
+    :param output_path: write the table to this .csv, .tsv or .json file
+    :type output_path: str
+    :param verbose: set to False to hide the progress
+    :type verbose: bool
+    :return: rows with the columns of result_column_lst
+    :rtype: list
+    """
+    job_lst = get_jobs(batch_path, config)
+    table_dct = get_mod_tables(job_lst)
+    if verbose is True:
+        print('Run %i jobs with %i modification settings' % (len(job_lst), len(table_dct)))
+
+    row_lst = []
+    if n_workers == 1 or len(job_lst) <= 1:
+        _init_worker(table_dct)
+        for job in job_lst:
+            row_lst.extend(_run_job(job))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(table_dct,)) as executor:
+            for job_idx, job_row_lst in enumerate(executor.map(_run_job, job_lst)):
+                row_lst.extend(job_row_lst)
+                if verbose is True:
+                    print('%i / %i jobs done' % (job_idx + 1, len(job_lst)))
+
+    if output_path:
+        write_results(row_lst, output_path)
+
+    return row_lst
+
+
+def write_results(row_lst, output_path):
+    """
+    Write the rows of run_batch as .csv, .tsv or .json file, the numbers are written as exact integers
+
+    :param row_lst: rows from run_batch
+    :type row_lst: list
+    :param output_path: output file
+    :type output_path: str
+    """
+    if output_path.lower().endswith('.json'):
+        with open(output_path, 'w') as output_obj:
+            json.dump(row_lst, output_obj, indent=1)
+    else:
+        with open(output_path, 'w', newline='') as output_obj:
+            writer = csv.DictWriter(output_obj, fieldnames=result_column_lst,
+                                    delimiter='\t' if output_path.lower().endswith('.tsv') else ',')
+            writer.writeheader()
+            writer.writerows(row_lst)
+
+
+def _init_worker(table_dct):
+
+    global _worker_table_dct
+    _worker_table_dct = table_dct
+
+
+def _run_job(job):
+    # rows of all estimations of one job
+
+    start_time = time.perf_counter()
+    fa_lst = job['config'].get('fa_list', 'default')
+    base_row = dict((col, None) for col in result_column_lst)
+    base_row.update({'job': job['name'], 'fa_list': fa_lst if isinstance(fa_lst, str) else 'inline'})
+    try:
+        fa_lst, x_dct, mod_dct, exact, estimation_lst = get_settings(job['config'])
+        lipidome_dct = {}
+
+        def get_lipidome(lipidome):
+            if lipidome not in lipidome_dct:
+                lipidome_dct[lipidome] = load_lipidome(lipidome, fa_lst, x_dct, mod_dct, exact,
+                                                       published=job['config'].get('published', True))
+                if lipidome == 'ox':
+                    set_mod_tables(lipidome_dct[lipidome], _worker_table_dct.get(get_table_key(job['config']), {}))
+            return lipidome_dct[lipidome]
+
+        row_lst = []
+        for estimation in estimation_lst:
+            row = dict(base_row)
+            row.update(run_single_estimation(estimation, get_lipidome))
+            row['time_s'] = round(time.perf_counter() - start_time, 6)
+            start_time = time.perf_counter()
+            row_lst.append(row)
+        return row_lst
+    except Exception as err:
+        return [dict(base_row, error='%s: %s' % (type(err).__name__, err))]
+
+
+def main(argv=None):
+    """
+    Parse the command line, run all jobs and write the results table
+
+    :param argv: command line arguments, sys.argv[1:] by default
+    :type argv: list
+    :return: exit code, 1 if any job failed
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description='Estimate the size of unox/ox lipidome for many FA lists.')
+    parser.add_argument('batch', help='folder of FA lists or JSON/YAML manifest of the jobs')
+    parser.add_argument('-c', '--config', help='JSON or YAML config file with the defaults of all jobs')
+    parser.add_argument('-o', '--output', help='write the table to this .csv, .tsv or .json file instead of stdout')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of processes, default all CPU')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config) if args.config else {}
+    row_lst = run_batch(args.batch, config, n_workers=args.workers, output_path=args.output,
+                        verbose=args.output is not None)
+    if not args.output:
+        writer = csv.DictWriter(sys.stdout, fieldnames=result_column_lst)
+        writer.writeheader()
+        writer.writerows(row_lst)
+
+    return 1 if any(row['error'] for row in row_lst) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
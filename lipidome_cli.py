@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Command line entry point for the estimation of unox/ox lipidome with settings from a JSON or YAML config file.
+
+    $ python lipidome_cli.py --config my_config.json
+    $ cat my_config.json | python lipidome_cli.py --config - > results.json
+
+Only the standard library is imported at start, pandas/numpy/scipy are loaded only if the settings need them.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+default_fa_lst = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'FA_list.xlsx')
+
+default_lipid_classes = {
+    # list of lipid classes with 1 FA
+    'x1': ['FA', 'CholesterolEster', 'LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS',
+           'Monoacylglycerol', 'Ceramide', 'Sphingolipid'],
+    'x2': ['PA', 'PC', 'PE', 'PG', 'PI', 'PS', 'Diacylglycerol'],  # list of lipid classes with 2 FA
+    'x3': ['Triacylglycerol'],  # list of lipid classes with 3 FA
+    'x4': ['Cardiolipin'],  # list of lipid classes with 4 FA
+}
+
+default_mod_dct = {
+    'm_ocp': ['Aldehyde', 'CarboxylicAcid'],  # list of cleavage terminal
+    'm_oap': ['OH', 'OOH', 'KETO', 'EPOXY'],  # list of Oxygen addition modifications
+    'm_p': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J'],  # list of Prostane Rings
+    'm_o': ['D-IsoK', 'E-IsoK', 'TXA', 'TXB'],  # list of Other types
+}
+
+default_estimation_lst = (
+    [{'lipidome': 'unox', 'site_specific': site_specific} for site_specific in [False, True]]
+    + [{'lipidome': 'ox', 'site': site, 'site_specific': site_specific}
+       for site_specific in [False, True] for site in ['bis-allylic', 'db', 'allylic']]
+)
+
+
+def load_config(config_path):
+    """
+    Load settings from a JSON or YAML (.yaml/.yml, requires PyYAML) file, use '-' to read JSON from stdin.
+
+    Keys of the config, all optional:
+    fa_list (file path or list of [FA, Elem, C, DB] records), lipid_classes (dict x1..x4),
+    modifications (dict m_ocp, m_oap, m_p, m_o), exact (bool, default True),
+    published (bool, default True, False for the corrected equations, see README.md) and
+    estimations (list of {"lipidome": "unox" or "ox", "site": ..., "site_specific": ...}).
+
+    :param config_path: path to the config file or '-'
+    :type config_path: str
+    :return: settings
+    :rtype: dict
+    """
+    if config_path == '-':
+        return json.load(sys.stdin)
+    with open(config_path, 'r') as config_obj:
+        if os.path.splitext(config_path)[1].lower() in ['.yaml', '.yml']:
+            import yaml
+            return yaml.safe_load(config_obj) or {}
+        else:
+            return json.load(config_obj)
+
+
+def get_settings(config):
+    """
+    Get the settings of a config with the defaults for all missing keys
+
+    :param config: settings, see load_config
+    :type config: dict
+    :return: FA list, lipid classes, modifications, exact and list of estimations
+    :rtype: tuple
+    """
+    return (config.get('fa_list', default_fa_lst), config.get('lipid_classes', default_lipid_classes),
+            config.get('modifications', default_mod_dct), config.get('exact', True),
+            config.get('estimations', default_estimation_lst))
+
+
+def run_estimation(config):
+    """
+    Run all estimations of the config
+
+    :param config: settings, see load_config
+    :type config: dict
+    :return: settings used and one result per estimation
+    :rtype: dict
+    """
+    fa_lst, x_dct, mod_dct, exact, estimation_lst = get_settings(config)
+    lipidome_dct = {}
+
+    def get_lipidome(lipidome):
+        if lipidome not in lipidome_dct:
+            lipidome_dct[lipidome] = load_lipidome(lipidome, fa_lst, x_dct, mod_dct, exact,
+                                                   published=config.get('published', True))
+        return lipidome_dct[lipidome]
+
+    result_lst = [run_single_estimation(estimation, get_lipidome) for estimation in estimation_lst]
+
+    return {'fa_list': fa_lst if isinstance(fa_lst, str) else 'inline', 'exact': exact, 'results': result_lst}
+
+
+def load_lipidome(lipidome, fa_lst, x_dct, mod_dct, exact, published=True):
+    """
+    Load TheoLipidome for 'unox' or TheoOxLipidome for 'ox'
+
+    :param lipidome: 'unox' or 'ox'
+    :type lipidome: str
+    :param fa_lst: FA list file or list of records
+    :type fa_lst: str | list
+    :param x_dct: lipid classes
+    :type x_dct: dict
+    :param mod_dct: modification types
+    :type mod_dct: dict
+    :param exact: set to True to use exact arbitrary-precision integers
+    :type exact: bool
+    :param published: set to True to use the equations of the publication, False for the corrected equations
+    :type published: bool
+    :return: estimator
+    :rtype: TheoLipidome | TheoOxLipidome
+    """
+    if lipidome == 'unox':
+        from unoxlipidome_estimation import TheoLipidome
+        return TheoLipidome(fa_lst, x_dct, exact=exact, verbose=False, published=published)
+    elif lipidome == 'ox':
+        from oxlipidome_estimation import TheoOxLipidome
+        return TheoOxLipidome(fa_lst, x_dct, mod_dct, exact=exact, verbose=False, published=published)
+    else:
+        raise ValueError('lipidome must be "unox" or "ox", got: %s' % lipidome)
+
+
+def run_single_estimation(estimation, get_lipidome):
+    """
+    Run one estimation of the config
+
+    :param estimation: {"lipidome": "unox" or "ox", "site": ..., "site_specific": ...}
+    :type estimation: dict
+    :param get_lipidome: function that returns the estimator for 'unox' or 'ox'
+    :type get_lipidome: function
+    :return: settings and numbers of the estimation
+    :rtype: dict
+    """
+    lipidome = estimation.get('lipidome', 'ox')
+    site_specific = bool(estimation.get('site_specific', False))
+    if lipidome == 'unox':
+        return {'lipidome': 'unox', 'site_specific': site_specific,
+                'lipid': get_lipidome('unox').get_estimation(site_specific=site_specific)}
+    elif lipidome == 'ox':
+        oxlipidome = get_lipidome('ox')
+        site = estimation.get('site', 'bis-allylic')
+        return {'lipidome': 'ox', 'site': site, 'site_specific': site_specific,
+                'oxfa': oxlipidome.get_all_oxfa(site=site, site_specific=site_specific),
+                'oxlipid_1oxfa': oxlipidome.get_all_class_1oxfa(site=site, site_specific=site_specific),
+                'oxlipid_alloxfa': oxlipidome.get_all_class_alloxfa(site=site, site_specific=site_specific)}
+    else:
+        raise ValueError('lipidome must be "unox" or "ox", got: %s' % lipidome)
+
+
+def main(argv=None):
+    """
+    Parse the command line, run the estimations and write the results as JSON
+
+    :param argv: command line arguments, sys.argv[1:] by default
+    :type argv: list
+    :return: exit code
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description='Estimate the size of unox/ox lipidome from a list of FA.')
+    parser.add_argument('-c', '--config', help='JSON or YAML config file, use - to read JSON from stdin')
+    parser.add_argument('-f', '--fa-list', help='FA list file, overrides fa_list of the config')
+    parser.add_argument('-o', '--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--indent', type=int, default=None, help='indent of the JSON output')
+    parser.add_argument('--server', help='send the config to a running lipidome_server, '
+                                         'e.g. http://127.0.0.1:8765 or unix:/tmp/lipidome.sock')
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config:
+        config = load_config(args.config)
+    if args.fa_list:
+        config['fa_list'] = args.fa_list
+
+    if args.server:
+        from lipidome_server import query_server
+        if isinstance(config.get('fa_list'), str):
+            config['fa_list'] = os.path.abspath(config['fa_list'])  # the server may run in another folder
+        result = query_server(args.server, config)
+    else:
+        result = run_estimation(config)
+    output = json.dumps(result, indent=args.indent)
+    if args.output:
+        with open(args.output, 'w') as output_obj:
+            output_obj.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
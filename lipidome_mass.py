@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Exact masses of the theoretical (ox)lipidome.
+
+The neutral formula of a species is the formula of the backbone (alcohol with the head group)
+plus the formula of each (ox)FA minus one H2O per ester or amide bond.
+oxFA formulas are the FA formula plus the modification deltas,
+OCP are the FA cut at the (r + 1)th C=C bond from the carboxyl group with an aldehyde or acid terminal.
+C=C positions are taken from the optional column DB_pos of the FA list (e.g. '5,8,11,14'), else
+methylene interrupted C=C are assumed: n-9 for 1 C=C, n-6 for 2 to 4 C=C and n-3 for more.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+from fa_list_loader import load_fa_list
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+element_mass_dct = {'C': 12.0, 'H': 1.00782503207, 'N': 14.0030740048, 'O': 15.99491461956,
+                    'P': 30.97376163, 'S': 31.97207100, 'Na': 22.9897692809, 'K': 38.96370668}
+
+# neutral formula of backbone and head group, the species formula is backbone + FA - n_FA * H2O
+backbone_formula_dct = {
+    'FA': 'H2O',
+    'CholesterolEster': 'C27H46O', 'Cholesterol Ester': 'C27H46O', 'CE': 'C27H46O',
+    'LPA': 'C3H9O6P', 'PA': 'C3H9O6P',
+    'LPC': 'C8H20NO6P', 'PC': 'C8H20NO6P',
+    'LPE': 'C5H14NO6P', 'PE': 'C5H14NO6P',
+    'LPG': 'C6H15O8P', 'PG': 'C6H15O8P',
+    'LPI': 'C9H19O11P', 'PI': 'C9H19O11P',
+    'LPS': 'C6H14NO8P', 'PS': 'C6H14NO8P',
+    'Monoacylglycerol': 'C3H8O3', 'MG': 'C3H8O3',
+    'Diacylglycerol': 'C3H8O3', 'DG': 'C3H8O3',
+    'Triacylglycerol': 'C3H8O3', 'TG': 'C3H8O3',
+    'Ceramide': 'C18H37NO2', 'Cer': 'C18H37NO2',  # sphingosine d18:1
+    'Sphingolipid': 'C23H49N2O5P', 'SM': 'C23H49N2O5P',  # sphingomyelin d18:1
+    'Cardiolipin': 'C9H22O13P2', 'CL': 'C9H22O13P2',
+}
+
+# formula delta of the modifications, OCP terminals are added to the cut FA with a CH3 terminal
+mod_delta_dct = {
+    'OH': {'O': 1}, 'OOH': {'O': 2}, 'KETO': {'O': 1, 'H': -2}, 'EPOXY': {'O': 1},
+    'Aldehyde': {'O': 1, 'H': -2}, 'CarboxylicAcid': {'O': 2, 'H': -2}, 'Carboxylic Acid': {'O': 2, 'H': -2},
+    # prostane rings and other cyclic products, delta to the FA, e.g. PGE2 = FA20:4 + O3
+    'A': {'O': 2, 'H': -2}, 'B': {'O': 2, 'H': -2}, 'C': {'O': 2, 'H': -2}, 'D': {'O': 3}, 'E': {'O': 3},
+    'F': {'O': 3, 'H': 2}, 'G': {'O': 4}, 'H': {'O': 3}, 'I': {'O': 3}, 'J': {'O': 2, 'H': -2},
+    'D-IsoK': {'O': 3}, 'E-IsoK': {'O': 3}, 'TXA': {'O': 3}, 'TXB': {'O': 4, 'H': 2},
+}
+mod_delta_dct.update(dict(('%s-Ring' % ring, mod_delta_dct[ring]) for ring in 'ABCDEFGHIJ'))
+
+# mass shift from the neutral mass to the m/z of singly charged ions
+adduct_delta_dct = {'M': 0.0, '[M+H]+': 1.007276466812, '[M+Na]+': 22.989218, '[M+NH4]+': 18.033823,
+                    '[M+K]+': 38.963158, '[M-H]-': -1.007276466812, '[M+HCOO]-': 44.998201,
+                    '[M+CH3COO]-': 59.013851}
+
+_formula_rgx = re.compile(r'([A-Z][a-z]?)(-?\d*)')
+
+
+def parse_formula(formula):
+    """
+    Count the elements of a formula, e.g. C16H32O2 -> {'C': 16, 'H': 32, 'O': 2}
+
+    :param formula: elemental formula
+    :type formula: str
+    :return: number of atoms per element
+    :rtype: dict
+    """
+    elem_dct = {}
+    for elem, count in _formula_rgx.findall(str(formula).strip()):
+        elem_dct[elem] = elem_dct.get(elem, 0) + (int(count) if count else 1)
+    return elem_dct
+
+
+def get_formula_mass(elem_dct):
+    """
+    Calculate the monoisotopic mass of a formula
+
+    :param elem_dct: number of atoms per element, e.g. from parse_formula
+    :type elem_dct: dict
+    :return: monoisotopic mass
+    :rtype: float
+    """
+    try:
+        return sum(element_mass_dct[elem] * count for elem, count in elem_dct.items())
+    except KeyError as err:
+        raise ValueError('no mass for element: %s' % err.args[0])
+
+
+def get_db_pos(c, n_db, db_pos=None):
+    """
+    Get the positions of the C=C bonds counted from the carboxyl group
+
+    :param c: number of C
+    :type c: int
+    :param n_db: number of C=C bond
+    :type n_db: int
+    :param db_pos: positions as text, e.g. '5,8,11,14', None to use methylene interrupted n-9, n-6 or n-3 C=C
+    :type db_pos: str
+    :return: list of positions
+    :rtype: list
+    """
+    if db_pos is not None and str(db_pos).strip() not in ['', 'nan']:
+        return [int(float(pos)) for pos in str(db_pos).replace(';', ',').split(',')]
+    if n_db == 1:
+        omega = 9
+    elif n_db <= 4:
+        omega = 6
+    else:
+        omega = 3
+    first_pos = max(c - omega - 3 * (n_db - 1), 2)
+    return [first_pos + 3 * i for i in range(n_db)]
+
+
+class LipidomeMassIndex(object):
+
+    """
+    Sorted neutral masses of all species of one lipidome with their index from TheoOxLipidomeSpecies.rank.
+    Both arrays can be saved as .npy files and loaded memory mapped, queries are binary searches.
+    """
+
+    def __init__(self, mass_arr, rank_arr, settings=None):
+        """
+        :param mass_arr: sorted neutral masses
+        :type mass_arr: numpy.ndarray
+        :param rank_arr: index of the species of each mass, see TheoOxLipidomeSpecies.unrank
+        :type rank_arr: numpy.ndarray
+        :param settings: settings used to build the index
+        :type settings: dict
+        """
+        self.mass_arr = mass_arr
+        self.rank_arr = rank_arr
+        self.settings = settings or {}
+
+    def __len__(self):
+        return len(self.mass_arr)
+
+    def get_window(self, mz, ppm=5.0, adduct='M'):
+        """
+        Find the range of the index with masses within +/- ppm of the m/z, for one m/z or an array of m/z
+
+        :param mz: m/z values
+        :type mz: float | numpy.ndarray
+        :param ppm: mass tolerance in ppm
+        :type ppm: float
+        :param adduct: adduct in adduct_delta_dct, 'M' for neutral masses
+        :type adduct: str
+        :return: start and stop positions in mass_arr and rank_arr
+        :rtype: tuple
+        """
+        mass = np.asarray(mz, dtype=np.float64) - adduct_delta_dct[adduct]
+        delta = mass * ppm * 1e-6
+        start = np.searchsorted(self.mass_arr, mass - delta, side='left')
+        stop = np.searchsorted(self.mass_arr, mass + delta, side='right')
+        return start, stop
+
+    def count(self, mz, ppm=5.0, adduct='M'):
+        """
+        Count the species within +/- ppm of the m/z, for one m/z or an array of m/z
+
+        :param mz: m/z values
+        :type mz: float | numpy.ndarray
+        :param ppm: mass tolerance in ppm
+        :type ppm: float
+        :param adduct: adduct in adduct_delta_dct, 'M' for neutral masses
+        :type adduct: str
+        :return: number of species
+        :rtype: int | numpy.ndarray
+        """
+        start, stop = self.get_window(mz, ppm=ppm, adduct=adduct)
+        return stop - start
+
+    def query(self, mz, ppm=5.0, adduct='M'):
+        """
+        Get all species within +/- ppm of one m/z, use TheoOxLipidomeSpecies.unrank to get the species names
+
+        :param mz: m/z
+        :type mz: float
+        :param ppm: mass tolerance in ppm
+        :type ppm: float
+        :param adduct: adduct in adduct_delta_dct, 'M' for neutral masses
+        :type adduct: str
+        :return: species index and neutral masses
+        :rtype: tuple
+        """
+        start, stop = self.get_window(float(mz), ppm=ppm, adduct=adduct)
+        return np.asarray(self.rank_arr[start:stop]), np.asarray(self.mass_arr[start:stop])
+
+    def save(self, index_dir):
+        """
+        Save the index as mass.npy, rank.npy and settings.json
+
+        :param index_dir: output folder, created if needed
+        :type index_dir: str
+        """
+        if not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+        np.save(os.path.join(index_dir, 'mass.npy'), np.asarray(self.mass_arr))
+        np.save(os.path.join(index_dir, 'rank.npy'), np.asarray(self.rank_arr))
+        with open(os.path.join(index_dir, 'settings.json'), 'w') as settings_obj:
+            json.dump(self.settings, settings_obj, indent=1)
+
+
+def load_mass_index(index_dir, mmap=True):
+    """
+    Load an index saved by LipidomeMassIndex.save
+
+    :param index_dir: folder of the index
+    :type index_dir: str
+    :param mmap: set to False to read the arrays into memory
+    :type mmap: bool
+    :return: mass index
+    :rtype: LipidomeMassIndex
+    """
+    mmap_mode = 'r' if mmap is True else None
+    mass_arr = np.load(os.path.join(index_dir, 'mass.npy'), mmap_mode=mmap_mode)
+    rank_arr = np.load(os.path.join(index_dir, 'rank.npy'), mmap_mode=mmap_mode)
+    settings = {}
+    settings_path = os.path.join(index_dir, 'settings.json')
+    if os.path.isfile(settings_path):
+        with open(settings_path, 'r') as settings_obj:
+            settings = json.load(settings_obj)
+
+    return LipidomeMassIndex(mass_arr, rank_arr, settings)
+
+
+def build_mass_index(fa_lst_path, x_dct, mod_dct, site='bis-allylic', site_specific=False, lipidome='alloxfa',
+                     backbone_dct=None, mod_delta_update_dct=None, max_count=200000000, published=True):
+    """
+    Calculate the neutral masses of all species of one lipidome, block by block with numpy.
+
+    :param fa_lst_path: FA list supported by load_fa_list, with column Elem and optional column DB_pos
+    :type fa_lst_path: str | pandas.DataFrame | list
+    :param x_dct: lists of lipid classes that have n FA residues
+    :type x_dct: dict
+    :param mod_dct: lists of the modification types
+    :type mod_dct: dict
+    :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+    :type site: str
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param lipidome: 'alloxfa', '1oxfa' or 'unox', see TheoOxLipidomeSpecies.get_blocks
+    :type lipidome: str
+    :param backbone_dct: backbone formula of lipid classes not in backbone_formula_dct
+    :type backbone_dct: dict
+    :param mod_delta_update_dct: formula delta of modifications not in mod_delta_dct, e.g. {'NO2': {'N': 1, 'O': 2}}
+    :type mod_delta_update_dct: dict
+    :param max_count: max number of species, 8 + 8 bytes each
+    :type max_count: int
+    :param published: set to False to index the species of the corrected equations, see TheoOxLipidomeSpecies
+    :type published: bool
+    :return: mass index
+    :rtype: LipidomeMassIndex
+    """
+    fa_df = load_fa_list(fa_lst_path)
+    species_generator = TheoOxLipidomeSpecies(fa_df, x_dct, mod_dct, published=published)
+    tot_count = species_generator.get_count(site=site, site_specific=site_specific, lipidome=lipidome)
+    if tot_count > max_count:
+        raise ValueError('%i species, more than max_count %i' % (tot_count, max_count))
+
+    _backbone_dct = dict(backbone_formula_dct)
+    _backbone_dct.update(backbone_dct or {})
+    _mod_delta_dct = dict(mod_delta_dct)
+    _mod_delta_dct.update(mod_delta_update_dct or {})
+    missing_lst = [lipid_class for x in ['x1', 'x2', 'x3', 'x4'] for lipid_class in x_dct.get(x, [])
+                   if lipid_class not in _backbone_dct]
+    if missing_lst:
+        raise ValueError('no backbone formula for: %s' % ', '.join(missing_lst))
+
+    h2o_mass = get_formula_mass({'H': 2, 'O': 1})
+    slot_mass_dct = {'u': np.array([get_formula_mass(parse_formula(elem)) for elem in fa_df['Elem'].tolist()])}
+    if lipidome != 'unox':
+        slot_mass_dct['o'] = get_oxfa_mass_arr(species_generator, fa_df, site, site_specific, _mod_delta_dct)
+
+    mass_lst = []
+    for block in species_generator.get_blocks(site_specific=site_specific, lipidome=lipidome):
+        n_fa = len(block.slot_pattern)
+        backbone_mass = get_formula_mass(parse_formula(_backbone_dct[block.lipid_class])) - n_fa * h2o_mass
+        for comp_lst in species_generator.get_block_parts(block, site=site, site_specific=site_specific):
+            part_mass_arr = np.array([backbone_mass])
+            for comp, slot_tuple in comp_lst:
+                comp_mass_arr = _get_comp_mass_arr(comp, [slot_mass_dct[block.slot_pattern[slot]]
+                                                          for slot in slot_tuple])
+                part_mass_arr = (part_mass_arr[:, None] + comp_mass_arr[None, :]).ravel()
+            mass_lst.append(part_mass_arr)
+
+    mass_arr = np.concatenate(mass_lst) if mass_lst else np.zeros(0)
+    rank_arr = np.argsort(mass_arr, kind='stable').astype(np.int64)
+    settings = {'fa_list': fa_lst_path if isinstance(fa_lst_path, str) else 'inline',
+                'site': site, 'site_specific': site_specific, 'lipidome': lipidome, 'published': published,
+                'total': tot_count}
+
+    return LipidomeMassIndex(mass_arr[rank_arr], rank_arr, settings)
+
+
+def get_oxfa_mass_arr(species_generator, fa_df, site='bis-allylic', site_specific=False, delta_dct=None):
+    """
+    Calculate the neutral mass of all oxFA in the order of TheoOxLipidomeSpecies.get_oxfa_label_lst
+
+    :param species_generator: TheoOxLipidomeSpecies of the FA list
+    :type species_generator: TheoOxLipidomeSpecies
+    :param fa_df: FA list with the columns Elem, C, DB and optional DB_pos
+    :type fa_df: pandas.DataFrame
+    :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+    :type site: str
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param delta_dct: formula delta of each modification, mod_delta_dct by default
+    :type delta_dct: dict
+    :return: neutral masses
+    :rtype: numpy.ndarray
+    """
+    delta_dct = mod_delta_dct if delta_dct is None else delta_dct
+    ocp_set = set(species_generator.m_dct.get('m_ocp', []))
+    m_shift = species_generator.oxlipidome.get_m_shift(site)
+    db_pos_lst = fa_df['DB_pos'].tolist() if 'DB_pos' in fa_df.columns else [None] * fa_df.shape[0]
+
+    mass_lst = []
+    for elem, c, n_db, db_pos in zip(fa_df['Elem'].tolist(), fa_df['C'].tolist(), fa_df['DB'].tolist(), db_pos_lst):
+        if n_db <= 0:
+            continue
+        fa_elem_dct = parse_formula(elem)
+        pos_lst = get_db_pos(int(c), int(n_db), db_pos)
+        for mod_lst in species_generator.iter_fa_mod(n_db, n_db + m_shift, site_specific=site_specific):
+            elem_dct = dict(fa_elem_dct)
+            for mod in mod_lst:
+                mod_name, mod_count, r = _parse_mod_label(mod, ocp_set, delta_dct)
+                if r is not None:
+                    # cut at the (r + 1)th C=C, keep r C=C and the carboxyl group
+                    r = min(r, len(pos_lst) - 1)
+                    elem_dct['C'] += pos_lst[r] - c
+                    elem_dct['H'] += 2 * (pos_lst[r] - c) + 2 * (n_db - r)
+                for elem_key, elem_count in delta_dct[mod_name].items():
+                    elem_dct[elem_key] = elem_dct.get(elem_key, 0) + elem_count * mod_count
+            mass_lst.append(get_formula_mass(elem_dct))
+
+    return np.array(mass_lst, dtype=np.float64)
+
+
+def _parse_mod_label(mod, ocp_set, delta_dct):
+    # 'OH' / '2OH' / 'OH@3' / 'Aldehyde@2' -> (name, count, r of OCP or None)
+
+    mod_name, _, pos = mod.partition('@')
+    if mod_name in ocp_set:
+        return mod_name, 1, int(pos)
+    if mod_name in delta_dct:
+        return mod_name, 1, None
+    count_rgx = re.match(r'^(\d+)(.+)$', mod_name)
+    if count_rgx and count_rgx.group(2) in delta_dct:
+        return count_rgx.group(2), int(count_rgx.group(1)), None
+
+    raise ValueError('no formula delta for modification: %s' % mod_name)
+
+
+def _get_comp_mass_arr(comp, slot_mass_lst):
+    # masses of all values of one component of TheoOxLipidomeSpecies.get_block_parts, in the order of the index
+
+    if comp[0] == 'range':
+        return sum(slot_mass_lst)
+    elif comp[0] == 'pair':
+        a_arr, b_arr = np.triu_indices(comp[1], k=1)
+        return slot_mass_lst[0][a_arr] + slot_mass_lst[1][b_arr]
+    else:
+        return _get_multiset_mass_arr(slot_mass_lst[0][:comp[1]] if slot_mass_lst else np.zeros(0), comp[2])
+
+
+def _get_multiset_mass_arr(mass_arr, n):
+    # masses of all combinations with repetition of n items, in the order of combinations_with_replacement
+
+    if n == 0:
+        return np.zeros(1)
+    elif n == 1:
+        return mass_arr.copy()
+    else:
+        return np.concatenate([mass + _get_multiset_mass_arr(mass_arr[i:], n - 1) for i, mass in enumerate(mass_arr)])
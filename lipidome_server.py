@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Local estimation server, keeps TheoLipidome / TheoOxLipidome loaded between requests.
+
+    $ python lipidome_server.py --port 8765
+    $ python lipidome_server.py --socket /tmp/lipidome.sock
+    $ python lipidome_cli.py --config my_config.json --server http://127.0.0.1:8765
+
+Requests and results are JSON, with the same configs and results as lipidome_cli:
+    POST /estimate  one config
+    POST /batch     {"configs": [config, ...]}, one result or {"error": ...} per config
+    GET  /stats     number of loaded estimators, cached results, hits and misses
+    POST /clear     drop all estimators and results
+
+Estimators are kept by the hash of the FA list (path with mtime and size, or the records),
+lipid classes, modifications and exact; results by the same hash and the estimation.
+Both are bounded LRU caches. Only the standard library is imported at start.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from lipidome_cli import get_settings, load_lipidome, run_single_estimation
+
+default_host = '127.0.0.1'
+default_port = 8765
+
+
+class LRUCache(object):
+
+    """
+    Dict with max_size items, the least recently used item is dropped first.
+    """
+
+    def __init__(self, max_size):
+        """
+        :param max_size: max number of items, >= 1
+        :type max_size: int
+        """
+        self.max_size = max(int(max_size), 1)
+        self.item_dct = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Get an item and mark it as recently used
+
+        :param key: key of the item
+        :type key: str | tuple
+        :param default: returned if the key is not in the cache
+        :type default: object
+        :return: item or default
+        :rtype: object
+        """
+        try:
+            value = self.item_dct.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.item_dct[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Add an item, drop the least recently used items above max_size
+
+        :param key: key of the item
+        :type key: str | tuple
+        :param value: item
+        :type value: object
+        """
+        self.item_dct.pop(key, None)
+        self.item_dct[key] = value
+        while len(self.item_dct) > self.max_size:
+            self.item_dct.popitem(last=False)
+
+    def clear(self):
+        self.item_dct.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        """
+        :return: size, max_size, hits and misses
+        :rtype: dict
+        """
+        return {'size': len(self.item_dct), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self.item_dct)
+
+
+class EstimationService(object):
+
+    """
+    Warm estimators and cached results for the configs of lipidome_cli.
+    The lock is only held to get or put items of the caches, estimators are loaded and evaluated outside of it,
+    so requests of other configs are not blocked. Two requests of the same new config may both calculate it.
+    """
+
+    def __init__(self, max_lipidomes=8, max_results=100000):
+        """
+        :param max_lipidomes: max number of loaded TheoLipidome / TheoOxLipidome
+        :type max_lipidomes: int
+        :param max_results: max number of cached results of single estimations
+        :type max_results: int
+        """
+        self.lipidome_cache = LRUCache(max_lipidomes)
+        self.result_cache = LRUCache(max_results)
+        self.lock = threading.Lock()
+
+    def estimate(self, config):
+        """
+        Run all estimations of one config, same result as lipidome_cli.run_estimation
+
+        :param config: settings, see lipidome_cli.load_config
+        :type config: dict
+        :return: settings used and one result per estimation
+        :rtype: dict
+        """
+        fa_lst, x_dct, mod_dct, exact, estimation_lst = get_settings(config)
+        published = config.get('published', True)
+        config_hash = get_config_hash(fa_lst, x_dct, mod_dct, exact, published)
+
+        def get_lipidome(lipidome):
+            lipidome_key = (config_hash, lipidome)
+            with self.lock:
+                lipidome_obj = self.lipidome_cache.get(lipidome_key)
+            if lipidome_obj is None:
+                lipidome_obj = load_lipidome(lipidome, fa_lst, x_dct, mod_dct, exact, published=published)
+                with self.lock:
+                    self.lipidome_cache.put(lipidome_key, lipidome_obj)
+            return lipidome_obj
+
+        result_lst = []
+        for estimation in estimation_lst:
+            result_key = (config_hash, json.dumps(estimation, sort_keys=True))
+            with self.lock:
+                result = self.result_cache.get(result_key)
+            if result is None:
+                result = run_single_estimation(estimation, get_lipidome)
+                with self.lock:
+                    self.result_cache.put(result_key, result)
+            result_lst.append(dict(result))
+
+        return {'fa_list': fa_lst if isinstance(fa_lst, str) else 'inline', 'exact': exact, 'results': result_lst}
+
+    def estimate_batch(self, config_lst):
+        """
+        Run a list of configs, errors are returned for each config and do not stop the batch
+
+        :param config_lst: list of configs
+        :type config_lst: list
+        :return: one result or {"error": message} per config
+        :rtype: list
+        """
+        batch_result_lst = []
+        for config in config_lst:
+            try:
+                batch_result_lst.append(self.estimate(config))
+            except Exception as _e:
+                batch_result_lst.append({'error': '%s: %s' % (type(_e).__name__, _e)})
+        return batch_result_lst
+
+    def get_stats(self):
+        """
+        :return: stats of the estimator and the result caches
+        :rtype: dict
+        """
+        with self.lock:
+            return {'lipidomes': self.lipidome_cache.get_stats(), 'results': self.result_cache.get_stats()}
+
+    def clear(self):
+        with self.lock:
+            self.lipidome_cache.clear()
+            self.result_cache.clear()
+
+
+def get_config_hash(fa_lst, x_dct, mod_dct, exact, published=True):
+    """
+    Hash of the settings an estimator depends on. FA list files are identified by path, mtime and size,
+    so results of a changed file are not reused.
+
+    :param fa_lst: FA list file or list of records
+    :type fa_lst: str | list
+    :param x_dct: lipid classes
+    :type x_dct: dict
+    :param mod_dct: modification types
+    :type mod_dct: dict
+    :param exact: set to True to use exact arbitrary-precision integers
+    :type exact: bool
+    :param published: set to True to use the equations of the publication
+    :type published: bool
+    :return: sha1 hex digest
+    :rtype: str
+    """
+    if isinstance(fa_lst, str):
+        abs_path = os.path.abspath(fa_lst)
+        file_stat = os.stat(abs_path)
+        fa_key = [abs_path, file_stat.st_mtime_ns, file_stat.st_size]
+    else:
+        fa_key = fa_lst
+    settings = json.dumps([fa_key, x_dct, mod_dct, bool(exact), bool(published)], sort_keys=True, default=str)
+    return hashlib.sha1(settings.encode('utf-8')).hexdigest()
+
+
+class EstimationRequestHandler(BaseHTTPRequestHandler):
+
+    """
+    JSON endpoints of the EstimationService of the server.
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep the connection open for the next request
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.server.service.get_stats())
+        else:
+            self._send_json(404, {'error': 'unknown path: %s' % self.path})
+
+    def do_POST(self):
+        path = self.path.rstrip('/')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+        except ValueError as _e:
+            self._send_json(400, {'error': 'invalid JSON: %s' % _e})
+            return
+
+        try:
+            if path == '/estimate':
+                self._send_json(200, self.server.service.estimate(payload))
+            elif path == '/batch':
+                config_lst = payload.get('configs', []) if isinstance(payload, dict) else payload
+                self._send_json(200, {'results': self.server.service.estimate_batch(config_lst)})
+            elif path == '/clear':
+                self.server.service.clear()
+                self._send_json(200, {'status': 'cleared'})
+            else:
+                self._send_json(404, {'error': 'unknown path: %s' % self.path})
+        except Exception as _e:
+            self._send_json(400, {'error': '%s: %s' % (type(_e).__name__, _e)})
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose is True:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send_json(self, status, result):
+
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ThreadingEstimationServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+if hasattr(socket, 'AF_UNIX'):
+    from socketserver import UnixStreamServer
+
+    class ThreadingUnixEstimationServer(ThreadingMixIn, UnixStreamServer):
+
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = UnixStreamServer.get_request(self)
+            return request, ('unix', 0)
+
+
+def make_server(service, host=default_host, port=default_port, socket_path=None, verbose=False):
+    """
+    Create the HTTP server on host:port or on a Unix socket
+
+    :param service: service of the requests
+    :type service: EstimationService
+    :param host: address to bind, localhost by default
+    :type host: str
+    :param port: TCP port, 0 for any free port
+    :type port: int
+    :param socket_path: path of a Unix socket, used instead of host and port
+    :type socket_path: str
+    :param verbose: set to True to log each request
+    :type verbose: bool
+    :return: server, call serve_forever() to run it
+    :rtype: socketserver.BaseServer
+    """
+    if socket_path:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix sockets are not supported on this platform')
+        remove_socket(socket_path)
+        server = ThreadingUnixEstimationServer(socket_path, EstimationRequestHandler)
+    else:
+        server = ThreadingEstimationServer((host, int(port)), EstimationRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def remove_socket(socket_path):
+    """
+    Remove the Unix socket file of an earlier server, other files are never removed
+
+    :param socket_path: path of a Unix socket
+    :type socket_path: str
+    """
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise ValueError('not a Unix socket, not removed: %s' % socket_path)
+        os.remove(socket_path)
+
+
+class UnixHTTPConnection(HTTPConnection):
+
+    """
+    HTTPConnection over a Unix socket
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def query_server(server_url, payload, endpoint='/estimate', timeout=600):
+    """
+    Send one request to a running server
+
+    :param server_url: http://host:port or unix:/path/to/socket
+    :type server_url: str
+    :param payload: config for /estimate, {"configs": [...]} for /batch, None for GET /stats
+    :type payload: dict
+    :param endpoint: /estimate, /batch, /stats or /clear
+    :type endpoint: str
+    :param timeout: timeout in s
+    :type timeout: float
+    :return: JSON result of the server
+    :rtype: dict
+    """
+    if server_url.startswith('unix:'):
+        connection = UnixHTTPConnection(server_url[len('unix:'):], timeout=timeout)
+    else:
+        address = server_url.split('://', 1)[-1].rstrip('/')
+        host, _, port = address.partition(':')
+        connection = HTTPConnection(host, int(port or default_port), timeout=timeout)
+    try:
+        if payload is None:
+            connection.request('GET', endpoint)
+        else:
+            connection.request('POST', endpoint, body=json.dumps(payload).encode('utf-8'),
+                               headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        result = json.loads(response.read().decode('utf-8'))
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ValueError('server error %i: %s' % (response.status, result.get('error')))
+    return result
+
+
+def main(argv=None):
+    """
+    Parse the command line and run the server until it is stopped
+
+    :param argv: command line arguments, sys.argv[1:] by default
+    :type argv: list
+    :return: exit code
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description='Local server for the estimation of unox/ox lipidome.')
+    parser.add_argument('--host', default=default_host, help='address to bind, default: %s' % default_host)
+    parser.add_argument('-p', '--port', type=int, default=default_port, help='TCP port, default: %i' % default_port)
+    parser.add_argument('--socket', help='path of a Unix socket, used instead of host and port')
+    parser.add_argument('--max-lipidomes', type=int, default=8, help='max number of loaded estimators')
+    parser.add_argument('--max-results', type=int, default=100000, help='max number of cached results')
+    parser.add_argument('--preload', help='JSON or YAML config to run once at start')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log each request')
+    args = parser.parse_args(argv)
+
+    service = EstimationService(max_lipidomes=args.max_lipidomes, max_results=args.max_results)
+    if args.preload:
+        from lipidome_cli import load_config
+        service.estimate(load_config(args.preload))
+    server = make_server(service, host=args.host, port=args.port, socket_path=args.socket, verbose=args.verbose)
+    if args.socket:
+        print('Serving on unix:%s' % args.socket)
+    else:
+        print('Serving on http://%s:%i' % server.server_address[:2])
+    sys.stdout.flush()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # clean up the socket on kill
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            remove_socket(args.socket)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+from functools import wraps
+
+try:
+    from math import comb as _math_comb
+except ImportError:  # Python < 3.8
+    _math_comb = None
+
+
+def count_no_mirror(f, n_sn):
+    """
+    Count the FA combinations on n_sn positions with mirrored products removed (e.g. TG and cardiolipin)
+
+    The only symmetry is the reversal of the sn positions, so the number of unique products is the
+    number of orbits of the reversal group (Burnside's lemma):
+    (all products + products identical to their mirror) / 2 = (f^n + f^ceil(n/2)) / 2
+
+    :param f: number of fatty acids that can be placed on each sn position
+    :type f: int
+    :param n_sn: number of sn positions
+    :type n_sn: int
+    :return: Number of products without mirrored duplicates
+    :rtype: int
+    """
+    f = int(f)
+    n_sn = int(n_sn)
+    return (f ** n_sn + f ** ((n_sn + 1) // 2)) // 2
+
+
+def comb_exact(n, k):
+    """
+    Calculate the binomial coefficient n choose k with arbitrary-precision integers
+
+    Same convention as scipy.special.comb: return 0 if k > n, n < 0 or k < 0.
+
+    :param n: number of items
+    :type n: int
+    :param k: number of items to choose
+    :type k: int
+    :return: n choose k
+    :rtype: int
+    """
+    n = int(n)
+    k = int(k)
+    if k < 0 or n < 0 or k > n:
+        return 0
+    if _math_comb is not None:
+        return _math_comb(n, k)
+    k = min(k, n - k)
+    _comb = 1
+    for i in range(1, k + 1):
+        _comb = _comb * (n - k + i) // i
+    return _comb
+
+
+def get_comb(exact=False):
+    """
+    Select the binomial coefficient function used by the estimators
+
+    :param exact: set to False to use scipy.special.comb in float mode.
+        set to True to use exact arbitrary-precision integers
+    :type exact: bool
+    :return: function with the signature comb(n, k)
+    :rtype: function
+    """
+    if exact is True:
+        return comb_exact
+    else:
+        from scipy.special import comb
+        return comb
+
+
+def comb_array(n, k):
+    """
+    Calculate the binomial coefficient n choose k for a number or a numpy array of n and a fixed k
+
+    The product formula is evaluated step by step, each step is itself a binomial coefficient
+    and thus exact for python int and numpy arrays of dtype object.
+    All values of n must be >= 0.
+
+    :param n: number of items, int or numpy array
+    :type n: int | numpy.ndarray
+    :param k: number of items to choose
+    :type k: int
+    :return: n choose k with the same shape as n
+    :rtype: int | numpy.ndarray
+    """
+    _comb = n * 0 + 1
+    for i in range(int(k)):
+        _comb = _comb * (n - i) // (i + 1)
+    return _comb
+
+
+def comb_arrays(n, k):
+    """
+    Calculate the binomial coefficient n choose k element wise for numpy arrays of n and k
+
+    Same steps as comb_array, each element stops after its own k.
+    Exact for arrays of dtype object (python int), float arrays are divided without rounding.
+    All values of n and k must be >= 0, return 0 if k > n.
+
+    :param n: number of items
+    :type n: numpy.ndarray
+    :param k: number of items to choose
+    :type k: numpy.ndarray
+    :return: n choose k
+    :rtype: numpy.ndarray
+    """
+    import numpy as np
+
+    n, k = np.broadcast_arrays(n, k)
+    _comb = n * 0 + 1
+    is_float = _comb.dtype.kind == 'f'
+    for i in range(int(k.max()) if k.size else 0):
+        _next = _comb * (n - i) / (i + 1) if is_float else _comb * (n - i) // (i + 1)
+        _comb = np.where(k > i, _next, _comb)
+    return np.where(k > n, 0, _comb).astype(_comb.dtype)
+
+
+def sum_powers_arrays(k, r_max):
+    """
+    Calculate the geometric series k^0 + k^1 + ... + k^r_max element wise for numpy arrays of k and r_max
+
+    :param k: base
+    :type k: numpy.ndarray
+    :param r_max: highest power of each element, >= 0
+    :type r_max: numpy.ndarray
+    :return: sum of all powers of k from 0 to r_max
+    :rtype: numpy.ndarray
+    """
+    import numpy as np
+
+    k, r_max = np.broadcast_arrays(k, r_max)
+    # Horner scheme, each element stops after its own r_max
+    _sum = k * 0 + 1
+    for i in range(int(r_max.max()) if r_max.size else 0):
+        _sum = np.where(r_max > i, _sum * k + 1, _sum)
+    return _sum.astype(k.dtype)
+
+
+def to_int(value):
+    """
+    Convert a count to int. Arrays from parameter sweeps are returned unchanged.
+
+    :param value: the count to convert
+    :type value: int | float | numpy.ndarray
+    :return: the count as int or the unchanged array
+    :rtype: int | numpy.ndarray
+    """
+    if getattr(value, 'ndim', 0) > 0:
+        return value
+    else:
+        return int(value)
+
+
+def sum_powers(k, r_max):
+    """
+    Calculate the geometric series k^0 + k^1 + ... + k^r_max
+
+    :param k: base, int or numpy array of dtype object
+    :type k: int | numpy.ndarray
+    :param r_max: highest power
+    :type r_max: int
+    :return: sum of all powers of k from 0 to r_max
+    :rtype: int | numpy.ndarray
+    """
+    if getattr(k, 'ndim', 0) > 0:
+        # Horner scheme, no division by k - 1 for arrays that contain 1
+        _sum = k * 0 + 1
+        for i in range(int(r_max)):
+            _sum = _sum * k + 1
+        return _sum
+    else:
+        k = int(k)
+        if k == 1:
+            return r_max + 1
+        else:
+            return (k ** (r_max + 1) - 1) // (k - 1)
+
+
+def cached_result(func):
+    """
+    Decorator to store the results of an estimator method in the result_cache of the instance.
+
+    The cache key contains the method name and all arguments. The result_cache is cleared when
+    instance.get_fingerprint() changes, so results calculated before any change of the settings are never reused
+    and the cache holds the results of one setting only.
+
+    :param func: estimator method
+    :type func: function
+    :return: method with cached results
+    :rtype: function
+    """
+    @wraps(func)
+    def _cached_func(self, *args, **kwargs):
+        update_cache_fingerprint(self)
+        key = get_cache_key(self, func.__name__, args, kwargs)
+        try:
+            return self.result_cache[key]
+        except KeyError:
+            result = func(self, *args, **kwargs)
+            self.result_cache[key] = result
+            return result
+
+    return _cached_func
+
+
+def get_cache_key(instance, func_name, args=(), kwargs=None):
+    """
+    Get the result_cache key of one call of a method decorated by cached_result
+
+    :param instance: estimator instance
+    :type instance: object
+    :param func_name: name of the method
+    :type func_name: str
+    :param args: positional arguments of the call
+    :type args: tuple
+    :param kwargs: keyword arguments of the call
+    :type kwargs: dict
+    :return: cache key
+    :rtype: tuple
+    """
+    return func_name, tuple(args), tuple(sorted((kwargs or {}).items()))
+
+
+def update_cache_fingerprint(instance):
+    """
+    Clear the result_cache of an estimator if its fingerprint changed since the last call.
+    Call it before results are put into the result_cache from outside of cached_result.
+
+    :param instance: estimator instance with get_fingerprint and result_cache
+    :type instance: object
+    """
+    fingerprint = instance.get_fingerprint()
+    last_fingerprint = getattr(instance, '_cache_fingerprint', None)
+    if fingerprint is not last_fingerprint and fingerprint != last_fingerprint:
+        instance.result_cache.clear()
+        instance._cache_fingerprint = fingerprint
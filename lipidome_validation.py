@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Check all estimators against the enumeration of all species for small FA lists.
+
+    $ python lipidome_validation.py
+    $ python lipidome_validation.py --max-f 15 --output validation.json
+
+oxFA are enumerated as chemical species, independent of the equations: each site of the chain is unmodified
+or has one OAP (with published=True: one OAP on each site), OCP keep r sites of the chain,
+cyclic products are placed on the C=C units. Each species is reduced to its modifications
+(with the site numbers if site specific), distinct species are counted by a set.
+Lipids are enumerated as all FA on all sn positions, packed into one uint64 per species
+(FA index as digits), reduced to the canonical form of the lipid class
+(sorted for combinations, reversed order for the mirror of TG and CL, sn position of the FA for Lyso and MG,
+-OH at sn2 for DG) and counted by numpy.unique. The exit code is 1 if any number differs.
+
+By default the corrected equations (published=False) are checked. With --published, the equations of the publication
+are checked against the species of the publication (1 oxFA of PL on sn2 only, 2 oxFA of DG on sn1 + sn3 in both orders,
+only CL is cardiolipin), the terms listed in README.md differ.
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import product
+
+import numpy as np
+
+from oxlipidome_estimation import TheoOxLipidome
+from unoxlipidome_estimation import TheoLipidome
+
+validation_lipid_classes = {
+    'x1': ['FA', 'LPC', 'MG'],
+    'x2': ['PC', 'DG'],
+    'x3': ['TG', 'Other_x3'],  # Other_x3 / Other_x4 for the terms of other lipid classes
+    'x4': ['CL', 'Other_x4'],
+}
+
+validation_mod_dct_lst = [
+    {'m_ocp': ['Aldehyde'], 'm_oap': ['OH'], 'm_p': ['A'], 'm_o': ['TXA']},
+    {'m_ocp': ['Aldehyde', 'CarboxylicAcid'], 'm_oap': ['OH', 'OOH', 'KETO'], 'm_p': ['A', 'B'], 'm_o': []},
+    {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH']},  # without cyclic products
+    {'m_ocp': ['Aldehyde'], 'm_oap': [], 'm_p': ['A'], 'm_o': []},  # without OAP
+]
+
+site_lst = ['bis-allylic', 'db', 'allylic']
+lyso_class_lst = ['LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS']
+max_code_count = 20000000  # max number of species of one enumeration
+
+
+class _FixedOxFAOxLipidome(TheoOxLipidome):
+
+    # TheoOxLipidome with a given number of oxFA F_ox, to check the equations of the lipid classes
+
+    def __init__(self, f, n_oxfa, x_dct, published=False):
+        TheoOxLipidome.__init__(self, [['FA%i:0' % i, '', 0, 0] for i in range(f)], x_dct, {},
+                                exact=True, verbose=False, published=published)
+        self.n_oxfa = n_oxfa
+
+    def get_all_oxfa(self, site='bis-allylic', site_specific=False):
+        return self.n_oxfa
+
+
+def enumerate_oxfa(n_db, m, mod_dct, site_specific=False, published=False):
+    """
+    Enumerate the oxFA of one FA with n_db C=C bond and m modification sites as canonical forms
+
+    :param n_db: number of C=C bond
+    :type n_db: int
+    :param m: number of modification sites
+    :type m: int
+    :param mod_dct: lists of the modification types
+    :type mod_dct: dict
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param published: set to True for one OAP on each site in site specific mode, as in the publication
+    :type published: bool
+    :return: sets of the canonical forms of OAP, OCP and cyclic products
+    :rtype: dict
+    """
+    oap_lst = list(mod_dct.get('m_oap', []))
+    m = max(m, 0)
+    if site_specific is True and published is True:
+        site_state_lst = oap_lst
+    else:
+        site_state_lst = [None] + oap_lst  # each site unmodified (None) or with one OAP
+
+    # all species with at least one modified site
+    oap_set = set()
+    for mod_seq in product(site_state_lst, repeat=m):
+        form = _get_chain_form(mod_seq, site_specific)
+        if form:
+            oap_set.add(form)
+
+    ocp_set = set()
+    for ocp in mod_dct.get('m_ocp', []):
+        for r in range(max(m - 2, 0) + 1):
+            # the segment left after the cleavage has r sites
+            for mod_seq in product(site_state_lst, repeat=r):
+                ocp_set.add((ocp, r, _get_chain_form(mod_seq, site_specific)))
+
+    cyclic_set = set()
+    if n_db >= 3 and 'm_p' in mod_dct and 'm_o' in mod_dct:
+        pos_lst = [0] if site_specific is False else list(range(n_db - 2))
+        for mod in list(mod_dct['m_p']) + list(mod_dct['m_o']):
+            for pos in pos_lst:
+                cyclic_set.add((mod, pos))
+
+    return {'oap': oap_set, 'ocp': ocp_set, 'cyclic': cyclic_set}
+
+
+def count_lipid_class(lipid_class, n_sn, f, n_oxfa, site_specific, lipidome, special_class_lst=(), published=False):
+    """
+    Count the species of one lipid class by enumeration of the FA on all sn positions
+
+    :param lipid_class: name of the lipid class
+    :type lipid_class: str
+    :param n_sn: number of FA of the lipid class
+    :type n_sn: int
+    :param f: number of unmodified FA, FA index 0 .. f - 1
+    :type f: int
+    :param n_oxfa: number of oxFA, FA index f .. f + n_oxfa - 1
+    :type n_oxfa: int
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param lipidome: 'alloxfa' (min 1 oxFA), '1oxfa' (exactly 1 oxFA) or 'unox' (all species)
+    :type lipidome: str
+    :param special_class_lst: DG / TG / CL treated with the -OH at sn2 or the mirror of the sn positions
+    :type special_class_lst: list
+    :param published: set to True for the species of the publication: 1 oxFA of PL on sn2 only
+        and 2 oxFA of DG on sn1 + sn3 in both orders
+    :type published: bool
+    :return: number of distinct species
+    :rtype: int
+    """
+    n_fa = f + n_oxfa
+    if n_fa ** n_sn > max_code_count:
+        raise ValueError('%i species to enumerate, max %i' % (n_fa ** n_sn, max_code_count))
+    if n_fa == 0:
+        return 0
+
+    idx_arr = np.indices((n_fa,) * n_sn).reshape(n_sn, -1).astype(np.uint64)
+    n_ox_arr = (idx_arr >= f).sum(axis=0)
+    if lipidome == 'alloxfa':
+        idx_arr = idx_arr[:, n_ox_arr >= 1]
+    elif lipidome == '1oxfa':
+        idx_arr = idx_arr[:, n_ox_arr == 1]
+
+    if site_specific is False:
+        code_lst = [_pack(np.sort(idx_arr, axis=0), n_fa)]
+    elif n_sn == 1:
+        n_pos = 1
+        if lipid_class in lyso_class_lst:
+            n_pos = 2  # FA on sn1 or sn2
+        elif lipid_class in ['Monoacylglycerol', 'MG']:
+            n_pos = 3
+        code_lst = [_pack(idx_arr, n_fa) + np.uint64(pos * n_fa) for pos in range(n_pos)]
+    elif lipid_class in special_class_lst and n_sn == 2:
+        # FA on sn1 + sn2 (same as sn2 + sn3) and -OH at sn2 with FA on sn1 + sn3, same as sn3 + sn1
+        sn13_arr = np.sort(idx_arr, axis=0)
+        if published is True:
+            # 2 oxFA on sn1 + sn3 in both orders
+            sn13_arr = np.where((idx_arr >= f).all(axis=0), idx_arr, sn13_arr)
+        code_lst = [_pack(idx_arr, n_fa), _pack(sn13_arr, n_fa) + np.uint64(n_fa ** 2)]
+    elif n_sn == 2 and published is True and lipidome == '1oxfa':
+        code_lst = [_pack(idx_arr[:, idx_arr[1] >= f], n_fa)]  # oxFA on sn2
+    elif lipid_class in special_class_lst:
+        code_lst = [np.minimum(_pack(idx_arr, n_fa), _pack(idx_arr[::-1], n_fa))]
+    else:
+        code_lst = [_pack(idx_arr, n_fa)]
+
+    return int(np.unique(np.concatenate(code_lst)).size)
+
+
+def count_lipidome(x_dct, f, n_oxfa, site_specific, lipidome, published=False):
+    """
+    Count the species of all lipid classes by enumeration
+
+    :param x_dct: lists of lipid classes that have n FA residues
+    :type x_dct: dict
+    :param f: number of unmodified FA
+    :type f: int
+    :param n_oxfa: number of oxFA
+    :type n_oxfa: int
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param lipidome: 'alloxfa', '1oxfa' or 'unox'
+    :type lipidome: str
+    :param published: set to True for the species of the publication, see count_lipid_class
+    :type published: bool
+    :return: total and {lipid class: number of species}
+    :rtype: tuple
+    """
+    special_name_dct = {'x2': ['Diacylglycerol', 'DG'], 'x3': ['Triacylglycerol', 'TG'],
+                        'x4': ['Cardiolipin', 'CL']}
+    if published is True:
+        special_name_dct['x4'] = ['CL']  # the publication looks up Cardiolipin in x3
+    class_dct = {}
+    for n_sn, x in enumerate(['x1', 'x2', 'x3', 'x4'], start=1):
+        class_lst = x_dct.get(x, [])
+        # DG / TG / CL terms are added once by the estimators, for the first of these classes
+        special_lst = [_class for _class in class_lst if _class in special_name_dct.get(x, [])][:1]
+        for lipid_class in class_lst:
+            class_dct[lipid_class] = class_dct.get(lipid_class, 0) + count_lipid_class(
+                lipid_class, n_sn, f, n_oxfa, site_specific, lipidome, special_class_lst=special_lst,
+                published=published)
+    return sum(class_dct.values()), class_dct
+
+
+def validate_oxfa(mod_dct_lst=validation_mod_dct_lst, max_db=6, published=False):
+    """
+    Check get_oap, get_ocp and get_cyclic for all site modes and C=C bonds 0 .. max_db
+
+    :return: one record per check
+    :rtype: list
+    """
+    record_lst = []
+    for mod_idx, mod_dct in enumerate(mod_dct_lst):
+        oxlipidome = TheoOxLipidome([['FA18:0', 'C18H36O2', 18, 0]], validation_lipid_classes, mod_dct,
+                                    exact=True, verbose=False, published=published)
+        for site in site_lst:
+            m_shift = oxlipidome.get_m_shift(site)
+            for n_db in range(1, max_db + 1):
+                m = n_db + m_shift
+                for site_specific in [False, True]:
+                    form_dct = enumerate_oxfa(n_db, m, mod_dct, site_specific=site_specific, published=published)
+                    param_dct = {'mod_set': mod_idx, 'site': site, 'n_db': n_db, 'site_specific': site_specific}
+                    record_lst.append(_get_record('get_oap', param_dct, len(form_dct['oap']),
+                                                  oxlipidome.get_oap(m, site_specific=site_specific)))
+                    record_lst.append(_get_record('get_ocp', param_dct, len(form_dct['ocp']),
+                                                  oxlipidome.get_ocp(m, site_specific=site_specific)))
+                    record_lst.append(_get_record('get_cyclic', param_dct, len(form_dct['cyclic']),
+                                                  oxlipidome.get_cyclic(n_db, site_specific=site_specific)))
+    return record_lst
+
+
+def validate_lipid_classes(f_lst, n_oxfa_lst, x_dct=validation_lipid_classes, published=False):
+    """
+    Check get_all_class_1oxfa, get_all_class_alloxfa, TheoLipidome.get_estimation
+    and get_product_no_mirror for all numbers of FA in f_lst and oxFA in n_oxfa_lst
+
+    :return: one record per check
+    :rtype: list
+    """
+    record_lst = []
+    for f in f_lst:
+        fa_lst = [['FA%i:0' % i, '', 0, 0] for i in range(f)]
+        unoxlipidome = TheoLipidome(fa_lst, x_dct, exact=True, verbose=False, published=published)
+        for site_specific in [False, True]:
+            param_dct = {'f': f, 'site_specific': site_specific}
+            record_lst.append(_get_record('TheoLipidome.get_estimation', param_dct,
+                                          count_lipidome(x_dct, f, 0, site_specific, 'unox', published)[0],
+                                          unoxlipidome.get_estimation(site_specific=site_specific)))
+        for n_sn in [3, 4]:
+            record_lst.append(_get_record('TheoLipidome.get_product_no_mirror', {'f': f, 'n_sn': n_sn},
+                                          count_lipid_class('TG', n_sn, f, 0, True, 'unox', ['TG']),
+                                          unoxlipidome.get_product_no_mirror(n_sn)))
+
+        for n_oxfa in n_oxfa_lst:
+            oxlipidome = _FixedOxFAOxLipidome(f, n_oxfa, x_dct, published=published)
+            for site_specific in [False, True]:
+                param_dct = {'f': f, 'n_oxfa': n_oxfa, 'site_specific': site_specific}
+                for lipidome in ['1oxfa', 'alloxfa']:
+                    method = 'get_all_class_%s' % lipidome
+                    record_lst.append(_get_record(method, param_dct,
+                                                  count_lipidome(x_dct, f, n_oxfa, site_specific, lipidome,
+                                                                 published)[0],
+                                                  getattr(oxlipidome, method)(site_specific=site_specific)))
+    return record_lst
+
+
+def validate_fa_lists(fa_lst_lst, mod_dct_lst=validation_mod_dct_lst, x_dct=validation_lipid_classes,
+                      max_codes=1000000, published=False):
+    """
+    Check get_all_oxfa and the lipid classes end to end for small FA lists, species of the lipid classes
+    are only enumerated if (F + F_ox) ** 4 <= max_codes, the equations of the lipid classes
+    for larger numbers are checked by validate_lipid_classes
+
+    :return: one record per check
+    :rtype: list
+    """
+    record_lst = []
+    for fa_idx, fa_lst in enumerate(fa_lst_lst):
+        for mod_idx, mod_dct in enumerate(mod_dct_lst):
+            oxlipidome = TheoOxLipidome(fa_lst, x_dct, mod_dct, exact=True, verbose=False, published=published)
+            for site in site_lst:
+                m_shift = oxlipidome.get_m_shift(site)
+                for site_specific in [False, True]:
+                    n_oxfa = 0
+                    for fa in fa_lst:
+                        if fa[3] > 0:
+                            form_dct = enumerate_oxfa(fa[3], fa[3] + m_shift, mod_dct, site_specific=site_specific,
+                                                      published=published)
+                            n_oxfa += sum(len(form_set) for form_set in form_dct.values())
+                    param_dct = {'fa_list': fa_idx, 'mod_set': mod_idx, 'site': site,
+                                 'site_specific': site_specific}
+                    record_lst.append(_get_record('get_all_oxfa', param_dct, n_oxfa,
+                                                  oxlipidome.get_all_oxfa(site=site, site_specific=site_specific)))
+                    if (len(fa_lst) + n_oxfa) ** 4 > max_codes:
+                        continue
+                    for lipidome in ['1oxfa', 'alloxfa']:
+                        method = 'get_all_class_%s' % lipidome
+                        record_lst.append(_get_record(
+                            method, param_dct,
+                            count_lipidome(x_dct, len(fa_lst), n_oxfa, site_specific, lipidome, published)[0],
+                            getattr(oxlipidome, method)(site=site, site_specific=site_specific)))
+    return record_lst
+
+
+def get_validation_fa_lists(max_db=4):
+    """
+    Small FA lists with 1 FA of each C=C bond and with saturated FA
+
+    :return: lists of records (FA, Elem, C, DB)
+    :rtype: list
+    """
+    fa_lst_lst = []
+    for n_db in range(1, max_db + 1):
+        fa_lst_lst.append([['FA20:%i' % n_db, 'C20H%iO2' % (40 - 2 * n_db), 20, n_db]])
+    fa_lst_lst.append([['FA16:0', 'C16H32O2', 16, 0], ['FA18:1', 'C18H34O2', 18, 1],
+                       ['FA18:2', 'C18H32O2', 18, 2]])
+    return fa_lst_lst
+
+
+def run_validation(max_f=15, n_oxfa_lst=(0, 1, 2, 5, 9), verbose=True, published=False):
+    """
+    Run all checks
+
+    :param max_f: max number of FA of the checks of the lipid classes
+    :type max_f: int
+    :param n_oxfa_lst: numbers of oxFA of the checks of the lipid classes
+    :type n_oxfa_lst: list
+    :param verbose: set to False to skip printing the failed checks and the summary
+    :type verbose: bool
+    :param published: set to True to check the equations of the publication
+    :type published: bool
+    :return: one record per check with the keys check, params, enumerated, estimated and ok
+    :rtype: list
+    """
+    start_time = time.perf_counter()
+    f_lst = sorted(set([1, 2, 3, 5, 8, max_f]))
+    record_lst = validate_oxfa(published=published)
+    record_lst += validate_lipid_classes([f for f in f_lst if f <= max_f], n_oxfa_lst, published=published)
+    record_lst += validate_fa_lists(get_validation_fa_lists(), published=published)
+
+    if verbose is True:
+        for record in record_lst:
+            if not record['ok']:
+                print('!! %s %s: enumerated %i, estimated %i' % (record['check'], record['params'],
+                                                                 record['enumerated'], record['estimated']))
+        n_failed = len([record for record in record_lst if not record['ok']])
+        print('%i checks, %i failed, %.1f s' % (len(record_lst), n_failed, time.perf_counter() - start_time))
+
+    return record_lst
+
+
+def _pack(idx_arr, n_fa):
+    # one uint64 per species, the FA index of each sn position as digit of base n_fa
+    code_arr = np.zeros(idx_arr.shape[1], dtype=np.uint64)
+    for sn_idx_arr in idx_arr:
+        code_arr = code_arr * np.uint64(n_fa) + sn_idx_arr
+    return code_arr
+
+
+def _get_chain_form(mod_seq, site_specific):
+    # modifications of a chain with one entry per site: (site, OAP) of the modified sites if site specific,
+    # else the sorted OAP only
+
+    if site_specific is True:
+        return tuple((site, mod) for site, mod in enumerate(mod_seq) if mod is not None)
+    else:
+        return tuple(sorted(mod for mod in mod_seq if mod is not None))
+
+
+def _get_record(check, param_dct, enumerated, estimated):
+    return {'check': check, 'params': param_dct, 'enumerated': int(enumerated), 'estimated': int(estimated),
+            'ok': int(enumerated) == int(estimated)}
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Check all estimators against the enumeration of all species.')
+    parser.add_argument('--max-f', type=int, default=15, help='max number of FA of the checks of the lipid classes')
+    parser.add_argument('--published', action='store_true', help='check the equations of the publication')
+    parser.add_argument('-o', '--output', help='write all checks to this JSON file')
+    args = parser.parse_args()
+
+    validation_lst = run_validation(max_f=args.max_f, published=args.published)
+    if args.output:
+        with open(args.output, 'w') as output_obj:
+            json.dump(validation_lst, output_obj, indent=1)
+    sys.exit(0 if all(record['ok'] for record in validation_lst) else 1)
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Count distributions of the oxLipidome by number of added oxygen or by modification composition.
+
+Each oxFA is a monomial x^w, w is the sum of the weights of its modifications.
+The generating function of all oxFA of one FA follows get_oap, get_ocp and get_cyclic,
+the lipid classes combine the oxFA and unmodified FA of each sn position by convolution
+(with x -> x^2, x^3, x^4 for the combinations without order and the mirror of TG and CL).
+With published=False, the sum of the counts of each distribution is the total of TheoOxLipidome.
+With published=True, the lipid classes follow the species of the publication (1 oxFA of PL on sn2 only,
+2 oxFA of DG on sn1 + sn3 in both orders, only CL in x4 is cardiolipin) and the sums are the number of species
+of TheoOxLipidomeSpecies: the terms of get_all_class_1oxfa and get_all_class_alloxfa that do not count species
+(see README.md) are not in the distributions, e.g. get_all_class_1oxfa of CL and one other lipid class in x4
+without x3 leaves out the other lipid class, the distribution does not.
+
+Polynomials are dicts of {exponent tuple: count} with python int counts.
+Inside the class, the exponent tuples are packed into one int (one digit of base per key),
+so the convolution only adds ints.
+"""
+
+from lipidome_utils import comb_exact
+
+key_mode_lst = ['oxygen', 'n_mod', 'mod_type', 'composition']
+mod_type_lst = ['m_oap', 'm_ocp', 'm_p', 'm_o']
+
+
+class OxLipidomeDistribution(object):
+
+    """
+    Distributions of the number of oxFA and oxLipids of a TheoOxLipidome.
+    """
+
+    def __init__(self, oxlipidome, key='oxygen', weight_dct=None):
+        """
+        :param oxlipidome: loaded TheoOxLipidome
+        :type oxlipidome: TheoOxLipidome
+        :param key: 'oxygen' (number of added O), 'n_mod' (number of modifications),
+            'mod_type' (number of OAP, OCP, prostane and other cyclic modifications)
+            or 'composition' (number of each modification)
+        :type key: str
+        :param weight_dct: number of O of each modification for key='oxygen',
+            by default from the formula deltas in lipidome_mass.mod_delta_dct
+        :type weight_dct: dict
+        """
+        if key not in key_mode_lst:
+            raise ValueError('key must be one of %s, got: %s' % (', '.join(key_mode_lst), key))
+        self.oxlipidome = oxlipidome
+        self.key = key
+        self.weight_dct = weight_dct
+        self.poly_cache = {}
+
+    @property
+    def key_names(self):
+        """
+        Names of the exponents, e.g. ['n_O'] or ['m_oap:OH', 'm_oap:OOH', ...] for key='composition'
+        """
+        if self.key == 'oxygen':
+            return ['n_O']
+        elif self.key == 'n_mod':
+            return ['n_mod']
+        elif self.key == 'mod_type':
+            return ['n_oap', 'n_ocp', 'n_p', 'n_o']
+        else:
+            return ['%s:%s' % (mod_type, mod) for mod_type in mod_type_lst for mod in self.get_mod_lst(mod_type)]
+
+    def get_mod_lst(self, mod_type):
+        """
+        Get the modifications of one type, empty if the type is not used
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :return: modification names
+        :rtype: list
+        """
+        return list(self.oxlipidome.m_dct.get(mod_type, []))
+
+    def get_mod_monomial(self, mod_type, mod):
+        """
+        Get the exponent of one modification for the key of the distribution
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :param mod: modification name
+        :type mod: str
+        :return: exponent tuple, same order as key_names
+        :rtype: tuple
+        """
+        if self.key == 'oxygen':
+            if self.weight_dct is not None and mod in self.weight_dct:
+                n_o = int(self.weight_dct[mod])
+            else:
+                from lipidome_mass import mod_delta_dct
+                if mod not in mod_delta_dct:
+                    raise ValueError('number of O not known for %s, set it in weight_dct' % mod)
+                n_o = mod_delta_dct[mod].get('O', 0)
+            if n_o < 0:
+                raise ValueError('number of O of %s must be >= 0' % mod)
+            return (n_o,)
+        elif self.key == 'n_mod':
+            return (1,)
+        elif self.key == 'mod_type':
+            return tuple(1 if _mod_type == mod_type else 0 for _mod_type in mod_type_lst)
+        else:
+            return tuple(1 if key_name == '%s:%s' % (mod_type, mod) else 0 for key_name in self.key_names)
+
+    def get_fa_poly(self, n_db, site='bis-allylic', site_specific=False):
+        """
+        Distribution of the oxFA of one FA with n_db C=C bond: OAP, OCP, Prostane and other cyclic products
+
+        :param n_db: number of C=C bond
+        :type n_db: int
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: {exponent tuple: count}, sum of counts = get_oap + get_ocp + get_cyclic
+        :rtype: dict
+        """
+        return self._unpack(self._get_fa_poly(n_db, site, site_specific), site)
+
+    def get_all_oxfa(self, site='bis-allylic', site_specific=False):
+        """
+        Distribution of all oxFA F_ox of the FA list
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: {exponent tuple: count}, sum of counts = get_all_oxfa
+        :rtype: dict
+        """
+        return self._unpack(self._get_oxfa_poly(site, site_specific), site)
+
+    def get_class_dct(self, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Distribution of the oxLipids of each lipid class
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa' (get_all_class_alloxfa) or '1oxfa' (get_all_class_1oxfa)
+        :type lipidome: str
+        :return: {lipid class: {exponent tuple: count}}
+        :rtype: dict
+        """
+        class_dct = self._get_class_poly_dct(site, site_specific, lipidome)
+        return dict((lipid_class, self._unpack(class_dct[lipid_class], site)) for lipid_class in class_dct)
+
+    def get_all_class(self, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Distribution of the oxLipids of all lipid classes
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa' (get_all_class_alloxfa) or '1oxfa' (get_all_class_1oxfa)
+        :type lipidome: str
+        :return: {exponent tuple: count}, sum of counts = get_all_class_alloxfa or get_all_class_1oxfa
+            with published=False, the number of species of TheoOxLipidomeSpecies with published=True
+        :rtype: dict
+        """
+        tot_poly = _add_all(self._get_class_poly_dct(site, site_specific, lipidome).values())
+        return self._unpack(tot_poly, site)
+
+    def get_distribution_df(self, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Distributions as table, one row per lipid class (or C=C class of the FA) and key, e.g. number of O
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'oxfa' (all oxFA of each C=C class), 'alloxfa' or '1oxfa'
+        :type lipidome: str
+        :return: columns lipid_class (n_db for 'oxfa'), key_names and count (python int)
+        :rtype: pandas.DataFrame
+        """
+        import pandas as pd
+
+        if lipidome == 'oxfa':
+            label_col = 'n_db'
+            poly_dct = dict((n_db, _scale(self.get_fa_poly(n_db, site=site, site_specific=site_specific),
+                                          self.oxlipidome.fa_dct[n_db])) for n_db in self.oxlipidome.n_lst)
+        else:
+            label_col = 'lipid_class'
+            poly_dct = self.get_class_dct(site=site, site_specific=site_specific, lipidome=lipidome)
+        row_lst = []
+        for label in poly_dct:
+            for exponent in sorted(poly_dct[label]):
+                row_lst.append([label] + list(exponent) + [poly_dct[label][exponent]])
+        dist_df = pd.DataFrame(row_lst, columns=[label_col] + self.key_names + ['count'])
+        dist_df['count'] = dist_df['count'].astype(object)
+
+        return dist_df
+
+    def _get_fa_poly(self, n_db, site, site_specific):
+        # packed distribution of the oxFA of one FA
+
+        cache_key = ('fa', n_db, site, site_specific, self.oxlipidome.get_fingerprint())
+        if cache_key in self.poly_cache:
+            return self.poly_cache[cache_key]
+
+        m = n_db + self.oxlipidome.get_m_shift(site)
+        oap_mono_lst = self._get_mono_lst('m_oap', site)
+        fa_poly = {}
+
+        # OAP
+        if oap_mono_lst:
+            if site_specific is False:
+                fa_poly = _add_all(_get_h_polys(oap_mono_lst, m)[1:])
+            elif self.oxlipidome.published is True:
+                # n_oap ** m - 1, the placement of m_oap[0] on all sites is left out
+                fa_poly = _add(_pow(_sum_monos(oap_mono_lst), m), {oap_mono_lst[0] * m: 1}, -1)
+            else:
+                # (n_oap + 1) ** m - 1, each site unmodified or with one OAP
+                fa_poly = _add(_pow(_add({0: 1}, _sum_monos(oap_mono_lst)), m), {0: 1}, -1)
+
+        # OCP, one terminal and the segment with r = 0 .. m - 2 sites left, unmodified or with OAP
+        r_max = max(m - 2, 0)
+        if not oap_mono_lst:
+            segment_poly = {0: r_max + 1}
+        elif site_specific is False:
+            # sum of h_0 .. h_r for r = 0 .. r_max
+            segment_poly = _add_all([_scale(h_poly, r_max - size + 1)
+                                     for size, h_poly in enumerate(_get_h_polys(oap_mono_lst, r_max))])
+        else:
+            oap_poly = _sum_monos(oap_mono_lst)
+            if self.oxlipidome.published is False:
+                oap_poly = _add({0: 1}, oap_poly)  # each site unmodified or with one OAP
+            segment_poly = {0: 1}
+            power_poly = {0: 1}
+            for _ in range(r_max):
+                power_poly = _mul(power_poly, oap_poly)
+                segment_poly = _add(segment_poly, power_poly)
+        for ocp_mono in self._get_mono_lst('m_ocp', site):
+            fa_poly = _add(fa_poly, _shift(segment_poly, ocp_mono))
+
+        # Prostane and other cyclic products
+        if n_db >= 3 and 'm_p' in self.oxlipidome.m_dct and 'm_o' in self.oxlipidome.m_dct:
+            n_unit_site = 1 if site_specific is False else n_db - 2
+            for mono in self._get_mono_lst('m_p', site) + self._get_mono_lst('m_o', site):
+                fa_poly = _add(fa_poly, {mono: n_unit_site})
+
+        self.poly_cache[cache_key] = fa_poly
+        return fa_poly
+
+    def _get_oxfa_poly(self, site, site_specific):
+        # packed distribution of F_ox
+
+        cache_key = ('oxfa', site, site_specific, self.oxlipidome.get_fingerprint())
+        if cache_key not in self.poly_cache:
+            oxfa_poly = {}
+            for n_db in self.oxlipidome.n_lst:
+                oxfa_poly = _add(oxfa_poly, self._get_fa_poly(n_db, site, site_specific),
+                                 self.oxlipidome.fa_dct[n_db])
+            self.poly_cache[cache_key] = oxfa_poly
+        return self.poly_cache[cache_key]
+
+    def _get_class_poly_dct(self, site, site_specific, lipidome):
+        # packed distribution of each lipid class, same terms as get_all_class_1oxfa and get_all_class_alloxfa
+
+        if lipidome not in ['alloxfa', '1oxfa']:
+            raise ValueError('lipidome must be "alloxfa" or "1oxfa", got: %s' % lipidome)
+        p = self._get_oxfa_poly(site, site_specific)
+        f = self.oxlipidome.f
+        x_dct = self.oxlipidome.x_dct
+        power_dct = _PowerCache(p)
+
+        class_dct = {}
+        for n_fa, x in enumerate(['x1', 'x2', 'x3', 'x4'], start=1):
+            for lipid_class in x_dct.get(x, []):
+                if site_specific is False:
+                    if lipidome == '1oxfa':
+                        class_poly = _scale(p, comb_exact(f + n_fa - 2, n_fa - 1))
+                    else:
+                        class_poly = _add(_get_multiset_poly(_add(p, {0: f}), n_fa),
+                                          {0: comb_exact(f + n_fa - 1, n_fa)}, -1)
+                else:
+                    class_poly = self._get_site_specific_poly(power_dct, f, lipid_class, x, n_fa, lipidome)
+                class_dct[lipid_class] = _add(class_dct.get(lipid_class, {}), class_poly)
+
+        return class_dct
+
+    def _get_site_specific_poly(self, power_dct, f, lipid_class, x, n_fa, lipidome):
+
+        p = power_dct[1]
+        if n_fa == 1:
+            n_pos = 1
+            if lipid_class in ['LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS']:
+                n_pos = 2
+            elif lipid_class in ['Monoacylglycerol', 'MG']:
+                n_pos = 3
+            return _scale(p, n_pos)
+
+        cl_name_lst = self.oxlipidome.get_cardiolipin_names()
+        if lipidome == '1oxfa':
+            if n_fa == 2:
+                if self._is_special_class(x, lipid_class, ['Diacylglycerol', 'DG']):
+                    n_pos = 3
+                else:
+                    n_pos = 1 if self.oxlipidome.published is True else 2  # the publication: oxFA on sn2
+                return _scale(p, n_pos * f)
+            elif n_fa == 3 and self._is_special_class(x, lipid_class, ['Triacylglycerol', 'TG']):
+                return _scale(p, f * f + comb_exact(f, 2) + f)
+            elif n_fa == 4 and self._is_special_class(x, lipid_class, cl_name_lst):
+                return _scale(p, 2 * f ** 3)
+            else:
+                return _scale(p, n_fa * f ** (n_fa - 1))
+
+        if n_fa == 3 and self._is_special_class(x, lipid_class, ['Triacylglycerol', 'TG']):
+            pair_poly = _get_multiset_poly(p, 2)
+            return _add_all([_scale(p, f * f),  # 1 oxFA on sn1/sn3
+                             _scale(p, comb_exact(f, 2) + f),  # 1 oxFA on sn2
+                             _scale(pair_poly, f),  # 2 oxFA on sn1 + sn3
+                             _scale(power_dct[2], f),  # 2 oxFA on sn1 + sn2 / sn2 + sn3
+                             _mul(pair_poly, p)])  # 3 oxFA on all sn
+        elif n_fa == 4 and self._is_special_class(x, lipid_class, cl_name_lst):
+            p2 = _dilate(p, 2)
+            # the mirror swaps sn1 <-> sn4 and sn2 <-> sn3 together, half of all plus the symmetric species
+            sym_poly = _divide(_add(_scale(power_dct[2], f * f), _scale(p2, f)), 2)
+            return _add_all([_scale(p, 2 * f ** 3),  # 1 oxFA on sn1/sn4 or sn2/sn3
+                             _scale(sym_poly, 2),  # 2 oxFA on sn1 + sn4 or sn2 + sn3
+                             _scale(power_dct[2], 2 * f * f),  # 2 oxFA on sn1 + sn3 / sn2 + sn4, sn1 + sn2 / sn3 + sn4
+                             _scale(power_dct[3], 2 * f),  # 3 oxFA
+                             _divide(_add(power_dct[4], _mul(p2, p2)), 2)])  # 4 oxFA on all sn
+
+        # all FA on each sn minus the unmodified lipids
+        class_poly = _add_all([_scale(power_dct[n_ox], comb_exact(n_fa, n_ox) * f ** (n_fa - n_ox))
+                               for n_ox in range(1, n_fa + 1)])
+        if n_fa == 2 and self._is_special_class(x, lipid_class, ['Diacylglycerol', 'DG']):
+            # -OH at sn2, oxFA on sn1/sn3, the publication counts 2 oxFA on sn1 + sn3 in both orders
+            oxfa_pair_poly = power_dct[2] if self.oxlipidome.published is True else _get_multiset_poly(p, 2)
+            class_poly = _add_all([class_poly, _scale(p, f), oxfa_pair_poly])
+        return class_poly
+
+    def _is_special_class(self, x, lipid_class, name_lst):
+        # the equations add the DG / TG / CL terms once, they are counted for the first of these classes in x_dct
+
+        special_lst = [_class for _class in self.oxlipidome.x_dct.get(x, []) if _class in name_lst]
+        return bool(special_lst) and special_lst[0] == lipid_class
+
+    def _get_mono_lst(self, mod_type, site):
+        # packed monomials of the modifications of one type
+
+        base = self._get_base(site)
+        return [_pack(self.get_mod_monomial(mod_type, mod), base) for mod in self.get_mod_lst(mod_type)]
+
+    def _get_base(self, site):
+        # digit base of the packed exponents, larger than any exponent of a lipid with 4 oxFA
+
+        cache_key = ('base', site, self.oxlipidome.get_fingerprint())
+        if cache_key not in self.poly_cache:
+            m_max = max([n_db + self.oxlipidome.get_m_shift(site) for n_db in self.oxlipidome.n_lst] + [0])
+            w_dct = {}
+            for mod_type in mod_type_lst:
+                w_dct[mod_type] = max([max(self.get_mod_monomial(mod_type, mod) + (0,))
+                                       for mod in self.get_mod_lst(mod_type)] + [0])
+            fa_max = max(w_dct['m_oap'] * m_max, w_dct['m_ocp'] + w_dct['m_oap'] * max(m_max - 2, 0),
+                         w_dct['m_p'], w_dct['m_o'], 1)
+            self.poly_cache[cache_key] = 4 * fa_max + 1
+        return self.poly_cache[cache_key]
+
+    def _unpack(self, poly, site):
+
+        base = self._get_base(site)
+        n_key = len(self.key_names)
+        return dict((_unpack_mono(exponent, base, n_key), count) for exponent, count in poly.items())
+
+
+class _PowerCache(dict):
+
+    # p ** n, calculated once and from the power n - 1
+
+    def __init__(self, p):
+        dict.__init__(self)
+        self[0] = {0: 1}
+        self[1] = p
+
+    def __missing__(self, n):
+        self[n] = _mul(self[n - 1], self[1])
+        return self[n]
+
+
+def _pack(exponent, base):
+    packed = 0
+    for i in reversed(exponent):
+        packed = packed * base + i
+    return packed
+
+
+def _unpack_mono(packed, base, n_key):
+    exponent = []
+    for _ in range(n_key):
+        packed, i = divmod(packed, base)
+        exponent.append(i)
+    return tuple(exponent)
+
+
+def _add(p, q, factor=1):
+    # p + factor * q
+    result = dict(p)
+    for exponent, count in q.items():
+        count = result.get(exponent, 0) + factor * count
+        if count:
+            result[exponent] = count
+        else:
+            result.pop(exponent, None)
+    return result
+
+
+def _add_all(poly_lst):
+    result = {}
+    for poly in poly_lst:
+        for exponent, count in poly.items():
+            result[exponent] = result.get(exponent, 0) + count
+    return dict((exponent, count) for exponent, count in result.items() if count)
+
+
+def _scale(p, factor):
+    return dict((exponent, count * factor) for exponent, count in p.items()) if factor else {}
+
+
+def _shift(p, mono):
+    # x^mono * p
+    return dict((exponent + mono, count) for exponent, count in p.items())
+
+
+def _mul(p, q):
+    # convolution of the counts
+    if len(p) < len(q):
+        p, q = q, p
+    result = {}
+    for q_exponent, q_count in q.items():
+        for p_exponent, p_count in p.items():
+            exponent = p_exponent + q_exponent
+            result[exponent] = result.get(exponent, 0) + p_count * q_count
+    return dict((exponent, count) for exponent, count in result.items() if count)
+
+
+def _pow(p, n):
+    result = {0: 1}
+    for _ in range(n):
+        result = _mul(result, p)
+    return result
+
+
+def _dilate(p, k):
+    # x -> x^k
+    return dict((exponent * k, count) for exponent, count in p.items())
+
+
+def _divide(p, d):
+    # exact division of all counts
+    result = {}
+    for exponent, count in p.items():
+        if count % d:
+            raise ValueError('counts not divisible by %i' % d)
+        result[exponent] = count // d
+    return result
+
+
+def _sum_monos(mono_lst):
+    poly = {}
+    for mono in mono_lst:
+        poly[mono] = poly.get(mono, 0) + 1
+    return poly
+
+
+def _get_h_polys(mono_lst, max_size):
+    # h_k: all combinations with repetition of k modifications, k = 0 .. max_size
+
+    h_lst = [{0: 1}] + [{} for _ in range(max_size)]
+    for mono in mono_lst:
+        # multiply by 1 / (1 - y x^mono), y counts the size
+        for size in range(1, max_size + 1):
+            h_lst[size] = _add(h_lst[size], _shift(h_lst[size - 1], mono))
+    return h_lst
+
+
+def _get_multiset_poly(p, n):
+    # combinations with repetition of n items counted by p, cycle index of the symmetric group
+    if n == 1:
+        return dict(p)
+    pp = _mul(p, p)
+    if n == 2:
+        return _divide(_add(pp, _dilate(p, 2)), 2)
+    p2 = _dilate(p, 2)
+    if n == 3:
+        return _divide(_add_all([_mul(pp, p), _scale(_mul(p2, p), 3), _scale(_dilate(p, 3), 2)]), 6)
+    elif n == 4:
+        return _divide(_add_all([_mul(_mul(pp, p), p), _scale(_mul(pp, p2), 6), _scale(_mul(p2, p2), 3),
+                                 _scale(_mul(p, _dilate(p, 3)), 8), _scale(_dilate(p, 4), 6)]), 24)
+    else:
+        raise ValueError('max 4 FA per lipid')
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Compact fixed-width encoding of the species of TheoOxLipidomeSpecies as numpy structured arrays.
+
+Each species is one record of three fields:
+    class_id: position of the lipid class in x_dct, x1 to x4 in list order, see SpeciesEncoder.class_lst
+    fa_id: row of the FA list on each position, -1 for empty positions (0:0)
+    mod_id: modification pattern of the FA on each position, -1 for unmodified FA.
+        Patterns are numbered per number of C=C in the order of TheoOxLipidomeSpecies.iter_fa_mod,
+        so they follow the order of the modifications in m_dct.
+Positions are the sn positions in site specific mode, else the FA in the order of the species name
+(oxFA first). Records can be packed into uint64 keys if all fields fit into 64 bit.
+Encoded lipidomes are saved as .npy with the settings as json and loaded memory mapped.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from lipidome_utils import comb_exact
+from oxlipidome_species import (TheoOxLipidomeSpecies, _get_block_parts, _get_class_layouts, _get_comp_len,
+                                _get_comp_size, _get_part_size, _get_part_slots)
+
+species_file_name = 'species.npy'
+settings_file_name = 'settings.json'
+
+_max_int = 2 ** 62  # limit of the vectorized int64 steps, larger blocks are encoded species by species
+
+
+class SpeciesEncoder(object):
+
+    """
+    Convert the species of one lipidome of TheoOxLipidomeSpecies into fixed-width records and back.
+    The encoding depends on the FA list, x_dct and the order of m_dct, use get_settings to store them
+    with the encoded species.
+    """
+
+    def __init__(self, species_generator, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        :param species_generator: loaded TheoOxLipidomeSpecies
+        :type species_generator: TheoOxLipidomeSpecies
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see TheoOxLipidomeSpecies.get_blocks
+        :type lipidome: str
+        """
+        self.species_generator = species_generator
+        self.site = site
+        self.site_specific = site_specific
+        self.lipidome = lipidome
+
+        # (lipid class, number of FA) in the order of x_dct, the id is the position in this list
+        self.class_lst = [(lipid_class, n_fa) for n_fa, x in enumerate(['x1', 'x2', 'x3', 'x4'], start=1)
+                          for lipid_class in species_generator.x_dct.get(x, [])]
+        self.class_id_dct = {}
+        for class_id, class_key in enumerate(self.class_lst):
+            self.class_id_dct.setdefault(class_key[0], class_id)
+        self._class_key_dct = dict((class_key, class_id) for class_id, class_key in enumerate(self.class_lst))
+        if site_specific is True:
+            special_class_dct = species_generator.get_special_classes()
+            self.class_n_sn_lst = [_get_class_layouts(lipid_class, n_fa, special_class_dct.get(x) == class_idx)[0][0]
+                                   for n_fa, x in enumerate(['x1', 'x2', 'x3', 'x4'], start=1)
+                                   for class_idx, lipid_class in enumerate(species_generator.x_dct.get(x, []))]
+        else:
+            self.class_n_sn_lst = [n_fa for lipid_class, n_fa in self.class_lst]
+        self.n_pos = max(self.class_n_sn_lst + [1])
+
+        # number of modification patterns of each FA and the first oxFA of each FA in get_oxfa_label_lst
+        oxlipidome = species_generator.oxlipidome
+        m_shift = oxlipidome.get_m_shift(site)
+        self.fa_db_arr = np.array(species_generator.fa_db_lst, dtype=np.int64)
+        self.pattern_count_dct = {}
+        for n_db in sorted(set(species_generator.fa_db_lst)):
+            if n_db > 0:
+                self.pattern_count_dct[n_db] = int(oxlipidome.get_oap(n_db + m_shift, site_specific=site_specific)
+                                                   + oxlipidome.get_ocp(n_db + m_shift, site_specific=site_specific)
+                                                   + oxlipidome.get_cyclic(n_db, site_specific=site_specific))
+        offset_lst = [0]
+        for n_db in species_generator.fa_db_lst:
+            offset_lst.append(offset_lst[-1] + self.pattern_count_dct.get(n_db, 0))
+        if offset_lst[-1] >= _max_int:
+            raise ValueError('%i oxFA, too many to encode' % offset_lst[-1])
+        self.oxfa_offset_arr = np.array(offset_lst, dtype=np.int64)
+        self.max_pattern_count = max(list(self.pattern_count_dct.values()) + [0])
+
+        self.dtype = np.dtype([('class_id', _get_int_dtype(len(self.class_lst), signed=False)),
+                               ('fa_id', _get_int_dtype(species_generator.f), (self.n_pos,)),
+                               ('mod_id', _get_int_dtype(self.max_pattern_count), (self.n_pos,))])
+        # bits of one uint64 key: class id, then FA id + 1 and pattern id + 1 of each position
+        self.class_bits = max(len(self.class_lst) - 1, 0).bit_length()
+        self.fa_bits = species_generator.f.bit_length()
+        self.mod_bits = self.max_pattern_count.bit_length()
+        self.key_bits = self.class_bits + self.n_pos * (self.fa_bits + self.mod_bits)
+        self._pattern_label_dct = {}
+
+    def get_count(self):
+        """
+        Calculate Number of species of the lipidome
+
+        :return: Number of species
+        :rtype: int
+        """
+        return self.species_generator.get_block_offsets(site=self.site, site_specific=self.site_specific,
+                                                        lipidome=self.lipidome)[1][-1]
+
+    def get_settings(self):
+        """
+        Get the FA names and C=C, lipid classes, modifications and the record layout of the encoding,
+        as saved by save_encoded
+
+        :return: settings, can be written as json
+        :rtype: dict
+        """
+        return {'fa_list': [[fa_name, n_db] for fa_name, n_db in zip(self.species_generator.fa_name_lst,
+                                                                     self.species_generator.fa_db_lst)],
+                'lipid_classes': self.species_generator.x_dct,
+                'modifications': self.species_generator.m_dct,
+                'site': self.site, 'site_specific': self.site_specific, 'lipidome': self.lipidome,
+                'published': self.species_generator.published,
+                'class_lst': [list(class_key) for class_key in self.class_lst],
+                'n_pos': self.n_pos, 'dtype': self.dtype.descr, 'total': self.get_count()}
+
+    def check_settings(self, settings):
+        """
+        Check that species encoded with settings can be decoded by this encoder
+
+        :param settings: settings from get_settings or load_encoded
+        :type settings: dict
+        """
+        own_settings = json.loads(json.dumps(self.get_settings()))
+        for key in ['lipid_classes', 'modifications', 'site', 'site_specific', 'lipidome', 'published', 'class_lst',
+                    'n_pos']:
+            if settings.get(key) != own_settings[key]:
+                raise ValueError('species were encoded with other settings: %s' % key)
+        if settings.get('fa_list') != own_settings['fa_list']:
+            raise ValueError('species were encoded with another FA list')
+
+    def encode_range(self, start=0, stop=None):
+        """
+        Encode the species with index start .. stop - 1 in the order of TheoOxLipidomeSpecies.iter_species
+
+        :param start: index of the first species
+        :type start: int
+        :param stop: index after the last species, None for all species to the end
+        :type stop: int
+        :return: records of dtype self.dtype
+        :rtype: numpy.ndarray
+        """
+        block_lst, offset_lst = self.species_generator.get_block_offsets(
+            site=self.site, site_specific=self.site_specific, lipidome=self.lipidome)
+        stop = offset_lst[-1] if stop is None else min(int(stop), offset_lst[-1])
+        start = int(start)
+        encoded_lst = []
+        for block_idx, block in enumerate(block_lst):
+            block_start = max(start, offset_lst[block_idx])
+            block_stop = min(stop, offset_lst[block_idx + 1])
+            if block_start < block_stop:
+                encoded_lst.append(self._encode_block(block, block_start - offset_lst[block_idx],
+                                                      block_stop - offset_lst[block_idx]))
+
+        return np.concatenate(encoded_lst) if encoded_lst else np.zeros(0, dtype=self.dtype)
+
+    def iter_encoded(self, chunk_size=1000000, start=0, stop=None):
+        """
+        Generate the encoded species in chunks of max chunk_size records
+
+        :param chunk_size: max number of records per chunk
+        :type chunk_size: int
+        :param start: index of the first species
+        :type start: int
+        :param stop: index after the last species, None for all species to the end
+        :type stop: int
+        :return: generator of record arrays
+        :rtype: generator
+        """
+        stop = self.get_count() if stop is None else min(int(stop), self.get_count())
+        for chunk_start in range(int(start), stop, int(chunk_size)):
+            yield self.encode_range(chunk_start, min(chunk_start + int(chunk_size), stop))
+
+    def encode_ranks(self, rank_arr):
+        """
+        Encode the species at the given index, e.g. from TheoOxLipidomeSpecies.rank or LipidomeMassIndex.query
+
+        :param rank_arr: species index
+        :type rank_arr: list | numpy.ndarray
+        :return: records of dtype self.dtype in the order of rank_arr
+        :rtype: numpy.ndarray
+        """
+        block_lst, offset_lst = self.species_generator.get_block_offsets(
+            site=self.site, site_specific=self.site_specific, lipidome=self.lipidome)
+        if offset_lst[-1] >= _max_int:
+            rank_arr = np.array([int(rank) for rank in rank_arr], dtype=object)
+        else:
+            rank_arr = np.asarray(rank_arr, dtype=np.int64).ravel()
+        if rank_arr.size and (rank_arr.min() < 0 or rank_arr.max() >= offset_lst[-1]):
+            raise IndexError('species index out of range')
+
+        encoded_arr = np.zeros(rank_arr.shape[0], dtype=self.dtype)
+        block_idx_arr = np.searchsorted(np.array(offset_lst[1:], dtype=rank_arr.dtype), rank_arr, side='right')
+        for block_idx in np.unique(block_idx_arr):
+            sel_arr = np.flatnonzero(block_idx_arr == block_idx)
+            encoded_arr[sel_arr] = self._encode_block_at(block_lst[block_idx],
+                                                         rank_arr[sel_arr] - offset_lst[block_idx])
+
+        return encoded_arr
+
+    def encode_species(self, species_lst):
+        """
+        Encode species names as from TheoOxLipidomeSpecies.get_species_label
+
+        :param species_lst: species names
+        :type species_lst: list
+        :return: records of dtype self.dtype
+        :rtype: numpy.ndarray
+        """
+        return self.encode_ranks([self.species_generator.rank(species, site=self.site,
+                                                              site_specific=self.site_specific,
+                                                              lipidome=self.lipidome) for species in species_lst])
+
+    def decode(self, encoded_arr):
+        """
+        Get the species names of encoded records
+
+        :param encoded_arr: records of dtype self.dtype
+        :type encoded_arr: numpy.ndarray
+        :return: species names
+        :rtype: list
+        """
+        fa_name_lst = self.species_generator.fa_name_lst
+        species_lst = []
+        for class_id, fa_id_arr, mod_id_arr in zip(encoded_arr['class_id'].tolist(), encoded_arr['fa_id'].tolist(),
+                                                   encoded_arr['mod_id'].tolist()):
+            fa_label_lst = []
+            for fa_id, mod_id in zip(fa_id_arr[:self.class_n_sn_lst[class_id]],
+                                     mod_id_arr[:self.class_n_sn_lst[class_id]]):
+                if fa_id < 0:
+                    fa_label_lst.append('0:0')
+                elif mod_id < 0:
+                    fa_label_lst.append(fa_name_lst[fa_id])
+                else:
+                    fa_label_lst.append('%s<%s>' % (fa_name_lst[fa_id], self.get_pattern_label_lst(
+                        self.species_generator.fa_db_lst[fa_id])[mod_id]))
+            species_lst.append('%s %s' % (self.class_lst[class_id][0],
+                                          ('/' if self.site_specific is True else '_').join(fa_label_lst)))
+
+        return species_lst
+
+    def get_pattern_label_lst(self, n_db):
+        """
+        Get the labels of all modification patterns of FA with n_db C=C, e.g. 'OH,OOH', the position is the mod_id
+
+        :param n_db: number of C=C bond
+        :type n_db: int
+        :return: labels of the modification patterns
+        :rtype: list
+        """
+        if n_db not in self._pattern_label_dct:
+            m = n_db + self.species_generator.oxlipidome.get_m_shift(self.site)
+            self._pattern_label_dct[n_db] = [','.join(mod_lst) for mod_lst in self.species_generator.iter_fa_mod(
+                n_db, m, site_specific=self.site_specific)] if n_db > 0 else []
+        return self._pattern_label_dct[n_db]
+
+    def get_fa_mask(self, encoded_arr, fa):
+        """
+        Select the species that contain one FA, unmodified or oxidized
+
+        :param encoded_arr: records of dtype self.dtype
+        :type encoded_arr: numpy.ndarray
+        :param fa: FA name as in the species names, e.g. '20:4'
+        :type fa: str
+        :return: True for each record with the FA
+        :rtype: numpy.ndarray
+        """
+        fa_id_lst = [fa_id for fa_id, fa_name in enumerate(self.species_generator.fa_name_lst) if fa_name == fa]
+        if not fa_id_lst:
+            raise ValueError('FA not in the lipidome: %s' % fa)
+        return np.isin(encoded_arr['fa_id'], fa_id_lst).any(axis=1)
+
+    def get_mod_mask(self, encoded_arr, mod):
+        """
+        Select the species with at least one oxFA that has the modification mod
+
+        :param encoded_arr: records of dtype self.dtype
+        :type encoded_arr: numpy.ndarray
+        :param mod: modification name from m_dct, e.g. 'OOH'
+        :type mod: str
+        :return: True for each record with the modification
+        :rtype: numpy.ndarray
+        """
+        fa_id_arr = np.asarray(encoded_arr['fa_id'])
+        mod_id_arr = np.asarray(encoded_arr['mod_id'])
+        db_arr = np.where(fa_id_arr >= 0, self.fa_db_arr[np.maximum(fa_id_arr, 0)], 0)
+        mask_arr = np.zeros(fa_id_arr.shape, dtype=bool)
+        for n_db in self.pattern_count_dct:
+            sel_arr = (db_arr == n_db) & (mod_id_arr >= 0)
+            if sel_arr.any():
+                has_mod_arr = np.array([mod in _get_pattern_mods(pattern_label)
+                                        for pattern_label in self.get_pattern_label_lst(n_db)], dtype=bool)
+                mask_arr[sel_arr] = has_mod_arr[mod_id_arr[sel_arr]]
+        return mask_arr.any(axis=1)
+
+    def to_keys(self, encoded_arr):
+        """
+        Pack records into uint64 keys, the class id in the highest bits, then FA id + 1 and mod id + 1
+        of each position. Sorted keys are sorted by class.
+
+        :param encoded_arr: records of dtype self.dtype
+        :type encoded_arr: numpy.ndarray
+        :return: keys
+        :rtype: numpy.ndarray
+        """
+        if self.key_bits > 64:
+            raise ValueError('records need %i bit, use the structured arrays' % self.key_bits)
+        key_arr = np.asarray(encoded_arr['class_id']).astype(np.uint64)
+        for pos in range(self.n_pos):
+            key_arr = ((key_arr << np.uint64(self.fa_bits))
+                       | (encoded_arr['fa_id'][:, pos].astype(np.int64) + 1).astype(np.uint64))
+            key_arr = ((key_arr << np.uint64(self.mod_bits))
+                       | (encoded_arr['mod_id'][:, pos].astype(np.int64) + 1).astype(np.uint64))
+        return key_arr
+
+    def from_keys(self, key_arr):
+        """
+        Unpack uint64 keys from to_keys into records
+
+        :param key_arr: keys
+        :type key_arr: numpy.ndarray
+        :return: records of dtype self.dtype
+        :rtype: numpy.ndarray
+        """
+        key_arr = np.asarray(key_arr, dtype=np.uint64).copy()
+        encoded_arr = np.zeros(key_arr.shape[0], dtype=self.dtype)
+        for pos in range(self.n_pos - 1, -1, -1):
+            encoded_arr['mod_id'][:, pos] = (key_arr & np.uint64((1 << self.mod_bits) - 1)).astype(np.int64) - 1
+            key_arr >>= np.uint64(self.mod_bits)
+            encoded_arr['fa_id'][:, pos] = (key_arr & np.uint64((1 << self.fa_bits) - 1)).astype(np.int64) - 1
+            key_arr >>= np.uint64(self.fa_bits)
+        encoded_arr['class_id'] = key_arr
+        return encoded_arr
+
+    def _encode_block(self, block, start, stop):
+        # records of the species start .. stop - 1 of one block
+
+        if stop < _max_int:
+            return self._encode_block_at(block, np.arange(start, stop, dtype=np.int64))
+        return self._encode_slot_values(block, np.array(list(self.species_generator.iter_block(
+            block, site=self.site, site_specific=self.site_specific, start=start, stop=stop)), dtype=np.int64))
+
+    def _encode_block_at(self, block, idx_arr):
+        # records of the species at position idx_arr of one block, mixed radix digits of each part as numpy arrays
+
+        n_slot = len(block.slot_pattern)
+        part_lst = _get_block_parts(block, self.species_generator._get_slot_sizes(block, self.site, self.site_specific))
+        part_offset_lst = [0]
+        for comp_lst in part_lst:
+            part_offset_lst.append(part_offset_lst[-1] + _get_part_size(comp_lst))
+        if part_offset_lst[-1] >= _max_int or any(_get_comb_limit(comp) >= _max_int
+                                                  for comp_lst in part_lst for comp in comp_lst):
+            return self._encode_slot_values(block, np.array(
+                [self.species_generator.unrank_block(block, int(idx), site=self.site, site_specific=self.site_specific)
+                 for idx in idx_arr], dtype=np.int64).reshape(-1, n_slot))
+
+        idx_arr = np.asarray(idx_arr, dtype=np.int64)
+        slot_arr = np.zeros((idx_arr.shape[0], n_slot), dtype=np.int64)
+        part_idx_arr = np.searchsorted(np.array(part_offset_lst[1:], dtype=np.int64), idx_arr, side='right')
+        for part_idx, comp_lst in enumerate(part_lst):
+            sel_arr = np.flatnonzero(part_idx_arr == part_idx)
+            if not sel_arr.size:
+                continue
+            rest_arr = idx_arr[sel_arr] - part_offset_lst[part_idx]
+            digit_lst = []
+            for comp in reversed(comp_lst):
+                comp_size = _get_comp_size(comp)
+                digit_lst.append(rest_arr % comp_size)
+                rest_arr = rest_arr // comp_size
+            for (comp, slot_tuple), digit_arr in zip(zip(comp_lst, _get_part_slots(block, part_idx)),
+                                                     reversed(digit_lst)):
+                value_arr = _unrank_comp_arr(comp, digit_arr)
+                for i, slot in enumerate(slot_tuple):
+                    # one value on several slots: same FA on a pair of mirror positions
+                    slot_arr[sel_arr, slot] = value_arr[:, i if value_arr.shape[1] > 1 else 0]
+
+        return self._encode_slot_values(block, slot_arr)
+
+    def _encode_slot_values(self, block, slot_arr):
+        # records from the FA index of each slot, oxFA index are split into FA id and pattern id
+
+        encoded_arr = np.zeros(slot_arr.shape[0], dtype=self.dtype)
+        encoded_arr['class_id'] = self._class_key_dct[(block.lipid_class, len(block.slot_pattern))]
+        encoded_arr['fa_id'] = -1
+        encoded_arr['mod_id'] = -1
+        for slot, slot_type in enumerate(block.slot_pattern):
+            pos = block.fa_sn[slot]
+            if slot_type == 'o':
+                fa_id_arr = np.searchsorted(self.oxfa_offset_arr, slot_arr[:, slot], side='right') - 1
+                encoded_arr['fa_id'][:, pos] = fa_id_arr
+                encoded_arr['mod_id'][:, pos] = slot_arr[:, slot] - self.oxfa_offset_arr[fa_id_arr]
+            else:
+                encoded_arr['fa_id'][:, pos] = slot_arr[:, slot]
+        return encoded_arr
+
+
+def save_encoded(output_dir, encoded_arr, encoder):
+    """
+    Save encoded species as species.npy and the settings of the encoder as settings.json
+
+    :param output_dir: output folder, created if needed
+    :type output_dir: str
+    :param encoded_arr: records of dtype encoder.dtype
+    :type encoded_arr: numpy.ndarray
+    :param encoder: encoder of the records
+    :type encoder: SpeciesEncoder
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    # write under a temporary name, encoded_arr may be a memory map of the file that is replaced
+    tmp_path = os.path.join(output_dir, species_file_name + '.tmp')
+    with open(tmp_path, 'wb') as species_obj:
+        np.save(species_obj, np.asarray(encoded_arr, dtype=encoder.dtype))
+    os.replace(tmp_path, os.path.join(output_dir, species_file_name))
+    _write_settings(output_dir, dict(encoder.get_settings(), total=int(encoded_arr.shape[0])))
+
+
+def export_encoded(encoder, output_dir, chunk_size=1000000):
+    """
+    Encode all species of the lipidome chunk by chunk directly into a memory mapped species.npy,
+    only one chunk is kept in memory
+
+    :param encoder: encoder of the lipidome
+    :type encoder: SpeciesEncoder
+    :param output_dir: output folder, created if needed
+    :type output_dir: str
+    :param chunk_size: number of species encoded at once
+    :type chunk_size: int
+    :return: number of species
+    :rtype: int
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    tot_count = encoder.get_count()
+    tmp_path = os.path.join(output_dir, species_file_name + '.tmp')
+    out_arr = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=encoder.dtype, shape=(tot_count,))
+    chunk_start = 0
+    for encoded_arr in encoder.iter_encoded(chunk_size=chunk_size):
+        out_arr[chunk_start:chunk_start + encoded_arr.shape[0]] = encoded_arr
+        chunk_start += encoded_arr.shape[0]
+    out_arr.flush()
+    del out_arr
+    os.replace(tmp_path, os.path.join(output_dir, species_file_name))
+    _write_settings(output_dir, encoder.get_settings())
+
+    return tot_count
+
+
+def load_encoded(output_dir, mmap=True):
+    """
+    Load species saved by save_encoded or export_encoded
+
+    :param output_dir: folder of the encoded species
+    :type output_dir: str
+    :param mmap: set to False to read the records into memory
+    :type mmap: bool
+    :return: records and settings
+    :rtype: tuple
+    """
+    encoded_arr = np.load(os.path.join(output_dir, species_file_name), mmap_mode='r' if mmap is True else None)
+    with open(os.path.join(output_dir, settings_file_name), 'r') as settings_obj:
+        settings = json.load(settings_obj)
+
+    return encoded_arr, settings
+
+
+def get_encoder(settings):
+    """
+    Load the encoder of saved species from their settings, to decode them without the original FA list file
+
+    :param settings: settings from load_encoded
+    :type settings: dict
+    :return: encoder
+    :rtype: SpeciesEncoder
+    """
+    # the species names only need the FA names and number of C=C
+    species_generator = TheoOxLipidomeSpecies([(fa_name, '', 0, n_db) for fa_name, n_db in settings['fa_list']],
+                                              settings['lipid_classes'], settings['modifications'],
+                                              published=settings['published'])
+    encoder = SpeciesEncoder(species_generator, site=settings['site'], site_specific=settings['site_specific'],
+                             lipidome=settings['lipidome'])
+    encoder.check_settings(settings)
+
+    return encoder
+
+
+def _write_settings(output_dir, settings):
+
+    with open(os.path.join(output_dir, settings_file_name), 'w') as settings_obj:
+        json.dump(settings, settings_obj, indent=1)
+
+
+def _get_int_dtype(max_value, signed=True):
+    # smallest integer type for values up to max_value (and -1 if signed)
+
+    for bits in [8, 16, 32, 64]:
+        if max_value < 2 ** (bits - 1 if signed else bits):
+            return np.dtype('%s%i' % ('int' if signed else 'uint', bits))
+    raise ValueError('value too large to encode: %i' % max_value)
+
+
+def _get_pattern_mods(pattern_label):
+    # modification names of one pattern label, e.g. '2OH,Aldehyde@3' -> {'OH', 'Aldehyde'}
+
+    mod_set = set()
+    for mod in pattern_label.split(','):
+        mod = mod.split('@')[0]
+        mod_set.add(mod.lstrip('0123456789') or mod)
+    return mod_set
+
+
+def _get_comb_limit(comp):
+    # largest intermediate value of _unrank_comp_arr
+
+    if comp[0] == 'range':
+        return comp[1]
+    n = _get_comp_len(comp)
+    size = comp[1] + n - 1 if comp[0] == 'multiset' else comp[1]
+    return comb_exact(size, n) * max(n, 1)
+
+
+def _unrank_comp_arr(comp, idx_arr):
+    # values of one component at idx_arr, same as _unrank_comp of oxlipidome_species, shape (len(idx_arr), comp len)
+
+    if comp[0] == 'range':
+        return idx_arr[:, None]
+    elif comp[0] == 'pair':
+        return _unrank_comb_arr(comp[1], 2, idx_arr)
+    else:
+        # combinations with repetition of n from size are combinations of n from size + n - 1
+        return _unrank_comb_arr(comp[1] + comp[2] - 1, comp[2], idx_arr) - np.arange(comp[2], dtype=np.int64)
+
+
+def _unrank_comb_arr(size, n, idx_arr):
+    # combinations of n from range(size) at idx_arr in the order of itertools.combinations.
+    # Each value is the largest v with (combinations after the previous value) - (combinations from v) <= rest,
+    # found by a binary search for all idx at once.
+
+    value_arr = np.zeros((idx_arr.shape[0], n), dtype=np.int64)
+    rest_arr = np.array(idx_arr, dtype=np.int64)
+    prev_arr = np.full(idx_arr.shape[0], -1, dtype=np.int64)
+    for j in range(n):
+        k = n - j
+        tot_arr = _comb_int64(size - 1 - prev_arr, k)
+        lo_arr = prev_arr + 1
+        hi_arr = np.full(idx_arr.shape[0], size - k, dtype=np.int64)
+        while np.any(lo_arr < hi_arr):
+            mid_arr = (lo_arr + hi_arr + 1) // 2
+            is_ok = tot_arr - _comb_int64(size - mid_arr, k) <= rest_arr
+            lo_arr = np.where(is_ok, mid_arr, lo_arr)
+            hi_arr = np.where(is_ok, hi_arr, mid_arr - 1)
+        rest_arr -= tot_arr - _comb_int64(size - lo_arr, k)
+        value_arr[:, j] = lo_arr
+        prev_arr = lo_arr
+    return value_arr
+
+
+def _comb_int64(n_arr, k):
+    # n choose k for an int64 array of n >= 0, exact while all steps are < 2 ** 63
+
+    _comb = np.ones(n_arr.shape, dtype=np.int64)
+    for i in range(k):
+        _comb = _comb * np.maximum(n_arr - i, 0) // (i + 1)
+    return _comb
@@ -7,8 +7,11 @@
 # For more info please contact:
 #     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
 
-import pandas as pd
-from scipy.special import comb
+import time
+
+from fa_list_loader import load_fa_summary
+from lipidome_utils import cached_result, get_comb, sum_powers, to_int
+from oxlipidome_tables import load_tables
 
 
 class TheoOxLipidome(object):
@@ -22,40 +25,171 @@ class TheoOxLipidome(object):
     This will use a modified permutation algorithm to make all modifications repeatable at all sites
     while remove mirrored products from TG and cardiolipin.
     LysoPL, MG, and DG also treated with special care for positions
+
+    published=True (default) uses the equations of the publication.
+    published=False uses the corrected equations that count each species once, the differences are listed in README.md:
+    in site specific mode, each modification site is unmodified or has one OAP, (n_oap + 1) ** m - 1 OAP,
+    instead of one OAP on each site, n_oap ** m - 1 OAP.
     """
 
-    def __init__(self, fa_lst_path, x_dct, mod_dct):
+    def __init__(self, fa_lst_path, x_dct, mod_dct, exact=False, verbose=True, published=True):
         """
         Load default settings, see the __main__ function to modify the default values.
 
-        :param fa_lst_path: file path to default FA_list.xlsx file
-        :type fa_lst_path: str
+        :param fa_lst_path: file path to default FA_list.xlsx file, other FA lists supported by load_fa_list
+        :type fa_lst_path: str | pandas.DataFrame | list
         :param x_dct: default values for the number of lipid classes that have n FA residues
         :type x_dct: dict
         :param mod_dct: default values for the modification types
         :type mod_dct: dict
+        :param exact: set to False to use float binomial coefficients from scipy.
+            set to True to use exact arbitrary-precision integers for all numbers
+        :type exact: bool
+        :param verbose: set to False to skip printing the FA list and loading status
+        :type verbose: bool
+        :param published: set to True to use the equations of the publication.
+            set to False to use the corrected equations, see README.md
+        :type published: bool
         """
-        fa_df = pd.read_excel(fa_lst_path, header=0)
-        print('Load FA list:')
-        print(fa_df)
-        self.f = fa_df.shape[0]  # total number of Free Fatty acids F
-        db_lst = fa_df['DB'].values.tolist()
-        n_db_lst = list(set(db_lst))
-        self.fa_dct = {}
-        self.n_lst = []
-        for n_db in n_db_lst:
-            if n_db > 0:
-                self.fa_dct[n_db] = db_lst.count(n_db)
-                self.n_lst.append(n_db)
+        # total number of Free Fatty acids F and number of FA for each number of C=C bond
+        self.f, self.fa_dct, self.n_lst = load_fa_summary(fa_lst_path, verbose=verbose)
+        self.result_cache = {}
+        self._fingerprint_memo = None  # settings of the last fingerprint and the fingerprint, see get_fingerprint
         self.x_dct = x_dct
         self.m_dct = mod_dct
-        print('All settings loaded...')
+        self.published = published
+        self.exact = exact
+        self.comb = get_comb(exact)
+        self.term_recorder = None  # function(x, term, value, time_s) called by get_term, see oxlipidome_profile
+        self.use_count_tables = True  # set to False to calculate OAP, OCP and cyclic products without the tables
+        if verbose is True:
+            print('All settings loaded...')
+
+    @property
+    def x_dct(self):
+        return self._x_dct
+
+    @x_dct.setter
+    def x_dct(self, x_dct):
+        self._x_dct = x_dct
+        self.result_cache.clear()
+
+    @property
+    def m_dct(self):
+        return self._m_dct
+
+    @m_dct.setter
+    def m_dct(self, mod_dct):
+        self._m_dct = mod_dct
+        self.result_cache.clear()
+
+    @property
+    def published(self):
+        return self._published
+
+    @published.setter
+    def published(self, published):
+        self._published = published
+        self.result_cache.clear()
+
+    def get_fingerprint(self):
+        """
+        Get all settings the results depend on, the result_cache is cleared when it changes.
+        The fingerprint is kept until the FA list, x_dct or m_dct are reassigned or f, exact, published or
+        use_count_tables change. Changes made in place to fa_dct or the lists in x_dct and m_dct are not detected,
+        call clear_result_cache after them.
+
+        :return: FA list, lipid classes, modification types, the equations and the use of the count tables
+        :rtype: tuple
+        """
+        memo_key = (self.fa_dct, self.x_dct, self.m_dct, self.f, self.exact, self.published, self.use_count_tables)
+        memo = self._fingerprint_memo
+        if memo is None or len(memo[0]) != len(memo_key) or not all(
+                memo_value is value for memo_value, value in zip(memo[0], memo_key)):
+            fingerprint = (self.f, tuple(sorted(self.fa_dct.items())), self.exact, self.published,
+                           tuple((x, tuple(self.x_dct[x])) for x in sorted(self.x_dct)),
+                           tuple((mod_type, tuple(self.m_dct[mod_type])) for mod_type in sorted(self.m_dct)),
+                           self.use_count_tables)
+            self._fingerprint_memo = (memo_key, fingerprint)
+        return self._fingerprint_memo[1]
+
+    def clear_result_cache(self):
+        """
+        Clear the result_cache and the fingerprint, needed after changes made in place to fa_dct, x_dct or m_dct
+        """
+        self.result_cache.clear()
+        self._fingerprint_memo = None
+
+    def get_count_tables(self):
+        """
+        Get the precalculated tables of OAP, OCP and cyclic products, loaded on the first use.
+        The tables are exact integers and only used in exact mode.
+
+        :return: the tables, None in float mode, if use_count_tables is False or the table file does not exist
+        :rtype: oxlipidome_tables.ModCountTables
+        """
+        if self.exact is True and self.use_count_tables is True:
+            return load_tables()
+        else:
+            return None
+
+    def get_mod_count(self, mod_type):
+        """
+        Get the number of modifications of one type
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :return: Number of modifications of this type
+        :rtype: int
+        """
+        return len(self.m_dct[mod_type])
+
+    def get_site_option_count(self):
+        """
+        Get the number of options of one modification site in site specific mode:
+        one of the m_oap with published=True, unmodified or one of the m_oap with published=False
+
+        :return: Number of options of one site
+        :rtype: int
+        """
+        if self.published is True:
+            return self.get_mod_count('m_oap')
+        else:
+            return self.get_mod_count('m_oap') + 1
+
+    def has_cardiolipin(self):
+        """
+        Check if the terms of cardiolipin with the mirrored products removed are used.
+        The publication looks up Cardiolipin in x3, so with published=True only CL in x4 is counted as cardiolipin.
 
+        :return: True if the terms of cardiolipin are used
+        :rtype: bool
+        """
+        if self.published is True:
+            return 'Cardiolipin' in self.x_dct['x3'] or 'CL' in self.x_dct['x4']
+        else:
+            return 'Cardiolipin' in self.x_dct['x4'] or 'CL' in self.x_dct['x4']
+
+    def get_cardiolipin_names(self):
+        """
+        Get the names of the lipid classes with 4 FA that are cardiolipin, with the mirrored products removed
+
+        :return: names of cardiolipin
+        :rtype: list
+        """
+        if self.published is True:
+            return ['CL']  # the publication looks up Cardiolipin in x3
+        else:
+            return ['Cardiolipin', 'CL']
+
+    @cached_result
     def get_oap(self, m, site_specific=False):
         """
         Calculate Number of OAP from FA with n_db and m modification sites A\ :sub:`n`\
 
-        The number calculated do NOT contain any unmodified FA
+        The number calculated do NOT contain any unmodified FA.
+        Site specific: n_oap ** m - 1 with published=True, one OAP on each site and the placement of m_oap[0]
+        on all sites left out; (n_oap + 1) ** m - 1 with published=False, each site unmodified or with one OAP.
 
         :param m: number of modification sites
         :type m: int
@@ -65,16 +199,28 @@ class TheoOxLipidome(object):
         :rtype: int
         """
         try:
+            if site_specific is False:
+                n_oap = self.get_mod_count('m_oap')
+            else:
+                n_oap = self.get_site_option_count()  # the equation below counts n_oap options per site
+            count_tables = self.get_count_tables()
+            if count_tables is not None:
+                oap_count = count_tables.get('oap', n_oap, m, site_specific)
+                if oap_count is not None:
+                    # the table counts the unmodified structure, there is none without OAP
+                    return (oap_count - 1) * (n_oap > 0)
             # return comb((self.m_dct['m_oap'] + 1) + m - 1, m) - 1
             # -1 to remove the unmodified structure
             # simplify the equation above
             if site_specific is False:
-                return comb(len(self.m_dct['m_oap']) + m, m) - 1  # A_n
+                return self.comb(n_oap + m, m) - 1  # A_n
             else:
-                return len(self.m_dct['m_oap']) ** m - 1  # -1 to remove the unmodified structure
+                # -1 to remove the unmodified structure, 0 ** m has none to remove
+                return (n_oap ** m - 1) * (n_oap > 0)
         except KeyError:
             return False
 
+    @cached_result
     def get_ocp(self, m, site_specific=False):
         """
         Calculate Number of OCP from FA with n_db and m modification sites C\ :sub:`n`\
@@ -89,18 +235,28 @@ class TheoOxLipidome(object):
         :rtype: int
         """
 
-        m_ocp = len(self.m_dct['m_ocp'])
-        if m == 1:
-            return m_ocp
+        m_ocp = self.get_mod_count('m_ocp')
+        # the cleavage leaves a segment with r = 0 .. m - 2 sites, unmodified or with OAP
+        # C_n = m_ocp * sum(A_r + 1) for r = 0 .. m - 2
+        r_max = max(m - 2, 0)
+        try:
+            if site_specific is False:
+                n_oap = self.get_mod_count('m_oap')
+            else:
+                n_oap = self.get_site_option_count()
+        except KeyError:
+            return m_ocp * (r_max + 1)  # A_r = 0 without m_oap
+        count_tables = self.get_count_tables()
+        if count_tables is not None:
+            segment_count = count_tables.get('ocp', n_oap, m, site_specific)
+            if segment_count is not None:
+                return m_ocp * segment_count  # C_n
+        if site_specific is False:
+            # sum(comb(n_oap + r, r)) for r = 0 .. r_max = comb(n_oap + r_max + 1, r_max)
+            return m_ocp * self.comb(n_oap + r_max + 1, r_max)  # C_n
         else:
-            ocp_count = m_ocp
-            m_lst = list(range(2, m))
-            if m_lst:
-                for i in m_lst:
-                    # add back the unmodified segment from oap with n-1 C=C
-                    ocp_count += m_ocp * (self.get_oap(i - 1, site_specific=site_specific) + 1)
-
-            return ocp_count  # C_n
+            # sum(n_oap ** r) for r = 0 .. r_max, n_oap options per site
+            return m_ocp * sum_powers(n_oap, r_max)  # C_n
 
     def get_cyclic(self, n_db, site_specific=False):
         """
@@ -116,32 +272,31 @@ class TheoOxLipidome(object):
         """
         if n_db >= 3:
             try:
+                count_tables = self.get_count_tables()
+                if count_tables is not None:
+                    cyclic_count = count_tables.get('cyclic', self.get_mod_count('m_p') + self.get_mod_count('m_o'),
+                                                    n_db, site_specific)
+                    if cyclic_count is not None:
+                        return cyclic_count  # P_n
                 if site_specific is False:
-                    return len(self.m_dct['m_p']) + len(self.m_dct['m_o'])  # P_n
+                    return self.get_mod_count('m_p') + self.get_mod_count('m_o')  # P_n
                 else:
                     tri_unit_site = n_db - 2  # 3db = 1 unit_site, 5db = 3 unit_sites
-                    return tri_unit_site * (len(self.m_dct['m_p']) + len(self.m_dct['m_o']))  # P_n
+                    return tri_unit_site * (self.get_mod_count('m_p') + self.get_mod_count('m_o'))  # P_n
             except KeyError:
                 return 0
         else:
             return 0
 
-    def get_all_oxfa(self, site='bis-allylic', site_specific=False):
+    def get_m_shift(self, site='bis-allylic'):
         """
-        Calculate Number of sum product for FA chain got oxidation F\ :sub:`ox`\
-
-        The number calculated do NOT contain any unmodified FA.
+        Get the shift to calculate the number of modification sites m from the number of C=C bond n_db
 
         :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
         :type site: str
-        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
-        :type site_specific: bool
-        :return: Number oxFA F_ox
+        :return: m_shift for m = n_db + m_shift
         :rtype: int
         """
-        tot_fa_ox = 0  # Number of sum product for FA chain got oxidation F_ox
-
-        # Define a shift to calc m from n_db
         m_shift = -1  # set default to use bis-allylic sites only --> m = n_db - 1 --> m_shift = -1
         if site in {'bisallylic', 'bis allylic', 'bis-allylic', 'allylic', 'db', 'n_db', 'C=C', 'n'}:
             if site == 'allylic':
@@ -155,18 +310,61 @@ class TheoOxLipidome(object):
             print('Use "bis-allylic sites only" mode by default...')
             # m_shift = -1
 
+        return m_shift
+
+    def get_term(self, x, term, func):
+        """
+        Evaluate one named term of the equations.
+        If term_recorder is set, it is called with the lipid class group, term name, value and time in s of the term.
+
+        :param x: group of the term, 'oxFA' or the lipid classes 'x1' .. 'x4'
+        :type x: str
+        :param term: name of the term
+        :type term: str
+        :param func: function without arguments that returns the value of the term
+        :type func: function
+        :return: value of the term
+        :rtype: int
+        """
+        if self.term_recorder is None:
+            return func()
+        start_time = time.perf_counter()
+        value = func()
+        self.term_recorder(x, term, value, time.perf_counter() - start_time)
+        return value
+
+    @cached_result
+    def get_all_oxfa(self, site='bis-allylic', site_specific=False):
+        """
+        Calculate Number of sum product for FA chain got oxidation F\ :sub:`ox`\
+
+        The number calculated do NOT contain any unmodified FA.
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: Number oxFA F_ox
+        :rtype: int
+        """
+        tot_fa_ox = 0  # Number of sum product for FA chain got oxidation F_ox
+
+        m_shift = self.get_m_shift(site)  # Define a shift to calc m from n_db
+
         for n_db in self.n_lst:
             _fa_count = self.fa_dct[n_db]  # Number of fatty acids with n C=C bond B<n>
             # set number of modification sites according to user settings
             m = n_db + m_shift
-            _f_ox = _fa_count * (self.get_oap(m, site_specific=site_specific)
-                                 + self.get_ocp(m, site_specific=site_specific)
-                                 + self.get_cyclic(n_db, site_specific=site_specific)
-                                 )
-            tot_fa_ox += _f_ox
+            tot_fa_ox += self.get_term('oxFA', 'OAP of FA with %i C=C' % n_db,
+                                       lambda: _fa_count * self.get_oap(m, site_specific=site_specific))
+            tot_fa_ox += self.get_term('oxFA', 'OCP of FA with %i C=C' % n_db,
+                                       lambda: _fa_count * self.get_ocp(m, site_specific=site_specific))
+            tot_fa_ox += self.get_term('oxFA', 'Cyclic of FA with %i C=C' % n_db,
+                                       lambda: _fa_count * self.get_cyclic(n_db, site_specific=site_specific))
 
-        return int(tot_fa_ox)
+        return to_int(tot_fa_ox)
 
+    @cached_result
     def get_all_class_1oxfa(self, site='bis-allylic', site_specific=False):
         """
         Calculate Number of sum product for Lipids with max 1 FA chain got oxidation T\ :sub:`ox`\
@@ -183,10 +381,12 @@ class TheoOxLipidome(object):
         tot_fa_ox = self.get_all_oxfa(site=site, site_specific=site_specific)  # Number of oxFA F_ox
         tox_one_ox = 0
         if site_specific is False:
-            tox_one_ox += len(self.x_dct['x1']) * tot_fa_ox
-            tox_one_ox += len(self.x_dct['x2']) * tot_fa_ox * self.f
-            tox_one_ox += len(self.x_dct['x3']) * tot_fa_ox * comb(self.f + 1, 2)
-            tox_one_ox += len(self.x_dct['x4']) * tot_fa_ox * comb(self.f + 2, 3)
+            tox_one_ox += self.get_term('x1', 'Lipid with 1 FA', lambda: len(self.x_dct['x1']) * tot_fa_ox)
+            tox_one_ox += self.get_term('x2', 'Lipid with 2 FA', lambda: len(self.x_dct['x2']) * tot_fa_ox * self.f)
+            tox_one_ox += self.get_term('x3', 'Lipid with 3 FA',
+                                        lambda: len(self.x_dct['x3']) * tot_fa_ox * self.comb(self.f + 1, 2))
+            tox_one_ox += self.get_term('x4', 'Lipid with 4 FA',
+                                        lambda: len(self.x_dct['x4']) * tot_fa_ox * self.comb(self.f + 2, 3))
         else:
             n_x1 = len(self.x_dct['x1'])
             for x1 in self.x_dct['x1']:
@@ -194,39 +394,51 @@ class TheoOxLipidome(object):
                     n_x1 += 1
                 if x1 in ['Monoacylglycerol', 'MG']:
                     n_x1 += 2
-            tox_one_ox += n_x1 * tot_fa_ox
+            tox_one_ox += self.get_term('x1', 'Lipid with 1 FA, oxFA on each sn', lambda: n_x1 * tot_fa_ox)
 
-            n_x2 = len(self.x_dct['x2'])
-            if 'Diacylglycerol' in self.x_dct['x2'] or 'DG' in self.x_dct['x2']:
-                n_x2 += 2  # ox FA can be in sn1/sn3 or sn2
+            if self.published is True:
+                n_x2 = len(self.x_dct['x2'])
+                if 'Diacylglycerol' in self.x_dct['x2'] or 'DG' in self.x_dct['x2']:
+                    n_x2 += 2  # ox FA can be in sn1/sn3 or sn2
+                else:
+                    pass
             else:
-                pass
-            tox_one_ox += n_x2 * tot_fa_ox * self.f
+                n_x2 = 2 * len(self.x_dct['x2'])  # oxFA on sn1 or sn2
+                if 'Diacylglycerol' in self.x_dct['x2'] or 'DG' in self.x_dct['x2']:
+                    n_x2 += 1  # -OH at sn2, oxFA on sn1/sn3
+                else:
+                    pass
+            tox_one_ox += self.get_term('x2', 'Lipid with 2 FA, oxFA on each sn', lambda: n_x2 * tot_fa_ox * self.f)
 
             if 'Triacylglycerol' in self.x_dct['x3'] or 'TG' in self.x_dct['x3']:
-                tox_one_ox += (tot_fa_ox * self.f * self.f  # oxFA on sn1/sn3 of TG
-                               + tot_fa_ox * (comb(self.f, 2) + self.f)  # oxFA on sn2 of TG
-                               )
+                tox_one_ox += self.get_term('x3', 'oxFA on sn1/sn3 of TG', lambda: tot_fa_ox * self.f * self.f)
+                tox_one_ox += self.get_term('x3', 'oxFA on sn2 of TG',
+                                            lambda: tot_fa_ox * (self.comb(self.f, 2) + self.f))
                 if len(self.x_dct['x3']) - 1 > 0:
-                    tox_one_ox += 3 * (len(self.x_dct['x3']) - 1) * tot_fa_ox * self.f**2  # Other Lipid with 3 FA
+                    tox_one_ox += self.get_term('x3', 'Other Lipid with 3 FA',
+                                                lambda: 3 * (len(self.x_dct['x3']) - 1) * tot_fa_ox * self.f**2)
                 else:
                     pass
             else:
-                tox_one_ox += 3 * len(self.x_dct['x3']) * tot_fa_ox * self.f**2  # Other Lipid with 3 FA
-
-            if 'Cardiolipin' in self.x_dct['x3'] or 'CL' in self.x_dct['x4']:
-                tox_one_ox += (tot_fa_ox * self.f**3  # oxFA on sn1/sn4 of CL
-                               + tot_fa_ox * self.f**3  # oxFA on sn2/sn3 of TG
-                               )
-                if len(self.x_dct['x3']) - 1 > 0:
-                    tox_one_ox += 4 * (len(self.x_dct['x4']) - 1) * tot_fa_ox * self.f**3  # Other Lipid with 4 FA
+                tox_one_ox += self.get_term('x3', 'Other Lipid with 3 FA',
+                                            lambda: 3 * len(self.x_dct['x3']) * tot_fa_ox * self.f**2)
+
+            if self.has_cardiolipin():
+                tox_one_ox += self.get_term('x4', 'oxFA on sn1/sn4 of CL', lambda: tot_fa_ox * self.f**3)
+                tox_one_ox += self.get_term('x4', 'oxFA on sn2/sn3 of CL', lambda: tot_fa_ox * self.f**3)
+                # the publication checks the number of other lipid classes with 4 FA in x3
+                if len(self.x_dct['x3' if self.published is True else 'x4']) - 1 > 0:
+                    tox_one_ox += self.get_term('x4', 'Other Lipid with 4 FA',
+                                                lambda: 4 * (len(self.x_dct['x4']) - 1) * tot_fa_ox * self.f**3)
                 else:
                     pass
             else:
-                tox_one_ox += 4 * len(self.x_dct['x4']) * tot_fa_ox * self.f**3  # Other Lipid with 4 FA
+                tox_one_ox += self.get_term('x4', 'Other Lipid with 4 FA',
+                                            lambda: 4 * len(self.x_dct['x4']) * tot_fa_ox * self.f**3)
 
-        return int(tox_one_ox)  # T_ox
+        return to_int(tox_one_ox)  # T_ox
 
+    @cached_result
     def get_all_class_alloxfa(self, site='bis-allylic', site_specific=False):
         """
         Calculate Number of sum product for Lipids with ALL FA chain got oxidation T\ :sup:`all`:sub:`ox`\
@@ -242,72 +454,101 @@ class TheoOxLipidome(object):
         """
         tot_fa_ox = self.get_all_oxfa(site=site, site_specific=site_specific)  # Number of oxFA F_ox
         tox_all_ox = 0
+        f = self.f
         if site_specific is False:
-            tox_all_ox += len(self.x_dct['x1']) * tot_fa_ox
-            tox_all_ox += len(self.x_dct['x2']) * (comb(tot_fa_ox + self.f + 1, 2) - comb(self.f + 1, 2))
-            tox_all_ox += len(self.x_dct['x3']) * (comb(tot_fa_ox + self.f + 2, 3) - comb(self.f + 2, 3))
-            tox_all_ox += len(self.x_dct['x4']) * (comb(tot_fa_ox + self.f + 3, 4) - comb(self.f + 4, 4))
+            tox_all_ox += self.get_term('x1', 'Lipid with 1 FA', lambda: len(self.x_dct['x1']) * tot_fa_ox)
+            tox_all_ox += self.get_term('x2', 'Lipid with 2 FA', lambda: len(self.x_dct['x2']) * (
+                self.comb(tot_fa_ox + f + 1, 2) - self.comb(f + 1, 2)))
+            tox_all_ox += self.get_term('x3', 'Lipid with 3 FA', lambda: len(self.x_dct['x3']) * (
+                self.comb(tot_fa_ox + f + 2, 3) - self.comb(f + 2, 3)))
+            # the publication removes comb(f + 4, 4) unmodified lipids with 4 FA
+            f_unox = f + 4 if self.published is True else f + 3
+            tox_all_ox += self.get_term('x4', 'Lipid with 4 FA', lambda: len(self.x_dct['x4']) * (
+                self.comb(tot_fa_ox + f + 3, 4) - self.comb(f_unox, 4)))
         else:
-            tot_fa_opt = tot_fa_ox + self.f  # all possible FA
-            tox_all_ox += len(self.x_dct['x2']) * (tot_fa_opt**2 - self.f**2)
+            tot_fa_opt = tot_fa_ox + f  # all possible FA
+            if self.published is True:
+                # the publication adds the lipids with 2 FA twice
+                tox_all_ox += self.get_term('x2', 'Lipid with 2 FA on sn1 + sn2',
+                                            lambda: len(self.x_dct['x2']) * (tot_fa_opt**2 - f**2))
             n_x1 = len(self.x_dct['x1'])
             for x1 in self.x_dct['x1']:
                 if x1 in ['LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS']:
                     n_x1 += 1
                 if x1 in ['Monoacylglycerol', 'MG']:
                     n_x1 += 2
-            tox_all_ox += n_x1 * tot_fa_ox
+            tox_all_ox += self.get_term('x1', 'Lipid with 1 FA, oxFA on each sn', lambda: n_x1 * tot_fa_ox)
 
-            tox_all_ox += len(self.x_dct['x2']) * (tot_fa_opt**2 - self.f**2)
+            tox_all_ox += self.get_term('x2', 'Lipid with 2 FA on sn1 + sn2',
+                                        lambda: len(self.x_dct['x2']) * (tot_fa_opt**2 - f**2))
             # DG with -OH at sn1/sn3 is like PLs and calculated above
             if 'Diacylglycerol' in self.x_dct['x2'] or 'DG' in self.x_dct['x2']:
-                tox_all_ox += (tot_fa_ox * self.f  # -OH at sn2, 1 oxFA and 1 unox FA at sn1/sn3
-                               + tot_fa_ox * tot_fa_ox  # -OH at sn2, 2 oxFA at sn1 + sn3
-                               )
+                tox_all_ox += self.get_term('x2', '-OH at sn2 of DG, 1 oxFA and 1 unox FA at sn1/sn3',
+                                            lambda: tot_fa_ox * f)
+                if self.published is True:
+                    tox_all_ox += self.get_term('x2', '-OH at sn2 of DG, 2 oxFA at sn1 + sn3',
+                                                lambda: tot_fa_ox * tot_fa_ox)
+                else:
+                    tox_all_ox += self.get_term('x2', '-OH at sn2 of DG, 2 oxFA at sn1 + sn3',
+                                                lambda: self.comb(tot_fa_ox, 2) + tot_fa_ox)
             else:
                 pass
 
             if 'Triacylglycerol' in self.x_dct['x3'] or 'TG' in self.x_dct['x3']:
-                tox_all_ox += (tot_fa_ox * self.f * self.f  # 1 oxFA on sn1/sn3 of TG
-                               + tot_fa_ox * (comb(self.f, 2) + self.f)  # 1 oxFA on sn2 of TG
-                               + self.f * (comb(tot_fa_ox, 2) + tot_fa_ox)  # 2 oxFA on sn1 + sn3 of TG
-                               + self.f * (tot_fa_ox**2)  # 2 oxFA on sn1 + sn2 / sn2 + sn3 of TG
-                               + tot_fa_ox * (comb(tot_fa_ox, 2) + tot_fa_ox)  # 3 oxFA on all sn
-                               )
+                tox_all_ox += self.get_term('x3', '1 oxFA on sn1/sn3 of TG', lambda: tot_fa_ox * f * f)
+                tox_all_ox += self.get_term('x3', '1 oxFA on sn2 of TG', lambda: tot_fa_ox * (self.comb(f, 2) + f))
+                tox_all_ox += self.get_term('x3', '2 oxFA on sn1 + sn3 of TG',
+                                            lambda: f * (self.comb(tot_fa_ox, 2) + tot_fa_ox))
+                tox_all_ox += self.get_term('x3', '2 oxFA on sn1 + sn2 / sn2 + sn3 of TG', lambda: f * (tot_fa_ox**2))
+                tox_all_ox += self.get_term('x3', '3 oxFA on all sn of TG',
+                                            lambda: tot_fa_ox * (self.comb(tot_fa_ox, 2) + tot_fa_ox))
                 if len(self.x_dct['x3']) - 1 > 0:
-                    tox_all_ox += (len(self.x_dct['x3']) - 1) * (tot_fa_opt**3 - self.f**3)  # Other Lipid with 3 FA
+                    tox_all_ox += self.get_term('x3', 'Other Lipid with 3 FA',
+                                                lambda: (len(self.x_dct['x3']) - 1) * (tot_fa_opt**3 - f**3))
                 else:
                     pass
             else:
-                tox_all_ox += len(self.x_dct['x3']) * (tot_fa_opt**3 - self.f**3)  # Other Lipid with 3 FA
-
-            if 'Cardiolipin' in self.x_dct['x3'] or 'CL' in self.x_dct['x4']:
-                tox_all_ox += (tot_fa_ox * self.f**3  # 1 oxFA on sn1/sn4 of CL
-                               + tot_fa_ox * self.f**3  # 1 oxFA on sn2/sn3 of CL
-                               # 2 oxFA on sn1 + sn4 of CL
-                               + (comb(tot_fa_ox, 2) + tot_fa_ox) * (comb(self.f, 2) + self.f)  
-                               # 2 oxFA on sn2 + sn3 of CL
-                               + (comb(tot_fa_ox, 2) + tot_fa_ox) * (comb(self.f, 2) + self.f)
-                               # 2 oxFA on sn1 + sn3 / sn2 + sn4 of CL
-                               + (tot_fa_ox * self.f * tot_fa_ox * self.f)
-                               # 2 oxFA on sn1 + sn2 / sn3 + sn4 of CL
-                               + (tot_fa_ox * tot_fa_ox * self.f * self.f)
-                               # 3 oxFA on sn1 + sn2 + sn3 / sn2 + sn3 + sn4 of CL
-                               + (tot_fa_ox * tot_fa_ox * tot_fa_ox * self.f)
-                               # 3 oxFA on sn1 + sn3 + sn4 / sn1 + sn2 + sn4 of CL
-                               + (tot_fa_ox * self.f * tot_fa_ox * tot_fa_ox)
-                               # 4 oxFA on all sn of CL
-                               + ((comb(tot_fa_ox, 2) + tot_fa_ox)
-                                  * (comb(tot_fa_ox, 2) + tot_fa_ox) - tot_fa_ox)
-                               )
+                tox_all_ox += self.get_term('x3', 'Other Lipid with 3 FA',
+                                            lambda: len(self.x_dct['x3']) * (tot_fa_opt**3 - f**3))
+
+            if self.has_cardiolipin():
+                tox_all_ox += self.get_term('x4', '1 oxFA on sn1/sn4 of CL', lambda: tot_fa_ox * f**3)
+                tox_all_ox += self.get_term('x4', '1 oxFA on sn2/sn3 of CL', lambda: tot_fa_ox * f**3)
+                if self.published is True:
+                    tox_all_ox += self.get_term('x4', '2 oxFA on sn1 + sn4 of CL', lambda: (
+                        self.comb(tot_fa_ox, 2) + tot_fa_ox) * (self.comb(f, 2) + f))
+                    tox_all_ox += self.get_term('x4', '2 oxFA on sn2 + sn3 of CL', lambda: (
+                        self.comb(tot_fa_ox, 2) + tot_fa_ox) * (self.comb(f, 2) + f))
+                else:
+                    # the mirror swaps sn1 <-> sn4 and sn2 <-> sn3 together
+                    tox_all_ox += self.get_term('x4', '2 oxFA on sn1 + sn4 of CL',
+                                                lambda: (tot_fa_ox**2 * f**2 + tot_fa_ox * f) // 2)
+                    tox_all_ox += self.get_term('x4', '2 oxFA on sn2 + sn3 of CL',
+                                                lambda: (tot_fa_ox**2 * f**2 + tot_fa_ox * f) // 2)
+                tox_all_ox += self.get_term('x4', '2 oxFA on sn1 + sn3 / sn2 + sn4 of CL',
+                                            lambda: tot_fa_ox * f * tot_fa_ox * f)
+                tox_all_ox += self.get_term('x4', '2 oxFA on sn1 + sn2 / sn3 + sn4 of CL',
+                                            lambda: tot_fa_ox * tot_fa_ox * f * f)
+                tox_all_ox += self.get_term('x4', '3 oxFA on sn1 + sn2 + sn3 / sn2 + sn3 + sn4 of CL',
+                                            lambda: tot_fa_ox * tot_fa_ox * tot_fa_ox * f)
+                tox_all_ox += self.get_term('x4', '3 oxFA on sn1 + sn3 + sn4 / sn1 + sn2 + sn4 of CL',
+                                            lambda: tot_fa_ox * f * tot_fa_ox * tot_fa_ox)
+                if self.published is True:
+                    tox_all_ox += self.get_term('x4', '4 oxFA on all sn of CL', lambda: (
+                        (self.comb(tot_fa_ox, 2) + tot_fa_ox) * (self.comb(tot_fa_ox, 2) + tot_fa_ox) - tot_fa_ox))
+                else:
+                    tox_all_ox += self.get_term('x4', '4 oxFA on all sn of CL',
+                                                lambda: (tot_fa_ox**4 + tot_fa_ox**2) // 2)
                 if len(self.x_dct['x4']) - 1 > 0:
-                    tox_all_ox += (len(self.x_dct['x4']) - 1) * (tot_fa_opt**4 - self.f**4)  # Other Lipid with 4 FA
+                    tox_all_ox += self.get_term('x4', 'Other Lipid with 4 FA',
+                                                lambda: (len(self.x_dct['x4']) - 1) * (tot_fa_opt**4 - f**4))
                 else:
                     pass
             else:
-                tox_all_ox += len(self.x_dct['x4']) * (tot_fa_opt**4 - self.f**4)  # Other Lipid with 4 FA
+                tox_all_ox += self.get_term('x4', 'Other Lipid with 4 FA',
+                                            lambda: len(self.x_dct['x4']) * (tot_fa_opt**4 - f**4))
 
-        return int(tox_all_ox)  # T[all]_ox
+        return to_int(tox_all_ox)  # T[all]_ox
 
 
 if __name__ == '__main__':
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from fa_list_loader import fa_columns, load_fa_list
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+manifest_name = 'manifest.json'
+chunk_format_lst = ['txt.gz', 'parquet']
+
+_worker_species = None  # TheoOxLipidomeSpecies of each worker process, loaded once by _init_worker
+
+
+def get_shard_count(total, shard_size):
+    """
+    Get the number of shards of an export, shard i has the species with index i * shard_size .. (i + 1) * shard_size - 1
+
+    :param total: number of species of the lipidome
+    :type total: int
+    :param shard_size: max number of species per shard
+    :type shard_size: int
+    :return: number of shards
+    :rtype: int
+    """
+    return -(-int(total) // int(shard_size))
+
+
+def get_shard_range(shard_idx, total, shard_size):
+    """
+    Get the species index range of a shard, see get_shard_count
+
+    :param shard_idx: position of the shard, 0 .. get_shard_count() - 1
+    :type shard_idx: int
+    :param total: number of species of the lipidome
+    :type total: int
+    :param shard_size: max number of species per shard
+    :type shard_size: int
+    :return: start and stop index of the shard
+    :rtype: tuple
+    """
+    start = int(shard_idx) * int(shard_size)
+    return start, min(start + int(shard_size), int(total))
+
+
+def get_chunk_name(shard_idx, chunk_format):
+    """
+    Get the file name of the chunk of a shard
+
+    :param shard_idx: position of the shard
+    :type shard_idx: int
+    :param chunk_format: 'txt.gz' or 'parquet'
+    :type chunk_format: str
+    :return: file name
+    :rtype: str
+    """
+    return 'shard_%06i.%s' % (int(shard_idx), chunk_format)
+
+
+def export_species(fa_lst_path, x_dct, mod_dct, output_dir, site='bis-allylic', site_specific=False,
+                   lipidome='alloxfa', shard_size=1000000, n_workers=None, chunk_format='txt.gz', published=True,
+                   verbose=True):
+    """
+    Write all species of the lipidome into compressed chunk files, one file per shard, using several processes.
+    Shard i has the species with index i * shard_size .. (i + 1) * shard_size - 1 of iter_species.
+    The manifest.json in output_dir lists the settings and the shards done, a run on the same output_dir
+    with the same settings skips the shards already written and resumes the interrupted export.
+    Chunk files are written under a temporary name first, so existing chunk files are always complete.
+
+    :param fa_lst_path: FA list supported by load_fa_list, use a file path or records to keep the workers light
+    :type fa_lst_path: str | pandas.DataFrame | list
+    :param x_dct: lists of lipid classes that have n FA residues
+    :type x_dct: dict
+    :param mod_dct: lists of the modification types
+    :type mod_dct: dict
+    :param output_dir: folder for the manifest and chunk files, created if needed
+    :type output_dir: str
+    :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+    :type site: str
+    :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+    :type site_specific: bool
+    :param lipidome: 'alloxfa', '1oxfa' or 'unox', see TheoOxLipidomeSpecies.get_blocks
+    :type lipidome: str
+    :param shard_size: max number of species per chunk file
+    :type shard_size: int
+    :param n_workers: number of processes, None for the number of CPU, 1 to run in this process
+    :type n_workers: int
+    :param chunk_format: 'txt.gz' (one species per line) or 'parquet' (column species, requires pyarrow)
+    :type chunk_format: str
+    :param published: set to False to export the species of the corrected equations, see TheoOxLipidomeSpecies
+    :type published: bool
+    :param verbose: set to False to hide the progress
+    :type verbose: bool
+    :return: the manifest
+    :rtype: dict
+    """
+    if chunk_format not in chunk_format_lst:
+        raise ValueError('chunk_format must be one of %s, got: %s' % (', '.join(chunk_format_lst), chunk_format))
+
+    species_generator = TheoOxLipidomeSpecies(fa_lst_path, x_dct, mod_dct, published=published)
+    total = species_generator.get_count(site=site, site_specific=site_specific, lipidome=lipidome)
+    settings = {'fa_list': get_fa_list_hash(fa_lst_path),
+                'lipid_classes': x_dct, 'modifications': mod_dct,
+                'site': site, 'site_specific': site_specific, 'lipidome': lipidome, 'published': published,
+                'shard_size': int(shard_size), 'chunk_format': chunk_format, 'total': total}
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    manifest_path = os.path.join(output_dir, manifest_name)
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, 'r') as manifest_obj:
+            manifest = json.load(manifest_obj)
+        if manifest['settings'] != json.loads(json.dumps(settings)):
+            raise ValueError('%s was written with other settings, use a new output_dir' % manifest_path)
+    else:
+        manifest = {'settings': settings, 'n_shards': get_shard_count(total, shard_size), 'done': []}
+    # a chunk file only exists once it is complete, the manifest may be behind after an interruption
+    manifest['done'] = _find_done_shards(output_dir, manifest['n_shards'], chunk_format)
+    _write_manifest(manifest_path, manifest)
+
+    n_todo = manifest['n_shards'] - len(manifest['done'])
+    if verbose is True:
+        print('Export %i species in %i shards, %i shards to do' % (total, manifest['n_shards'], n_todo))
+
+    done_set = set(manifest['done'])
+    task_iter = ((shard_idx, output_dir, site, site_specific, lipidome, chunk_format, shard_size, total)
+                 for shard_idx in range(manifest['n_shards']) if shard_idx not in done_set)
+    n_done = 0
+    last_save = time.time()
+    if n_workers == 1:
+        global _worker_species
+        _worker_species = species_generator
+        for task in task_iter:
+            manifest['done'].append(_export_shard(task))
+            n_done += 1
+            last_save = _save_progress(manifest_path, manifest, n_done, n_todo, last_save, verbose)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(fa_lst_path, x_dct, mod_dct, published)) as executor:
+            # keep a limited number of shards in the queue, the lipidome can have millions of shards
+            max_pending = 4 * (n_workers or os.cpu_count() or 1)
+            pending_set = set()
+            while True:
+                for task in task_iter:
+                    pending_set.add(executor.submit(_export_shard, task))
+                    if len(pending_set) >= max_pending:
+                        break
+                if not pending_set:
+                    break
+                finished_set, pending_set = wait(pending_set, return_when=FIRST_COMPLETED)
+                for future in finished_set:
+                    manifest['done'].append(future.result())
+                    n_done += 1
+                last_save = _save_progress(manifest_path, manifest, n_done, n_todo, last_save, verbose)
+
+    _write_manifest(manifest_path, manifest)
+    return manifest
+
+
+def read_species(output_dir):
+    """
+    Generate the species of an export in index order, shard by shard
+
+    :param output_dir: folder of export_species
+    :type output_dir: str
+    :return: generator of species names
+    :rtype: generator
+    """
+    with open(os.path.join(output_dir, manifest_name), 'r') as manifest_obj:
+        manifest = json.load(manifest_obj)
+    for shard_idx in range(manifest['n_shards']):
+        chunk_path = os.path.join(output_dir, get_chunk_name(shard_idx, manifest['settings']['chunk_format']))
+        if not os.path.isfile(chunk_path):
+            raise IOError('export not complete, missing: %s' % chunk_path)
+        if chunk_path.endswith('.parquet'):
+            import pandas as pd
+            for species in pd.read_parquet(chunk_path)['species'].tolist():
+                yield species
+        else:
+            with gzip.open(chunk_path, 'rt') as chunk_obj:
+                for line in chunk_obj:
+                    yield line.rstrip('\n')
+
+
+def get_fa_list_hash(fa_lst):
+    """
+    Get the hash of the records of a FA list, so a FA list file that was changed since the last run is told apart
+
+    :param fa_lst: FA list supported by load_fa_list
+    :type fa_lst: str | pandas.DataFrame | list
+    :return: 'sha1:' and the hex digest of the FA, Elem, C and DB columns
+    :rtype: str
+    """
+    fa_df = load_fa_list(fa_lst)
+    record_lst = fa_df[fa_columns].values.tolist()
+    return 'sha1:%s' % hashlib.sha1(json.dumps(record_lst, default=str).encode('utf-8')).hexdigest()
+
+
+def _find_done_shards(output_dir, n_shards, chunk_format):
+    # list the shards with a chunk file and delete the temporary files of interrupted runs
+
+    chunk_rgx = re.compile(r'^shard_(\d+)\.%s$' % re.escape(chunk_format))
+    done_lst = []
+    for file_name in os.listdir(output_dir):
+        if file_name.startswith('shard_') and file_name.endswith('.tmp'):
+            os.remove(os.path.join(output_dir, file_name))
+            continue
+        chunk_match = chunk_rgx.match(file_name)
+        if chunk_match and int(chunk_match.group(1)) < n_shards:
+            done_lst.append(int(chunk_match.group(1)))
+
+    return sorted(done_lst)
+
+
+def _init_worker(fa_lst_path, x_dct, mod_dct, published):
+
+    global _worker_species
+    _worker_species = TheoOxLipidomeSpecies(fa_lst_path, x_dct, mod_dct, published=published)
+
+
+def _export_shard(task):
+    # write the species of one shard, return the shard index
+
+    shard_idx, output_dir, site, site_specific, lipidome, chunk_format, shard_size, total = task
+    start, stop = get_shard_range(shard_idx, total, shard_size)
+    chunk_path = os.path.join(output_dir, get_chunk_name(shard_idx, chunk_format))
+    tmp_path = chunk_path + '.tmp'
+    species_iter = _worker_species.iter_species(site=site, site_specific=site_specific, lipidome=lipidome,
+                                                start=start, stop=stop)
+    if chunk_format == 'parquet':
+        import pandas as pd
+        pd.DataFrame({'species': list(species_iter)}).to_parquet(tmp_path, compression='gzip', index=False)
+    else:
+        with gzip.open(tmp_path, 'wt', compresslevel=6) as chunk_obj:
+            for species in species_iter:
+                chunk_obj.write(species + '\n')
+    os.replace(tmp_path, chunk_path)
+
+    return shard_idx
+
+
+def _save_progress(manifest_path, manifest, n_done, n_todo, last_save, verbose):
+    # write the manifest at most every 10 s
+
+    if time.time() - last_save < 10 and n_done < n_todo:
+        return last_save
+    _write_manifest(manifest_path, manifest)
+    if verbose is True:
+        print('%i / %i shards done' % (n_done, n_todo))
+    return time.time()
+
+
+def _write_manifest(manifest_path, manifest):
+
+    manifest['done'].sort()
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as manifest_obj:
+        json.dump(manifest, manifest_obj)
+    os.replace(tmp_path, manifest_path)
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Modification sites and allowed modifications of each FA from optional columns of the FA list.
+
+Optional columns, empty cells use the default of TheoOxLipidome:
+    Sites: number of modification sites m for all site modes, default DB + m_shift of the site mode
+    Sites_bis-allylic, Sites_db, Sites_allylic: number of modification sites m of one site mode, before Sites
+    Cyclic_sites: number of sites for prostane and other cyclic products, default DB - 2 for DB >= 3, else 0
+    Mod_ocp, Mod_oap, Mod_p, Mod_o: allowed modifications of this FA, comma separated names
+        from the lists of mod_dct, '-' for none, default all modifications of the type
+
+All FA with DB > 0 are modified, as in TheoOxLipidome.
+"""
+
+import hashlib
+
+import numpy as np
+
+from fa_list_loader import load_fa_list
+from lipidome_utils import cached_result, comb_arrays, sum_powers_arrays
+from oxlipidome_estimation import TheoOxLipidome
+
+site_column_dct = {'bis-allylic': 'Sites_bis-allylic', 'db': 'Sites_db', 'allylic': 'Sites_allylic'}
+mod_column_dct = {'m_ocp': 'Mod_ocp', 'm_oap': 'Mod_oap', 'm_p': 'Mod_p', 'm_o': 'Mod_o'}
+
+
+class FASiteOxLipidome(TheoOxLipidome):
+
+    """
+    TheoOxLipidome with the number of modification sites and the allowed modifications set for each FA.
+    The number of oxFA of all FA is calculated in one pass of numpy array operations over the FA list,
+    the equations of the lipid classes are the ones of TheoOxLipidome.
+    """
+
+    def __init__(self, fa_lst_path, x_dct, mod_dct, exact=False, verbose=True, published=True):
+        """
+        Load the FA list with all columns, see TheoOxLipidome for the other settings.
+
+        :param fa_lst_path: FA list supported by load_fa_list, with the optional columns of this module
+        :type fa_lst_path: str | pandas.DataFrame | list
+        :param x_dct: lists of lipid classes that have n FA residues
+        :type x_dct: dict
+        :param mod_dct: lists of the modification types
+        :type mod_dct: dict
+        :param exact: set to False to use float numbers. set to True to use exact arbitrary-precision integers
+        :type exact: bool
+        :param verbose: set to False to skip printing the FA list and loading status
+        :type verbose: bool
+        :param published: set to True to use the equations of the publication, see TheoOxLipidome
+        :type published: bool
+        """
+        self.fa_df = load_fa_list(fa_lst_path, verbose=verbose)
+        TheoOxLipidome.__init__(self, self.fa_df, x_dct, mod_dct, exact=exact, verbose=False, published=published)
+        self.db_arr = self.fa_df['DB'].values.astype(np.int64)
+        self.fa_site_key = self._get_fa_site_key()
+        if verbose is True:
+            print('All settings loaded...')
+
+    def get_fingerprint(self):
+        """
+        Get all settings the results depend on as hashable key for the result_cache,
+        including the site and modification columns of the FA list.
+
+        :return: FA list, lipid classes and modification types
+        :rtype: tuple
+        """
+        return TheoOxLipidome.get_fingerprint(self) + (self.fa_site_key,)
+
+    def get_site_arr(self, site='bis-allylic'):
+        """
+        Get the number of modification sites m of each FA
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :return: m of each row of the FA list, >= 0
+        :rtype: numpy.ndarray
+        """
+        m_shift = self.get_m_shift(site)
+        m_arr = self.db_arr + m_shift
+        site_key = {-1: 'bis-allylic', 0: 'db', 1: 'allylic'}[m_shift]
+        for col in ['Sites', site_column_dct[site_key]]:
+            if col in self.fa_df.columns:
+                col_arr = self.fa_df[col].values.astype(float)
+                m_arr = np.where(np.isnan(col_arr), m_arr, np.nan_to_num(col_arr)).astype(np.int64)
+        return np.maximum(m_arr, 0)
+
+    def get_cyclic_site_arr(self):
+        """
+        Get the number of sites for prostane and other cyclic products of each FA
+
+        :return: number of sites of each row of the FA list
+        :rtype: numpy.ndarray
+        """
+        site_arr = np.where(self.db_arr >= 3, self.db_arr - 2, 0)
+        if 'Cyclic_sites' in self.fa_df.columns:
+            col_arr = self.fa_df['Cyclic_sites'].values.astype(float)
+            site_arr = np.where(np.isnan(col_arr), site_arr, np.nan_to_num(col_arr)).astype(np.int64)
+        return np.maximum(site_arr, 0)
+
+    def get_mod_count_arr(self, mod_type):
+        """
+        Get the number of allowed modifications of one type of each FA
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :return: number of modifications of each row of the FA list
+        :rtype: numpy.ndarray
+        """
+        mod_lst = self.m_dct[mod_type]
+        col = mod_column_dct[mod_type]
+        if col not in self.fa_df.columns:
+            return np.full(self.db_arr.shape, len(mod_lst), dtype=np.int64)
+
+        count_dct = {}
+        count_lst = []
+        for cell in self.fa_df[col].tolist():
+            if cell not in count_dct:
+                count_dct[cell] = _count_mods(cell, mod_lst)
+            count_lst.append(count_dct[cell])
+        return np.array(count_lst, dtype=np.int64)
+
+    def get_fa_ox_arr(self, site='bis-allylic', site_specific=False):
+        """
+        Calculate Number of oxFA of each FA: OAP, OCP, Prostane and other cyclic products
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: number of oxFA of each row of the FA list, 0 for FA without C=C bond.
+            dtype object (python int) if exact, else float
+        :rtype: numpy.ndarray
+        """
+        dtype = object if self.exact is True else float
+        site_arr = self.get_site_arr(site)
+        m_arr = site_arr.astype(dtype)
+        fa_ox_arr = np.zeros(self.db_arr.shape, dtype=dtype)
+        # precalculated tables in exact mode, None if a value is outside the tables
+        count_tables = self.get_count_tables()
+
+        # OAP, see get_oap
+        r_max_arr = np.maximum(m_arr - 2, 0)
+        if 'm_oap' in self.m_dct:
+            n_oap_int_arr = self.get_mod_count_arr('m_oap')
+            if site_specific is True and self.published is False:
+                n_oap_int_arr = n_oap_int_arr + 1  # options per site, see get_site_option_count
+            n_oap_arr = n_oap_int_arr.astype(dtype)
+            oap_arr = segment_arr = None
+            if count_tables is not None:
+                oap_arr = count_tables.get_arr('oap', n_oap_int_arr, site_arr, site_specific)
+                segment_arr = count_tables.get_arr('ocp', n_oap_int_arr, site_arr, site_specific)
+            if oap_arr is not None and segment_arr is not None:
+                # the table counts the unmodified FA, there is none without OAP
+                fa_ox_arr = fa_ox_arr + np.where(n_oap_int_arr > 0, oap_arr - 1, 0)
+            elif site_specific is False:
+                fa_ox_arr = fa_ox_arr + comb_arrays(n_oap_arr + m_arr, m_arr) - 1
+                segment_arr = comb_arrays(n_oap_arr + r_max_arr + 1, r_max_arr)
+            else:
+                fa_ox_arr = fa_ox_arr + np.where(n_oap_int_arr > 0, n_oap_arr ** m_arr - 1, 0)
+                segment_arr = sum_powers_arrays(n_oap_arr, r_max_arr)
+        else:
+            segment_arr = r_max_arr + 1
+
+        # OCP, see get_ocp
+        fa_ox_arr = fa_ox_arr + self.get_mod_count_arr('m_ocp').astype(dtype) * segment_arr
+
+        # Prostane and other cyclic products, see get_cyclic
+        if 'm_p' in self.m_dct and 'm_o' in self.m_dct:
+            n_cyclic_int_arr = self.get_mod_count_arr('m_p') + self.get_mod_count_arr('m_o')
+            cyclic_site_int_arr = self.get_cyclic_site_arr()
+            cyclic_arr = None
+            if count_tables is not None:
+                # the table is indexed by n_db = cyclic sites + 2
+                cyclic_arr = count_tables.get_arr('cyclic', n_cyclic_int_arr, cyclic_site_int_arr + 2, site_specific)
+            if cyclic_arr is not None:
+                fa_ox_arr = fa_ox_arr + cyclic_arr
+            else:
+                n_cyclic_arr = n_cyclic_int_arr.astype(dtype)
+                cyclic_site_arr = cyclic_site_int_arr.astype(dtype)
+                if site_specific is False:
+                    fa_ox_arr = fa_ox_arr + np.where(cyclic_site_arr > 0, n_cyclic_arr, 0)
+                else:
+                    fa_ox_arr = fa_ox_arr + cyclic_site_arr * n_cyclic_arr
+
+        return np.where(self.db_arr > 0, fa_ox_arr, 0).astype(dtype)
+
+    @cached_result
+    def get_all_oxfa(self, site='bis-allylic', site_specific=False):
+        """
+        Calculate Number of oxFA F_ox as sum of get_fa_ox_arr
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: Number of oxFA F_ox
+        :rtype: int
+        """
+        fa_ox_arr = self.get_fa_ox_arr(site=site, site_specific=site_specific)
+        return self.get_term('oxFA', 'oxFA of all FA', lambda: int(fa_ox_arr.sum()) if fa_ox_arr.size else 0)
+
+    def get_fa_ox_df(self, site='bis-allylic', site_specific=False):
+        """
+        Table of the sites, allowed modifications and number of oxFA of each FA
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: columns FA, DB, sites, cyclic_sites, the modification types in m_dct and oxfa
+        :rtype: pandas.DataFrame
+        """
+        import pandas as pd
+
+        fa_ox_df = pd.DataFrame({'FA': self.fa_df['FA'].values, 'DB': self.db_arr,
+                                 'sites': self.get_site_arr(site), 'cyclic_sites': self.get_cyclic_site_arr()})
+        for mod_type in ['m_ocp', 'm_oap', 'm_p', 'm_o']:
+            if mod_type in self.m_dct:
+                fa_ox_df[mod_type] = self.get_mod_count_arr(mod_type)
+        fa_ox_df['oxfa'] = pd.Series(list(self.get_fa_ox_arr(site=site, site_specific=site_specific)),
+                                     dtype=object if self.exact is True else float)
+        return fa_ox_df
+
+    def _get_fa_site_key(self):
+        # hash of the DB and the optional columns of the FA list
+
+        fa_hash = hashlib.sha1(self.db_arr.tobytes())
+        col_lst = ['Sites', 'Cyclic_sites'] + list(site_column_dct.values()) + list(mod_column_dct.values())
+        for col in col_lst:
+            if col in self.fa_df.columns:
+                fa_hash.update(('%s:%r' % (col, self.fa_df[col].tolist())).encode())
+        return fa_hash.hexdigest()
+
+
+def _count_mods(cell, mod_lst):
+    # number of the modifications in mod_lst allowed by one cell of a Mod_ column
+
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)) or str(cell).strip() == '':
+        return len(mod_lst)
+    cell = str(cell).strip()
+    if cell == '-':
+        return 0
+    allowed_set = set(mod.strip() for mod in cell.replace(';', ',').split(','))
+    return len([mod for mod in mod_lst if mod in allowed_set])
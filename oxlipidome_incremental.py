@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+from bisect import insort
+
+from lipidome_utils import get_cache_key, to_int, update_cache_fingerprint
+from oxlipidome_estimation import TheoOxLipidome
+
+
+class IncrementalOxLipidome(TheoOxLipidome):
+
+    """
+    TheoOxLipidome that is changed one FA, modification type or lipid class at a time.
+    The number of oxFA of one FA of each C=C class and the sum F_ox are kept for the tracked site modes,
+    adding or removing a FA only updates its own C=C class, the totals of all lipid classes follow from F_ox and F.
+    """
+
+    def __init__(self, fa_lst_path, x_dct, mod_dct, exact=True, verbose=True,
+                 site_lst=('bis-allylic', 'db', 'allylic'), site_specific_lst=(False, True), published=True):
+        """
+        Load the settings like TheoOxLipidome, x_dct and mod_dct are copied and not changed in place.
+
+        :param fa_lst_path: FA list supported by load_fa_list
+        :type fa_lst_path: str | pandas.DataFrame | list
+        :param x_dct: lists of lipid classes that have n FA residues
+        :type x_dct: dict
+        :param mod_dct: lists of the modification types
+        :type mod_dct: dict
+        :param exact: set to False to use float binomial coefficients from scipy
+        :type exact: bool
+        :param verbose: set to False to skip printing the FA list and loading status
+        :type verbose: bool
+        :param site_lst: site modes to keep up to date
+        :type site_lst: list
+        :param site_specific_lst: site_specific settings to keep up to date
+        :type site_specific_lst: list
+        :param published: set to True to use the equations of the publication, False for the corrected equations
+        :type published: bool
+        """
+        TheoOxLipidome.__init__(self, fa_lst_path, dict((x, list(x_dct[x])) for x in x_dct),
+                                dict((mod_type, list(mod_dct[mod_type])) for mod_type in mod_dct),
+                                exact=exact, verbose=verbose, published=published)
+        self.tracked_lst = [(site, site_specific) for site in site_lst for site_specific in site_specific_lst]
+        self.fa_ox_dct = {}  # (site, site_specific): {n_db: number of oxFA of one FA with n_db C=C}
+        self.tot_fa_ox_dct = {}  # (site, site_specific): F_ox
+        self._reset_oxfa_sums()
+        self.totals = self.get_totals()
+
+    def get_totals(self):
+        """
+        Get the number of oxFA, oxLipids with max 1 oxFA and with all oxFA of all tracked site modes
+
+        :return: one dict per site mode and site_specific setting
+        :rtype: list
+        """
+        total_lst = []
+        for site, site_specific in self.tracked_lst:
+            total_lst.append({'site': site, 'site_specific': site_specific,
+                              'oxfa': self.get_all_oxfa(site=site, site_specific=site_specific),
+                              'oxlipid_1oxfa': self.get_all_class_1oxfa(site=site, site_specific=site_specific),
+                              'oxlipid_alloxfa': self.get_all_class_alloxfa(site=site, site_specific=site_specific)})
+        return total_lst
+
+    def add_fa(self, fa, n=1):
+        """
+        Add FA to the FA list, only the C=C class of the FA is calculated
+
+        :param fa: number of C=C bond, FA name like FA20:4, record (FA, Elem, C, DB) or dict with DB
+        :type fa: int | str | list | dict
+        :param n: number of FA to add
+        :type n: int
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        return self._update_fa(_get_n_db(fa), int(n))
+
+    def remove_fa(self, fa, n=1):
+        """
+        Remove FA from the FA list, only the C=C class of the FA is calculated
+
+        :param fa: number of C=C bond, FA name like FA20:4, record (FA, Elem, C, DB) or dict with DB
+        :type fa: int | str | list | dict
+        :param n: number of FA to remove
+        :type n: int
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        n_db = _get_n_db(fa)
+        if (self.fa_dct.get(n_db, 0) if n_db > 0 else self.f - sum(self.fa_dct.values())) < n:
+            raise ValueError('less than %i FA with %i C=C bond in the FA list' % (n, n_db))
+        return self._update_fa(n_db, -int(n))
+
+    def add_modification(self, mod_type, mod):
+        """
+        Add one modification, the number of oxFA of all C=C classes is calculated again
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :param mod: name of the modification
+        :type mod: str
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        m_dct = dict(self.m_dct)
+        m_dct[mod_type] = list(m_dct.get(mod_type, [])) + [mod]
+        self.m_dct = m_dct
+        self._reset_oxfa_sums()
+        return self._get_changes()
+
+    def remove_modification(self, mod_type, mod):
+        """
+        Remove one modification, the number of oxFA of all C=C classes is calculated again
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :param mod: name of the modification
+        :type mod: str
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        m_dct = dict(self.m_dct)
+        if mod not in m_dct.get(mod_type, []):
+            raise ValueError('%s not in %s' % (mod, mod_type))
+        m_dct[mod_type] = [_mod for _mod in m_dct[mod_type] if _mod != mod]
+        self.m_dct = m_dct
+        self._reset_oxfa_sums()
+        return self._get_changes()
+
+    def add_class(self, x, lipid_class):
+        """
+        Add one lipid class, the number of oxFA is not changed
+
+        :param x: number of FA of the lipid class as 'x1' .. 'x4'
+        :type x: str
+        :param lipid_class: name of the lipid class, e.g. PC, Triacylglycerol, Cardiolipin
+        :type lipid_class: str
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        x_dct = dict(self.x_dct)
+        x_dct[x] = list(x_dct.get(x, [])) + [lipid_class]
+        self.x_dct = x_dct
+        self._store_oxfa_sums()
+        return self._get_changes()
+
+    def remove_class(self, x, lipid_class):
+        """
+        Remove one lipid class, the number of oxFA is not changed
+
+        :param x: number of FA of the lipid class as 'x1' .. 'x4'
+        :type x: str
+        :param lipid_class: name of the lipid class
+        :type lipid_class: str
+        :return: new totals and the change to the totals before, see get_totals
+        :rtype: list
+        """
+        x_dct = dict(self.x_dct)
+        if lipid_class not in x_dct.get(x, []):
+            raise ValueError('%s not in %s' % (lipid_class, x))
+        x_lst = list(x_dct[x])
+        x_lst.remove(lipid_class)
+        x_dct[x] = x_lst
+        self.x_dct = x_dct
+        self._store_oxfa_sums()
+        return self._get_changes()
+
+    def get_fa_ox(self, n_db, site='bis-allylic', site_specific=False):
+        """
+        Calculate Number of oxFA of one FA with n_db C=C bond, kept until the modifications change
+
+        :param n_db: number of C=C bond
+        :type n_db: int
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: Number of oxFA of one FA
+        :rtype: int
+        """
+        fa_ox_dct = self.fa_ox_dct.setdefault((site, site_specific), {})
+        if n_db not in fa_ox_dct:
+            m = n_db + self.get_m_shift(site)
+            fa_ox_dct[n_db] = to_int(self.get_oap(m, site_specific=site_specific)
+                                     + self.get_ocp(m, site_specific=site_specific)
+                                     + self.get_cyclic(n_db, site_specific=site_specific))
+        return fa_ox_dct[n_db]
+
+    def _update_fa(self, n_db, n):
+
+        self.f += n
+        self.clear_result_cache()  # fa_dct is changed in place
+        if n_db > 0:
+            if n_db not in self.fa_dct:
+                self.fa_dct[n_db] = 0
+                insort(self.n_lst, n_db)
+            self.fa_dct[n_db] += n
+            if self.fa_dct[n_db] == 0:
+                del self.fa_dct[n_db]
+                self.n_lst.remove(n_db)
+            for site, site_specific in self.tracked_lst:
+                fa_ox = self.get_fa_ox(n_db, site=site, site_specific=site_specific)
+                self.tot_fa_ox_dct[(site, site_specific)] += n * fa_ox
+        self._store_oxfa_sums()
+        return self._get_changes()
+
+    def _reset_oxfa_sums(self):
+        # calculate F_ox of all C=C classes, after a change of the modifications
+
+        self.fa_ox_dct = {}
+        for site, site_specific in self.tracked_lst:
+            self.tot_fa_ox_dct[(site, site_specific)] = sum(
+                self.fa_dct[n_db] * self.get_fa_ox(n_db, site=site, site_specific=site_specific)
+                for n_db in self.n_lst)
+        self._store_oxfa_sums()
+
+    def _store_oxfa_sums(self):
+        # drop the results of the settings before and store F_ox as result of get_all_oxfa
+
+        update_cache_fingerprint(self)
+        for site, site_specific in self.tracked_lst:
+            key = get_cache_key(self, 'get_all_oxfa', kwargs={'site': site, 'site_specific': site_specific})
+            self.result_cache[key] = to_int(self.tot_fa_ox_dct[(site, site_specific)])
+
+    def _get_changes(self):
+
+        total_lst = self.get_totals()
+        for total, last_total in zip(total_lst, self.totals):
+            for count_key in ['oxfa', 'oxlipid_1oxfa', 'oxlipid_alloxfa']:
+                total['delta_' + count_key] = total[count_key] - last_total[count_key]
+        self.totals = [dict((key, total[key]) for key in total if not key.startswith('delta_'))
+                       for total in total_lst]
+        return total_lst
+
+
+def _get_n_db(fa):
+    # number of C=C bond from int, FA name (FA20:4 or 20:4), record (FA, Elem, C, DB) or dict
+
+    if isinstance(fa, dict):
+        return int(fa['DB'])
+    elif isinstance(fa, (list, tuple)):
+        return int(fa[3])
+    elif isinstance(fa, str):
+        return int(fa.split(':')[-1])
+    else:
+        return int(fa)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import json
+import time
+
+profile_method_lst = ['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa']
+profile_columns = ['method', 'site', 'site_specific', 'x', 'term', 'value', 'share', 'time_s']
+group_method_dct = {'oxFA': 'get_all_oxfa'}  # method of the terms that are not terms of the lipid classes
+
+
+def profile_oxlipidome(oxlipidome, site_lst=('bis-allylic', 'db', 'allylic'), site_specific_lst=(False, True),
+                       method_lst=profile_method_lst):
+    """
+    Record the value and calculation time of each named term of the equations of TheoOxLipidome.
+    The result cache is cleared before each method, so all terms are calculated again and the total time of
+    the lipid classes includes F_ox. The result cache of the estimator is restored at the end.
+    Terms are recorded with the method of their group x (the oxFA terms with get_all_oxfa) and their share of the
+    total of that method; the oxFA terms calculated by the lipid classes are only kept if get_all_oxfa
+    is not profiled itself.
+
+    :param oxlipidome: loaded TheoOxLipidome
+    :type oxlipidome: TheoOxLipidome
+    :param site_lst: modification site modes in {'bis-allylic', 'allylic', 'db'}
+    :type site_lst: list
+    :param site_specific_lst: site_specific settings to profile
+    :type site_specific_lst: list
+    :param method_lst: methods to profile, from profile_method_lst
+    :type method_lst: list
+    :return: one dict per term with the keys in profile_columns, share is the part of the total of the method
+    :rtype: list
+    """
+    result_cache = oxlipidome.result_cache
+    record_lst = []
+    try:
+        for site in site_lst:
+            for site_specific in site_specific_lst:
+                for method in method_lst:
+                    oxlipidome.result_cache = {}
+                    method_record_lst = []
+
+                    def term_recorder(x, term, value, time_s):
+                        method_record_lst.append({'method': group_method_dct.get(x, method), 'site': site,
+                                                  'site_specific': site_specific, 'x': x, 'term': term,
+                                                  'value': int(value), 'time_s': time_s})
+
+                    oxlipidome.term_recorder = term_recorder
+                    start_time = time.perf_counter()
+                    tot_count = getattr(oxlipidome, method)(site=site, site_specific=site_specific)
+                    tot_time = time.perf_counter() - start_time
+                    oxlipidome.term_recorder = None
+
+                    method_record_lst = [record for record in method_record_lst
+                                         if record['method'] == method or record['method'] not in method_lst]
+                    group_total_dct = {method: tot_count}
+                    for record in method_record_lst:
+                        if record['method'] != method:
+                            group_total_dct[record['method']] = (group_total_dct.get(record['method'], 0)
+                                                                 + record['value'])
+                    for record in method_record_lst:
+                        group_total = group_total_dct[record['method']]
+                        record['share'] = float(record['value']) / group_total if group_total else 0.0
+                    # everything outside the terms, e.g. the loop over the FA
+                    method_record_lst.append({'method': method, 'site': site, 'site_specific': site_specific,
+                                              'x': 'total', 'term': 'total', 'value': int(tot_count),
+                                              'share': 1.0, 'time_s': tot_time})
+                    record_lst.extend(method_record_lst)
+    finally:
+        oxlipidome.term_recorder = None
+        oxlipidome.result_cache = result_cache
+
+    return record_lst
+
+
+def get_profile_df(record_lst, group_by=None):
+    """
+    Convert the profile into a DataFrame, optionally summed by some of the columns
+
+    :param record_lst: profile from profile_oxlipidome
+    :type record_lst: list
+    :param group_by: columns to sum by, e.g. ['method', 'site', 'site_specific', 'x'], None to keep all terms
+    :type group_by: list
+    :return: profile, values are python int (dtype object)
+    :rtype: pandas.DataFrame
+    """
+    import pandas as pd
+
+    profile_df = pd.DataFrame(record_lst, columns=profile_columns)
+    profile_df['value'] = profile_df['value'].astype(object)
+    if group_by:
+        profile_df = profile_df[profile_df['x'] != 'total']
+        profile_df = profile_df.groupby(list(group_by), sort=False).agg(
+            {'value': lambda values: sum(values), 'share': 'sum', 'time_s': 'sum'}).reset_index()
+
+    return profile_df
+
+
+def save_profile(record_lst, output_path):
+    """
+    Save the profile as .json (list of records) or .csv / .xlsx (requires pandas)
+
+    :param record_lst: profile from profile_oxlipidome
+    :type record_lst: list
+    :param output_path: output file
+    :type output_path: str
+    """
+    if output_path.lower().endswith('.json'):
+        with open(output_path, 'w') as output_obj:
+            json.dump(record_lst, output_obj, indent=1)
+    elif output_path.lower().endswith('.xlsx'):
+        get_profile_df(record_lst).to_excel(output_path, index=False)
+    else:
+        get_profile_df(record_lst).to_csv(output_path, index=False)
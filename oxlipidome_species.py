@@ -0,0 +1,916 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import random
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import combinations, combinations_with_replacement, islice, product
+
+from fa_list_loader import load_fa_list
+from lipidome_utils import comb_exact
+from oxlipidome_estimation import TheoOxLipidome
+
+lyso_class_lst = ['LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS']
+mg_class_lst = ['Monoacylglycerol', 'MG']
+dg_class_lst = ['Diacylglycerol', 'DG']
+tg_class_lst = ['Triacylglycerol', 'TG']
+
+# One part of the lipidome: all species of one lipid class with the FA placed on fa_sn of n_sn positions.
+# slot_pattern marks each FA as unmodified 'u' or oxidized 'o'.
+# mode 'seq': all ordered combinations, 'mirror': ordered combinations without mirrored products,
+# 'multiset': combinations only (n_sn = 0, positions not defined)
+# Species of a block are numbered 0 .. block size - 1 in the order of iter_block, see rank_block and unrank_block.
+SpeciesBlock = namedtuple('SpeciesBlock', ['lipid_class', 'n_sn', 'fa_sn', 'slot_pattern', 'mode'])
+
+
+class TheoOxLipidomeSpecies(object):
+
+    """
+    Generate all oxLipid species counted by TheoOxLipidome one by one, without storing the lipidome.
+
+    The lipidome is split into SpeciesBlock parts that follow the terms of the equations in TheoOxLipidome,
+    each species is a combination of unmodified FA and oxFA on the sn positions of the block.
+    oxFA are numbered per FA in the order OAP, OCP, Prostane and other cyclic products:
+    OAP are combinations (or site specific placements) of m_oap on the m sites,
+    OCP are one m_ocp terminal that keeps r = 0 .. m - 2 sites with or without OAP.
+
+    With published=False, each site is unmodified or has one OAP in site specific mode and only the modified sites
+    are labeled, e.g. 18:2<OH@1>, (n_oap + 1) ** m - 1 OAP and (n_oap + 1) ** r segments of the OCP.
+    With published=True (default), the species follow the equations of the publication: each site has one OAP,
+    n_oap ** m - 1 OAP, the placement of m_oap[0] on all sites is the one left out,
+    and the segments of the OCP have one OAP on each of the r sites.
+    The lipid classes follow the publication as well: 1 oxFA of PL on sn2 only, 2 oxFA of DG on sn1 + sn3
+    in both orders and only CL (not Cardiolipin) with the mirrored products removed.
+    With published=False, get_count equals the estimators. With published=True, each species is still generated once,
+    so the estimators differ from get_count in the terms of the publication that do not count species (see README.md):
+    get_all_class_alloxfa removes len(x4) * comb(f + 3, 3) unmodified lipids with 4 FA too many (not site specific),
+    adds the lipids with 2 FA twice and counts CL with 2 oxFA on sn1 + sn4, 2 oxFA on sn2 + sn3 or 4 oxFA
+    as (comb(F, 2) + F) * (comb(f, 2) + f) and (comb(F, 2) + F)^2 - F, get_all_class_1oxfa counts the other
+    lipid classes with 4 FA next to CL only if x3 has more than one lipid class, TheoLipidome counts no lipid
+    classes with 3 FA without TG, and Cardiolipin in x3 adds the terms of CL, but no CL species, to all three.
+
+    All species are numbered block by block, so each species can be reached by its index (unrank),
+    the index of a species name is found by rank, and uniform random samples need no enumeration.
+    """
+
+    def __init__(self, fa_lst_path, x_dct, mod_dct, verbose=False, published=True):
+        """
+        Load the same settings as TheoOxLipidome
+
+        :param fa_lst_path: FA list supported by load_fa_list
+        :type fa_lst_path: str | pandas.DataFrame | list
+        :param x_dct: lists of lipid classes that have n FA residues
+        :type x_dct: dict
+        :param mod_dct: lists of the modification types
+        :type mod_dct: dict
+        :param verbose: set to True to print the FA list
+        :type verbose: bool
+        :param published: set to True to generate the species of the equations of the publication.
+            set to False to generate the species of the corrected equations, see README.md
+        :type published: bool
+        """
+        fa_df = load_fa_list(fa_lst_path, verbose=verbose)
+        self.fa_name_lst = [str(fa)[2:] if str(fa).startswith('FA') else str(fa) for fa in fa_df['FA'].tolist()]
+        self.fa_db_lst = [int(n_db) for n_db in fa_df['DB'].tolist()]
+        self.f = len(self.fa_name_lst)
+        self.x_dct = x_dct
+        self.m_dct = mod_dct
+        self.published = published
+        self.oxlipidome = TheoOxLipidome(fa_df, x_dct, mod_dct, exact=True, verbose=False, published=published)
+        self.oxfa_label_dct = {}
+        self.oxfa_index_dct = {}
+        self.block_index_dct = {}
+
+    def get_oxfa_label_lst(self, site='bis-allylic', site_specific=False):
+        """
+        Get the labels of all oxFA, e.g. 20:4<OH,OOH>. The list has F_ox entries and is kept for later calls.
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: labels of all oxFA
+        :rtype: list
+        """
+        key = (site, site_specific)
+        if key not in self.oxfa_label_dct:
+            self.oxfa_label_dct[key] = list(self.iter_oxfa(site=site, site_specific=site_specific))
+
+        return self.oxfa_label_dct[key]
+
+    def iter_oxfa(self, site='bis-allylic', site_specific=False):
+        """
+        Generate the labels of all oxFA in the order used for the species
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: generator of oxFA labels
+        :rtype: generator
+        """
+        m_shift = self.oxlipidome.get_m_shift(site)
+        for fa_name, n_db in zip(self.fa_name_lst, self.fa_db_lst):
+            if n_db > 0:
+                for mod_lst in self.iter_fa_mod(n_db, n_db + m_shift, site_specific=site_specific):
+                    yield '%s<%s>' % (fa_name, ','.join(mod_lst))
+
+    def iter_fa_mod(self, n_db, m, site_specific=False):
+        """
+        Generate the modifications of one FA as lists of labels: OAP, OCP, Prostane and other cyclic products
+
+        :param n_db: number of C=C bond
+        :type n_db: int
+        :param m: number of modification sites
+        :type m: int
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: generator of lists of modification labels
+        :rtype: generator
+        """
+        oap_lst = self.m_dct.get('m_oap', [])
+
+        # OAP
+        if site_specific is False:
+            for n_mod in range(1, m + 1):
+                for mod_idx_tuple in combinations_with_replacement(range(len(oap_lst)), n_mod):
+                    yield _get_mod_count_labels(oap_lst, mod_idx_tuple)
+        elif self.published is True:
+            oap_iter = product(range(len(oap_lst)), repeat=m)
+            next(oap_iter, None)  # n_oap ** m - 1
+            for mod_idx_tuple in oap_iter:
+                yield ['%s@%i' % (oap_lst[i], site + 1) for site, i in enumerate(mod_idx_tuple)]
+        else:
+            # index 0 is the unmodified site, (n_oap + 1) ** m - 1 without the unmodified FA
+            oap_iter = product(range(len(oap_lst) + 1), repeat=m)
+            next(oap_iter, None)
+            for mod_idx_tuple in oap_iter:
+                yield _get_site_labels(oap_lst, mod_idx_tuple)
+
+        # OCP, terminal and the segment with r sites left, unmodified or with OAP
+        for r in range(max(m - 2, 0) + 1):
+            for ocp in self.m_dct['m_ocp']:
+                if site_specific is False:
+                    # index 0 is the unmodified site
+                    for seg_idx_tuple in combinations_with_replacement(range(len(oap_lst) + 1), r):
+                        yield (['%s@%i' % (ocp, r)]
+                               + _get_mod_count_labels(oap_lst, [i - 1 for i in seg_idx_tuple if i > 0]))
+                elif self.published is True:
+                    for seg_idx_tuple in product(range(len(oap_lst)), repeat=r):
+                        yield (['%s@%i' % (ocp, r)]
+                               + ['%s@%i' % (oap_lst[i], site + 1) for site, i in enumerate(seg_idx_tuple)])
+                else:
+                    for seg_idx_tuple in product(range(len(oap_lst) + 1), repeat=r):
+                        yield ['%s@%i' % (ocp, r)] + _get_site_labels(oap_lst, seg_idx_tuple)
+
+        # Prostane and other cyclic products
+        if n_db >= 3 and 'm_p' in self.m_dct and 'm_o' in self.m_dct:
+            cyclic_lst = list(self.m_dct['m_p']) + list(self.m_dct['m_o'])
+            if site_specific is False:
+                for cyclic in cyclic_lst:
+                    yield [cyclic]
+            else:
+                for unit_site in range(1, n_db - 1):
+                    for cyclic in cyclic_lst:
+                        yield ['%s@%i' % (cyclic, unit_site)]
+
+    def get_blocks(self, site_specific=False, lipidome='alloxfa'):
+        """
+        Split the lipidome into SpeciesBlock parts, one per lipid class, FA positions and oxidized FA positions
+
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa' (get_all_class_alloxfa), '1oxfa' (get_all_class_1oxfa)
+            or 'unox' (TheoLipidome.get_estimation)
+        :type lipidome: str
+        :return: list of SpeciesBlock
+        :rtype: list
+        """
+        if lipidome not in ['alloxfa', '1oxfa', 'unox']:
+            raise ValueError('lipidome must be "alloxfa", "1oxfa" or "unox", got: %s' % lipidome)
+
+        special_class_dct = self.get_special_classes()
+        block_lst = []
+        for n_fa, x in enumerate(['x1', 'x2', 'x3', 'x4'], start=1):
+            for class_idx, lipid_class in enumerate(self.x_dct.get(x, [])):
+                is_special = special_class_dct.get(x) == class_idx
+                if site_specific is False:
+                    if lipidome == 'unox':
+                        n_ox_lst = [0]
+                    elif lipidome == '1oxfa':
+                        n_ox_lst = [1]
+                    else:
+                        n_ox_lst = range(1, n_fa + 1)
+                    for n_ox in n_ox_lst:
+                        block_lst.append(SpeciesBlock(lipid_class, 0, tuple(range(n_fa)),
+                                                      ('o',) * n_ox + ('u',) * (n_fa - n_ox), 'multiset'))
+                else:
+                    for n_sn, fa_sn, is_mirror_layout in _get_class_layouts(lipid_class, n_fa, is_special):
+                        for slot_pattern in _get_slot_patterns(n_fa, lipidome):
+                            is_mirror = is_mirror_layout
+                            if self.published is True and n_fa == 2:
+                                if lipidome == '1oxfa' and not is_special and slot_pattern[0] == 'o':
+                                    continue  # the publication counts the oxFA of PL on sn2 only
+                                if is_special and slot_pattern == ('o', 'o'):
+                                    is_mirror = False  # the publication counts 2 oxFA on sn1 + sn3 in both orders
+                            if not is_mirror:
+                                block_lst.append(SpeciesBlock(lipid_class, n_sn, fa_sn, slot_pattern, 'seq'))
+                            elif slot_pattern == slot_pattern[::-1]:
+                                block_lst.append(SpeciesBlock(lipid_class, n_sn, fa_sn, slot_pattern, 'mirror'))
+                            elif slot_pattern < slot_pattern[::-1]:
+                                # the mirrored pattern is the same block, keep the first one only
+                                block_lst.append(SpeciesBlock(lipid_class, n_sn, fa_sn, slot_pattern, 'seq'))
+
+        return block_lst
+
+    def get_special_classes(self):
+        """
+        Get the lipid classes with the -OH at sn2 of DG (x2) and the mirror of TG (x3) and CL (x4).
+        The estimators add these terms once, for the first of these classes in x_dct,
+        further classes with these names are counted like the other lipid classes.
+
+        :return: {x: position of the lipid class in x_dct[x]}
+        :rtype: dict
+        """
+        name_dct = {'x2': dg_class_lst, 'x3': tg_class_lst, 'x4': self.oxlipidome.get_cardiolipin_names()}
+        special_class_dct = {}
+        for x in name_dct:
+            for class_idx, lipid_class in enumerate(self.x_dct.get(x, [])):
+                if lipid_class in name_dct[x]:
+                    special_class_dct[x] = class_idx
+                    break
+
+        return special_class_dct
+
+    def get_block_size(self, block, site='bis-allylic', site_specific=False):
+        """
+        Calculate Number of species in one SpeciesBlock
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: Number of species
+        :rtype: int
+        """
+        size_lst = self._get_slot_sizes(block, site, site_specific)
+        if block.mode == 'multiset':
+            n_ox = block.slot_pattern.count('o')
+            n_unox = len(block.slot_pattern) - n_ox
+            return _get_multiset_count(size_lst[0], n_ox) * _get_multiset_count(size_lst[-1], n_unox)
+
+        block_size = 1
+        for size in size_lst:
+            block_size *= size
+        if block.mode == 'mirror':
+            palindrome_count = 1
+            for size in size_lst[:(len(size_lst) + 1) // 2]:
+                palindrome_count *= size
+            block_size = (block_size + palindrome_count) // 2
+
+        return block_size
+
+    def get_count(self, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Calculate Number of species as sum of all SpeciesBlock, same as the corresponding estimator
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :return: Number of species
+        :rtype: int
+        """
+        return sum(self.get_block_size(block, site=site, site_specific=site_specific)
+                   for block in self.get_blocks(site_specific=site_specific, lipidome=lipidome))
+
+    def iter_block(self, block, site='bis-allylic', site_specific=False, start=0, stop=None):
+        """
+        Generate the species of one SpeciesBlock as tuple of FA index per slot.
+        Index of 'u' slots refer to the FA list, index of 'o' slots to the oxFA from get_oxfa_label_lst.
+        Mirror blocks are generated without mirrored products: first by the outermost pair of positions
+        with different FA, the species with symmetric FA come last.
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param start: index of the first species in the block
+        :type start: int
+        :param stop: index after the last species in the block, None for all species to the end of the block
+        :type stop: int
+        :return: generator of FA index tuples
+        :rtype: generator
+        """
+        part_offset = 0
+        for part_idx, comp_lst in enumerate(_get_block_parts(block, self._get_slot_sizes(block, site, site_specific))):
+            if stop is not None and part_offset >= stop:
+                break
+            part_size = _get_part_size(comp_lst)
+            if start < part_offset + part_size:
+                part_start = max(start - part_offset, 0)
+                flat_iter = _iter_part(comp_lst, part_start)
+                if stop is not None and stop < part_offset + part_size:
+                    flat_iter = islice(flat_iter, stop - part_offset - part_start)
+                for flat_tuple in flat_iter:
+                    yield _assemble(block, part_idx, flat_tuple)
+            part_offset += part_size
+
+    def get_block_parts(self, block, site='bis-allylic', site_specific=False):
+        """
+        Get the parts of one SpeciesBlock in the order of iter_block, each part is a list of components
+        (('range', size), ('pair', size) or ('multiset', size, n), slot tuple).
+        Species of a part are numbered like a mixed radix number of the component values,
+        'range' is one FA, 'pair' two different FA a < b and 'multiset' n FA in any order.
+        The slot tuple lists the slots that take the values of the component, e.g. the two slots of a mirror pair.
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: list of parts
+        :rtype: list
+        """
+        part_lst = _get_block_parts(block, self._get_slot_sizes(block, site, site_specific))
+        return [list(zip(comp_lst, _get_part_slots(block, part_idx))) for part_idx, comp_lst in enumerate(part_lst)]
+
+    def unrank_block(self, block, index, site='bis-allylic', site_specific=False):
+        """
+        Get the FA index tuple of the species at position index of iter_block
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param index: position of the species in the block
+        :type index: int
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: FA index per slot
+        :rtype: tuple
+        """
+        part_offset = 0
+        for part_idx, comp_lst in enumerate(_get_block_parts(block, self._get_slot_sizes(block, site, site_specific))):
+            part_size = _get_part_size(comp_lst)
+            if 0 <= index - part_offset < part_size:
+                flat_tuple = ()
+                for comp, comp_idx in zip(comp_lst, _unrank_mixed_radix(
+                        [_get_comp_size(comp) for comp in comp_lst], index - part_offset)):
+                    flat_tuple += _unrank_comp(comp, comp_idx)
+                return _assemble(block, part_idx, flat_tuple)
+            part_offset += part_size
+
+        raise IndexError('species index out of range: %s' % index)
+
+    def rank_block(self, block, idx_tuple, site='bis-allylic', site_specific=False):
+        """
+        Get the position in iter_block of the species given as FA index tuple.
+        The FA of multiset blocks can be in any order, mirror blocks accept both orientations.
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param idx_tuple: FA index per slot
+        :type idx_tuple: tuple
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: position of the species in the block
+        :rtype: int
+        """
+        size_lst = self._get_slot_sizes(block, site, site_specific)
+        idx_tuple = tuple(int(idx) for idx in idx_tuple)
+        if len(idx_tuple) != len(size_lst) or not all(0 <= idx < size for idx, size in zip(idx_tuple, size_lst)):
+            raise ValueError('FA index out of range: %s' % (idx_tuple,))
+
+        part_lst = _get_block_parts(block, size_lst)
+        if block.mode == 'multiset':
+            n_ox = block.slot_pattern.count('o')
+            part_idx = 0
+            flat_tuple = tuple(sorted(idx_tuple[:n_ox])) + tuple(sorted(idx_tuple[n_ox:]))
+        elif block.mode == 'mirror':
+            if idx_tuple > idx_tuple[::-1]:
+                idx_tuple = idx_tuple[::-1]
+            n = len(idx_tuple)
+            part_idx = n // 2
+            for i in range(n // 2):
+                if idx_tuple[i] != idx_tuple[n - 1 - i]:
+                    part_idx = i
+                    break
+            if part_idx < n // 2:
+                flat_tuple = (idx_tuple[:part_idx] + (idx_tuple[part_idx], idx_tuple[n - 1 - part_idx])
+                              + idx_tuple[part_idx + 1:n - 1 - part_idx])
+            else:
+                flat_tuple = idx_tuple[:(n + 1) // 2]
+        else:
+            part_idx = 0
+            flat_tuple = idx_tuple
+
+        comp_lst = part_lst[part_idx]
+        comp_idx_lst = []
+        for comp in comp_lst:
+            comp_len = _get_comp_len(comp)
+            comp_idx_lst.append(_rank_comp(comp, flat_tuple[:comp_len]))
+            flat_tuple = flat_tuple[comp_len:]
+
+        return (sum(_get_part_size(part) for part in part_lst[:part_idx])
+                + _rank_mixed_radix([_get_comp_size(comp) for comp in comp_lst], comp_idx_lst))
+
+    def get_species_label(self, block, idx_tuple, site='bis-allylic', site_specific=False):
+        """
+        Get the name of one species, e.g. PC 16:0_20:4<OH,OOH> or PC 16:0/20:4<OH@1,OOH@2> (site specific)
+
+        :param block: part of the lipidome from get_blocks
+        :type block: SpeciesBlock
+        :param idx_tuple: FA index per slot from iter_block
+        :type idx_tuple: tuple
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: species name
+        :rtype: str
+        """
+        oxfa_label_lst = None
+        if 'o' in block.slot_pattern:
+            oxfa_label_lst = self.get_oxfa_label_lst(site=site, site_specific=site_specific)
+        fa_label_lst = [oxfa_label_lst[idx] if slot == 'o' else self.fa_name_lst[idx]
+                        for slot, idx in zip(block.slot_pattern, idx_tuple)]
+        if block.n_sn == 0:
+            return '%s %s' % (block.lipid_class, '_'.join(fa_label_lst))
+        else:
+            sn_lst = ['0:0'] * block.n_sn
+            for sn, fa_label in zip(block.fa_sn, fa_label_lst):
+                sn_lst[sn] = fa_label
+            return '%s %s' % (block.lipid_class, '/'.join(sn_lst))
+
+    def iter_species(self, site='bis-allylic', site_specific=False, lipidome='alloxfa', chunk_size=None,
+                     start=0, stop=None):
+        """
+        Generate all species of the lipidome lazily, the memory used does not depend on the number of species.
+        Set start and stop to generate only the species with index start .. stop - 1, see unrank.
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :param chunk_size: set to None to get the species one by one, else as lists of max chunk_size species
+        :type chunk_size: int
+        :param start: index of the first species
+        :type start: int
+        :param stop: index after the last species, None to generate all species to the end
+        :type stop: int
+        :return: generator of species names or lists of species names
+        :rtype: generator
+        """
+        species_iter = self._iter_species(site, site_specific, lipidome, start, stop)
+        if chunk_size is None:
+            for species in species_iter:
+                yield species
+        else:
+            while True:
+                species_chunk = list(islice(species_iter, int(chunk_size)))
+                if not species_chunk:
+                    break
+                yield species_chunk
+
+    def get_block_offsets(self, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Get the blocks of the lipidome with the index of the first species of each block
+
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :return: list of SpeciesBlock and list of offsets, the last offset is the total number of species
+        :rtype: tuple
+        """
+        key = (site, site_specific, lipidome)
+        if key not in self.block_index_dct:
+            block_lst = self.get_blocks(site_specific=site_specific, lipidome=lipidome)
+            offset_lst = [0]
+            for block in block_lst:
+                offset_lst.append(offset_lst[-1] + self.get_block_size(block, site=site, site_specific=site_specific))
+            self.block_index_dct[key] = (block_lst, offset_lst,
+                                         dict((block[:4], i) for i, block in enumerate(block_lst)))
+
+        return self.block_index_dct[key][:2]
+
+    def unrank(self, index, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Get the name of the species at position index of iter_species without generating the species before it
+
+        :param index: position of the species, 0 .. get_count() - 1
+        :type index: int
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :return: species name
+        :rtype: str
+        """
+        block_lst, offset_lst = self.get_block_offsets(site=site, site_specific=site_specific, lipidome=lipidome)
+        index = int(index)
+        if not 0 <= index < offset_lst[-1]:
+            raise IndexError('species index out of range: %s' % index)
+        block_idx = bisect_right(offset_lst, index) - 1
+        block = block_lst[block_idx]
+        idx_tuple = self.unrank_block(block, index - offset_lst[block_idx], site=site, site_specific=site_specific)
+
+        return self.get_species_label(block, idx_tuple, site=site, site_specific=site_specific)
+
+    def rank(self, species, site='bis-allylic', site_specific=False, lipidome='alloxfa'):
+        """
+        Get the position in iter_species of a species name, e.g. PC 16:0_20:4<OH,OOH> or PC 16:0/20:4<OH@1,OOH@2>.
+        FA of species without sn positions can be in any order, mirrored names of TG and CL give the same index.
+
+        :param species: species name as from get_species_label
+        :type species: str
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :return: position of the species
+        :rtype: int
+        """
+        block_lst, offset_lst = self.get_block_offsets(site=site, site_specific=site_specific, lipidome=lipidome)
+        block_dct = self.block_index_dct[(site, site_specific, lipidome)][2]
+        try:
+            lipid_class, fa_part = species.strip().split(' ', 1)
+        except ValueError:
+            raise ValueError('species name not supported: %s' % species)
+
+        if site_specific is False:
+            sn_lst_lst = [fa_part.split('_')]
+        else:
+            sn_lst = fa_part.split('/')
+            sn_lst_lst = [sn_lst, sn_lst[::-1]]
+
+        for sn_lst in sn_lst_lst:
+            if site_specific is False:
+                n_sn = 0
+                fa_sn = tuple(range(len(sn_lst)))
+                fa_label_lst = sorted(sn_lst, key=lambda fa_label: '<' not in fa_label)
+            else:
+                n_sn = len(sn_lst)
+                fa_sn = tuple(sn for sn, fa_label in enumerate(sn_lst) if fa_label != '0:0')
+                fa_label_lst = [sn_lst[sn] for sn in fa_sn]
+            slot_pattern = tuple('o' if '<' in fa_label else 'u' for fa_label in fa_label_lst)
+            block_idx = block_dct.get((lipid_class, n_sn, fa_sn, slot_pattern))
+            if block_idx is not None:
+                idx_tuple = tuple(self._get_fa_index(fa_label, site, site_specific) for fa_label in fa_label_lst)
+                return offset_lst[block_idx] + self.rank_block(block_lst[block_idx], idx_tuple, site=site,
+                                                               site_specific=site_specific)
+
+        raise ValueError('species not in the lipidome: %s' % species)
+
+    def sample_species(self, n, site='bis-allylic', site_specific=False, lipidome='alloxfa', seed=None):
+        """
+        Draw species uniformly at random (with replacement) from the lipidome, each draw is one unrank
+
+        :param n: number of species to draw
+        :type n: int
+        :param site: modification site mode in {'bis-allylic', 'allylic', 'db'}
+        :type site: str
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :param lipidome: 'alloxfa', '1oxfa' or 'unox', see get_blocks
+        :type lipidome: str
+        :param seed: seed of the random number generator, or a random.Random instance
+        :type seed: int | random.Random
+        :return: list of species names
+        :rtype: list
+        """
+        rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+        tot_count = self.get_block_offsets(site=site, site_specific=site_specific, lipidome=lipidome)[1][-1]
+        if tot_count == 0:
+            raise ValueError('no species to sample from')
+
+        return [self.unrank(rng.randrange(tot_count), site=site, site_specific=site_specific, lipidome=lipidome)
+                for _ in range(int(n))]
+
+    def _iter_species(self, site, site_specific, lipidome, start=0, stop=None):
+
+        block_lst, offset_lst = self.get_block_offsets(site=site, site_specific=site_specific, lipidome=lipidome)
+        for block_idx, block in enumerate(block_lst):
+            block_start = offset_lst[block_idx]
+            block_end = offset_lst[block_idx + 1]
+            if start >= block_end:
+                continue
+            if stop is not None and stop <= block_start:
+                break
+            for idx_tuple in self.iter_block(block, site=site, site_specific=site_specific,
+                                             start=max(start - block_start, 0),
+                                             stop=None if stop is None or stop >= block_end else stop - block_start):
+                yield self.get_species_label(block, idx_tuple, site=site, site_specific=site_specific)
+
+    def _get_fa_index(self, fa_label, site, site_specific):
+        # index of an unmodified FA in the FA list, or of an oxFA in get_oxfa_label_lst
+
+        if '<' in fa_label:
+            key = (site, site_specific)
+            if key not in self.oxfa_index_dct:
+                self.oxfa_index_dct[key] = dict((label, i) for i, label in enumerate(
+                    self.get_oxfa_label_lst(site=site, site_specific=site_specific)))
+            label_dct = self.oxfa_index_dct[key]
+        else:
+            if None not in self.oxfa_index_dct:
+                self.oxfa_index_dct[None] = dict((fa_name, i) for i, fa_name in reversed(
+                    list(enumerate(self.fa_name_lst))))
+            label_dct = self.oxfa_index_dct[None]
+        if fa_label not in label_dct:
+            raise ValueError('FA not in the lipidome: %s' % fa_label)
+
+        return label_dct[fa_label]
+
+    def _get_slot_sizes(self, block, site, site_specific):
+
+        if 'o' in block.slot_pattern:
+            tot_fa_ox = self.oxlipidome.get_all_oxfa(site=site, site_specific=site_specific)
+        else:
+            tot_fa_ox = 0
+        return [tot_fa_ox if slot == 'o' else self.f for slot in block.slot_pattern]
+
+
+def _get_multiset_count(size, n):
+    # number of combinations with repetition of n items from size items
+    if n == 0:
+        return 1
+    else:
+        return comb_exact(size + n - 1, n)
+
+
+def _get_mod_count_labels(mod_lst, mod_idx_lst):
+    # e.g. [0, 0, 1] -> ['2OH', 'OOH']
+    label_lst = []
+    for i, mod in enumerate(mod_lst):
+        mod_count = list(mod_idx_lst).count(i)
+        if mod_count == 1:
+            label_lst.append(mod)
+        elif mod_count > 1:
+            label_lst.append('%i%s' % (mod_count, mod))
+    return label_lst
+
+
+def _get_site_labels(mod_lst, mod_idx_tuple):
+    # e.g. [0, 2, 1] -> ['OOH@2', 'OH@3'], index 0 is the unmodified site
+    return ['%s@%i' % (mod_lst[i - 1], site + 1) for site, i in enumerate(mod_idx_tuple) if i > 0]
+
+
+def _get_class_layouts(lipid_class, n_fa, is_special):
+    # site specific FA positions of one lipid class: list of (n_sn, fa_sn, is_mirror), see get_special_classes
+    if n_fa == 1:
+        if lipid_class in lyso_class_lst:
+            return [(2, (0,), False), (2, (1,), False)]
+        elif lipid_class in mg_class_lst:
+            return [(3, (0,), False), (3, (1,), False), (3, (2,), False)]
+        else:
+            return [(1, (0,), False)]
+    elif n_fa == 2 and is_special:
+        # sn1/sn2 is the mirror of sn2/sn3, sn1/sn3 with -OH at sn2 is symmetric
+        return [(3, (0, 1), False), (3, (0, 2), True)]
+    elif is_special:
+        return [(n_fa, tuple(range(n_fa)), True)]
+    else:
+        return [(n_fa, tuple(range(n_fa)), False)]
+
+
+def _get_slot_patterns(n_fa, lipidome):
+    # all combinations of unmodified 'u' and oxidized 'o' FA on n_fa slots
+    slot_pattern_lst = []
+    for slot_pattern in product(['o', 'u'], repeat=n_fa):
+        n_ox = slot_pattern.count('o')
+        if (lipidome == 'unox' and n_ox == 0) or (lipidome == '1oxfa' and n_ox == 1) or (
+                lipidome == 'alloxfa' and n_ox > 0):
+            slot_pattern_lst.append(slot_pattern)
+    return slot_pattern_lst
+
+
+def _get_block_parts(block, size_lst):
+    # split a block into parts, each part is a mixed radix number of components:
+    # ('range', size) one FA, ('pair', size) two different FA a < b, ('multiset', size, n) n FA in any order.
+    # mirror blocks: part k has the same FA on the k outer pairs of positions and a pair a < b as pair k,
+    # the last part are the symmetric species.
+    if block.mode == 'multiset':
+        n_ox = block.slot_pattern.count('o')
+        return [[('multiset', size_lst[0] if n_ox else 0, n_ox),
+                 ('multiset', size_lst[-1], len(size_lst) - n_ox)]]
+    elif block.mode == 'mirror':
+        n = len(size_lst)
+        part_lst = []
+        for k in range(n // 2):
+            part_lst.append([('range', size) for size in size_lst[:k]] + [('pair', size_lst[k])]
+                            + [('range', size) for size in size_lst[k + 1:n - 1 - k]])
+        part_lst.append([('range', size) for size in size_lst[:(n + 1) // 2]])
+        return part_lst
+    else:
+        return [[('range', size) for size in size_lst]]
+
+
+def _get_part_slots(block, part_idx):
+    # slots of each component of a part from _get_block_parts
+
+    n = len(block.slot_pattern)
+    if block.mode == 'multiset':
+        n_ox = block.slot_pattern.count('o')
+        return [tuple(range(n_ox)), tuple(range(n_ox, n))]
+    elif block.mode == 'mirror':
+        slot_lst = [(i, n - 1 - i) for i in range(min(part_idx, n // 2))]
+        if part_idx < n // 2:
+            slot_lst.append((part_idx, n - 1 - part_idx))
+            slot_lst.extend((i,) for i in range(part_idx + 1, n - 1 - part_idx))
+        elif n % 2 == 1:
+            slot_lst.append((n // 2,))
+        return slot_lst
+    else:
+        return [(i,) for i in range(n)]
+
+
+def _assemble(block, part_idx, flat_tuple):
+    # FA index per slot from the values of the components of one part
+
+    if block.mode != 'mirror':
+        return flat_tuple
+    n = len(block.slot_pattern)
+    idx_lst = [0] * n
+    for i in range(min(part_idx, n // 2)):
+        idx_lst[i] = idx_lst[n - 1 - i] = flat_tuple[i]
+    if part_idx < n // 2:
+        idx_lst[part_idx] = flat_tuple[part_idx]
+        idx_lst[n - 1 - part_idx] = flat_tuple[part_idx + 1]
+        idx_lst[part_idx + 1:n - 1 - part_idx] = flat_tuple[part_idx + 2:]
+    elif n % 2 == 1:
+        idx_lst[n // 2] = flat_tuple[n // 2]
+    return tuple(idx_lst)
+
+
+def _get_comp_size(comp):
+
+    if comp[0] == 'pair':
+        return comb_exact(comp[1], 2)
+    elif comp[0] == 'multiset':
+        return _get_multiset_count(comp[1], comp[2])
+    else:
+        return comp[1]
+
+
+def _get_comp_len(comp):
+    # number of FA index of one component
+    return {'range': 1, 'pair': 2}.get(comp[0], comp[-1])
+
+
+def _get_part_size(comp_lst):
+
+    part_size = 1
+    for comp in comp_lst:
+        part_size *= _get_comp_size(comp)
+    return part_size
+
+
+def _unrank_comp(comp, idx):
+
+    if comp[0] == 'pair':
+        return _unrank_comb(comp[1], 2, idx)
+    elif comp[0] == 'multiset':
+        # combinations with repetition of n from size are combinations of n from size + n - 1
+        return tuple(c - i for i, c in enumerate(_unrank_comb(comp[1] + comp[2] - 1, comp[2], idx)))
+    else:
+        return (idx,)
+
+
+def _rank_comp(comp, value):
+
+    if comp[0] == 'pair':
+        return _rank_comb(comp[1], value)
+    elif comp[0] == 'multiset':
+        return _rank_comb(comp[1] + comp[2] - 1, [c + i for i, c in enumerate(value)])
+    else:
+        return value[0]
+
+
+def _iter_comp(comp, start):
+    # values of one component from index start, in the order of itertools
+
+    if comp[0] == 'range':
+        return ((idx,) for idx in range(start, comp[1]))
+    elif start == 0:
+        if comp[0] == 'pair':
+            return combinations(range(comp[1]), 2)
+        else:
+            return combinations_with_replacement(range(comp[1]), comp[2])
+    else:
+        return _iter_comp_from(comp, start)
+
+
+def _iter_comp_from(comp, start):
+
+    if start >= _get_comp_size(comp):
+        return
+    value = list(_unrank_comp(comp, start))
+    n = len(value)
+    while True:
+        yield tuple(value)
+        for i in range(n - 1, -1, -1):
+            # largest value of position i: size - n + i for combinations, size - 1 with repetition
+            if value[i] < (comp[1] - n + i if comp[0] == 'pair' else comp[1] - 1):
+                break
+        else:
+            return
+        value[i] += 1
+        for j in range(i + 1, n):
+            value[j] = value[j - 1] + 1 if comp[0] == 'pair' else value[i]
+
+
+def _iter_part(comp_lst, start):
+    # all flat tuples of one part from index start
+
+    start_lst = _unrank_mixed_radix([_get_comp_size(comp) for comp in comp_lst], start)
+    if all(comp[0] == 'range' for comp in comp_lst) and not any(start_lst):
+        return product(*[range(comp[1]) for comp in comp_lst])
+    else:
+        return _iter_product(comp_lst, start_lst)
+
+
+def _iter_product(comp_lst, start_lst):
+
+    if not comp_lst:
+        yield ()
+        return
+    tail_start_lst = start_lst[1:]
+    for head in _iter_comp(comp_lst[0], start_lst[0]):
+        for tail in _iter_product(comp_lst[1:], tail_start_lst):
+            yield head + tail
+        tail_start_lst = [0] * len(tail_start_lst)
+
+
+def _unrank_mixed_radix(size_lst, idx):
+    # digits of idx, the last digit changes fastest
+
+    digit_lst = []
+    for size in reversed(size_lst):
+        idx, digit = divmod(idx, size) if size > 0 else (idx, 0)
+        digit_lst.append(digit)
+    return digit_lst[::-1]
+
+
+def _rank_mixed_radix(size_lst, digit_lst):
+
+    idx = 0
+    for size, digit in zip(size_lst, digit_lst):
+        idx = idx * size + digit
+    return idx
+
+
+def _rank_comb(size, comb_tuple):
+    # lexicographic index of the combination c_0 < c_1 < ... of len(comb_tuple) items from size items
+    n = len(comb_tuple)
+    idx = 0
+    last = -1
+    for i, c in enumerate(comb_tuple):
+        # combinations with c_i in last + 1 .. c - 1
+        idx += comb_exact(size - last - 1, n - i) - comb_exact(size - c, n - i)
+        last = c
+    return idx
+
+
+def _unrank_comb(size, n, idx):
+    # combination at lexicographic index idx, c_i found by binary search over the combinations before it
+    comb_lst = []
+    last = -1
+    for i in range(n):
+        r = n - i
+        base = comb_exact(size - last - 1, r)
+        lo = last + 1
+        hi = size - r
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if base - comb_exact(size - mid, r) <= idx:
+                lo = mid
+            else:
+                hi = mid - 1
+        idx -= base - comb_exact(size - lo, r)
+        comb_lst.append(lo)
+        last = lo
+    return tuple(comb_lst)
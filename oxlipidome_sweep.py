@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import numpy as np
+import pandas as pd
+
+from lipidome_utils import comb_array
+from oxlipidome_estimation import TheoOxLipidome
+
+
+class SweepOxLipidome(TheoOxLipidome):
+
+    """
+    Evaluate all equations of TheoOxLipidome for a grid of modification set sizes at once.
+    The number of each modification type is a numpy array of dtype object (python int),
+    so all results are exact and computed in one batched pass for each site mode.
+    """
+
+    def __init__(self, oxlipidome, mod_count_dct):
+        """
+        Share the FA list and lipid classes of an existing TheoOxLipidome, no file is loaded again.
+
+        :param oxlipidome: loaded TheoOxLipidome
+        :type oxlipidome: TheoOxLipidome
+        :param mod_count_dct: number of modifications for each type in {'m_ocp', 'm_oap', 'm_p', 'm_o'} as arrays
+        :type mod_count_dct: dict
+        """
+        self.__dict__.update(oxlipidome.__dict__)
+        self.result_cache = {}  # results are arrays for this grid only
+        self.mod_count_dct = mod_count_dct
+        self.exact = True
+        self.comb = comb_array
+        self.use_count_tables = False  # the counts are arrays, the tables are looked up for single counts only
+
+    def get_mod_count(self, mod_type):
+        """
+        Get the array of number of modifications of one type
+
+        :param mod_type: modification type in {'m_ocp', 'm_oap', 'm_p', 'm_o'}
+        :type mod_type: str
+        :return: Number of modifications of this type for all grid points
+        :rtype: numpy.ndarray
+        """
+        return self.mod_count_dct[mod_type]
+
+
+def sweep_oxlipidome(oxlipidome, m_ocp_lst, m_oap_lst, m_p_lst, m_o_lst,
+                     site_lst=('bis-allylic', 'db', 'allylic'), site_specific_lst=(False, True)):
+    """
+    Calculate Number of oxFA, oxLipids with max 1 oxFA and oxLipids with all oxFA for all combinations
+    of the given numbers of modifications, site modes and site_specific settings.
+
+    :param oxlipidome: loaded TheoOxLipidome or dict of {label: TheoOxLipidome} to sweep over several FA lists
+    :type oxlipidome: TheoOxLipidome | dict
+    :param m_ocp_lst: numbers of cleavage terminal types
+    :type m_ocp_lst: list
+    :param m_oap_lst: numbers of Oxygen addition modification types
+    :type m_oap_lst: list
+    :param m_p_lst: numbers of Prostane Ring types
+    :type m_p_lst: list
+    :param m_o_lst: numbers of Other types
+    :type m_o_lst: list
+    :param site_lst: modification site modes in {'bis-allylic', 'allylic', 'db'}
+    :type site_lst: list
+    :param site_specific_lst: site_specific settings to evaluate
+    :type site_specific_lst: list
+    :return: one row per FA list, grid point, site mode and site_specific setting
+    :rtype: pandas.DataFrame
+    """
+    if isinstance(oxlipidome, dict):
+        oxlipidome_dct = oxlipidome
+    else:
+        oxlipidome_dct = {None: oxlipidome}
+
+    mod_type_lst = ['m_ocp', 'm_oap', 'm_p', 'm_o']
+    mesh_lst = np.meshgrid(*[np.asarray(lst, dtype=object) for lst in [m_ocp_lst, m_oap_lst, m_p_lst, m_o_lst]],
+                           indexing='ij')
+    mod_count_dct = {}
+    for mod_type, mesh in zip(mod_type_lst, mesh_lst):
+        mod_count_dct[mod_type] = np.array([int(n) for n in mesh.ravel()], dtype=object)
+    grid_size = mod_count_dct['m_ocp'].shape[0]
+
+    sweep_df_lst = []
+    for label in oxlipidome_dct:
+        sweep_lipidome = SweepOxLipidome(oxlipidome_dct[label], mod_count_dct)
+        for site in site_lst:
+            for site_specific in site_specific_lst:
+                _sweep_dct = {}
+                if label is not None:
+                    _sweep_dct['fa_list'] = [label] * grid_size
+                for mod_type in mod_type_lst:
+                    _sweep_dct[mod_type] = mod_count_dct[mod_type].astype(np.int64)
+                _sweep_dct['site'] = [site] * grid_size
+                _sweep_dct['site_specific'] = [site_specific] * grid_size
+                tot_fa_ox = sweep_lipidome.get_all_oxfa(site=site, site_specific=site_specific)
+                _sweep_dct['oxfa'] = _broadcast(tot_fa_ox, grid_size)
+                _sweep_dct['oxlipid_1oxfa'] = _broadcast(
+                    sweep_lipidome.get_all_class_1oxfa(site=site, site_specific=site_specific), grid_size)
+                _sweep_dct['oxlipid_alloxfa'] = _broadcast(
+                    sweep_lipidome.get_all_class_alloxfa(site=site, site_specific=site_specific), grid_size)
+                sweep_df_lst.append(pd.DataFrame(_sweep_dct))
+
+    return pd.concat(sweep_df_lst, ignore_index=True)
+
+
+def _broadcast(count, grid_size):
+    # keep python int in dtype object, FA lists without any C=C bond return a plain int instead of an array
+    if getattr(count, 'ndim', 0) > 0:
+        return pd.Series(count, dtype=object)
+    else:
+        return pd.Series([int(count)] * grid_size, dtype=object)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+"""
+Precalculated numbers of OAP, OCP and cyclic products for a grid of modification set sizes.
+
+The numbers of TheoOxLipidome.get_oap, get_ocp and get_cyclic depend only on the number of modifications
+of each type, the number of sites (or C=C) and site_specific:
+    oap: OAP and the unmodified FA of FA with m sites and n_oap OAP modifications, get_oap + 1
+    ocp: OCP of one OCP terminal of FA with m sites and n_oap OAP modifications, get_ocp / m_ocp
+    cyclic: cyclic products of FA with n_db C=C and n_p + n_o cyclic modifications, get_cyclic
+The tables are saved as exact integers in the gzip compressed JSON file data/mod_count_tables.json.gz
+and loaded on the first use by the estimators in exact mode, without numpy.
+Values outside the grid are calculated.
+
+    $ python oxlipidome_tables.py --m-max 20 --n-max 16 --n-cyclic-max 32
+"""
+
+import argparse
+import gzip
+import json
+import numbers
+import os
+import sys
+
+from lipidome_utils import comb_exact, sum_powers
+
+default_table_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'mod_count_tables.json.gz')
+table_name_lst = ['oap', 'ocp', 'cyclic']
+
+_table_cache = {}  # table path: loaded ModCountTables or None if the file does not exist
+
+
+class ModCountTables(object):
+
+    """
+    Lookup of the precalculated numbers of OAP, OCP and cyclic products, for single values and numpy arrays.
+    """
+
+    def __init__(self, table_dct):
+        """
+        :param table_dct: tables of build_tables, '<name>_<0|1>' as nested lists of python int [n][m or n_db]
+            for each table name and site_specific
+        :type table_dct: dict
+        """
+        self.table_dct = table_dct
+        self._arr_dct = {}  # numpy arrays of dtype object for get_arr, created on the first use
+
+    def get_shape(self, name):
+        """
+        Get the size of the grid of one table
+
+        :param name: table name in {'oap', 'ocp', 'cyclic'}
+        :type name: str
+        :return: number of set sizes and number of sites (or C=C) of the table, starting from 0
+        :rtype: tuple
+        """
+        table_lst = self.table_dct['%s_0' % name]
+        return len(table_lst), len(table_lst[0])
+
+    def get(self, name, n, m, site_specific=False):
+        """
+        Look up one number
+
+        :param name: table name in {'oap', 'ocp', 'cyclic'}
+        :type name: str
+        :param n: number of modifications, n_oap for oap and ocp, n_p + n_o for cyclic
+        :type n: int
+        :param m: number of modification sites, number of C=C for cyclic
+        :type m: int
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: the number, None if n or m are outside the grid or not single integers (use get_arr for arrays)
+        :rtype: int
+        """
+        if not (isinstance(n, numbers.Integral) and isinstance(m, numbers.Integral)):
+            return None
+        n_max, m_max = self.get_shape(name)
+        if not (0 <= n < n_max and 0 <= m < m_max):
+            return None
+        return self.table_dct['%s_%i' % (name, bool(site_specific))][n][m]
+
+    def get_arr(self, name, n_arr, m_arr, site_specific=False):
+        """
+        Look up the numbers of arrays of n and m
+
+        :param name: table name in {'oap', 'ocp', 'cyclic'}
+        :type name: str
+        :param n_arr: number of modifications, n_oap for oap and ocp, n_p + n_o for cyclic
+        :type n_arr: numpy.ndarray
+        :param m_arr: number of modification sites, number of C=C for cyclic
+        :type m_arr: numpy.ndarray
+        :param site_specific: set to False to use combinations only. set to True to generate all site specific species
+        :type site_specific: bool
+        :return: the numbers as python int (dtype object), None if any n or m is outside the grid
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        n_max, m_max = self.get_shape(name)
+        n_arr, m_arr = np.broadcast_arrays(np.asarray(n_arr, dtype=np.int64), np.asarray(m_arr, dtype=np.int64))
+        if n_arr.size and (n_arr.min() < 0 or n_arr.max() >= n_max or m_arr.min() < 0 or m_arr.max() >= m_max):
+            return None
+        key = '%s_%i' % (name, bool(site_specific))
+        if key not in self._arr_dct:
+            table_arr = np.empty((n_max, m_max), dtype=object)
+            table_arr[:, :] = self.table_dct[key]
+            self._arr_dct[key] = table_arr
+        return self._arr_dct[key][n_arr, m_arr]
+
+
+def build_tables(m_max=20, n_max=16, n_cyclic_max=32):
+    """
+    Calculate the tables of OAP, OCP and cyclic products with the equations of TheoOxLipidome
+
+    :param m_max: largest number of modification sites, also the largest number of C=C - 1 of the cyclic table
+    :type m_max: int
+    :param n_max: largest number of OAP modifications
+    :type n_max: int
+    :param n_cyclic_max: largest number of prostane and other cyclic modifications n_p + n_o
+    :type n_cyclic_max: int
+    :return: tables as nested lists, see ModCountTables
+    :rtype: dict
+    """
+    table_dct = {}
+    for site_specific in [False, True]:
+        oap_lst = []
+        ocp_lst = []
+        for n_oap in range(n_max + 1):
+            r_lst = [max(m - 2, 0) for m in range(m_max + 1)]
+            if site_specific is False:
+                oap_lst.append([comb_exact(n_oap + m, m) for m in range(m_max + 1)])
+                ocp_lst.append([comb_exact(n_oap + r + 1, r) for r in r_lst])
+            else:
+                oap_lst.append([n_oap ** m for m in range(m_max + 1)])
+                ocp_lst.append([sum_powers(n_oap, r) for r in r_lst])
+        cyclic_lst = [[(n_cyclic if site_specific is False else (n_db - 2) * n_cyclic) if n_db >= 3 else 0
+                       for n_db in range(m_max + 2)] for n_cyclic in range(n_cyclic_max + 1)]
+        for name, value_lst in zip(table_name_lst, [oap_lst, ocp_lst, cyclic_lst]):
+            table_dct['%s_%i' % (name, site_specific)] = value_lst
+
+    return table_dct
+
+
+def save_tables(table_dct, table_path=default_table_path):
+    """
+    Save the tables of build_tables as gzip compressed JSON file
+
+    :param table_dct: tables of build_tables
+    :type table_dct: dict
+    :param table_path: output file
+    :type table_path: str
+    """
+    tmp_path = table_path + '.tmp'
+    # mtime=0 to write the same file for the same tables
+    with gzip.GzipFile(tmp_path, 'wb', mtime=0) as table_obj:
+        table_obj.write(json.dumps(table_dct, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    os.replace(tmp_path, table_path)
+    _table_cache.pop(os.path.abspath(table_path), None)
+
+
+def load_tables(table_path=default_table_path):
+    """
+    Load the tables once per process, later calls return the same tables
+
+    :param table_path: .json.gz file of save_tables
+    :type table_path: str
+    :return: the tables, None if the file does not exist
+    :rtype: ModCountTables
+    """
+    abs_path = os.path.abspath(table_path)
+    if abs_path not in _table_cache:
+        if os.path.isfile(abs_path):
+            with gzip.open(abs_path, 'rb') as table_obj:
+                _table_cache[abs_path] = ModCountTables(json.loads(table_obj.read().decode('utf-8')))
+        else:
+            _table_cache[abs_path] = None
+
+    return _table_cache[abs_path]
+
+
+def main(argv=None):
+    """
+    Build and save the tables
+
+    :param argv: command line arguments, sys.argv[1:] by default
+    :type argv: list
+    :return: exit code
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description='Precalculate the numbers of OAP, OCP and cyclic products.')
+    parser.add_argument('--m-max', type=int, default=20, help='largest number of modification sites')
+    parser.add_argument('--n-max', type=int, default=16, help='largest number of OAP modifications')
+    parser.add_argument('--n-cyclic-max', type=int, default=32,
+                        help='largest number of prostane and other cyclic modifications')
+    parser.add_argument('-o', '--output', default=default_table_path, help='output .json.gz file')
+    args = parser.parse_args(argv)
+
+    save_tables(build_tables(m_max=args.m_max, n_max=args.n_max, n_cyclic_max=args.n_cyclic_max), args.output)
+    print('Tables saved: %s (%i bytes)' % (args.output, os.path.getsize(args.output)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import os
+import sys
+
+# the modules are in the top folder of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope='session', autouse=True)
+def lipidome_cache_dir(tmp_path_factory):
+    # cache sidecars of the FA lists are written to the temporary folder of the test run
+    cache_dir = str(tmp_path_factory.mktemp('lipidome_cache'))
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setenv('LIPIDOME_CACHE_DIR', cache_dir)
+    yield cache_dir
+    monkeypatch.undo()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import copy
+import os
+
+import pytest
+
+from lipidome_utils import comb_exact
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_species import TheoOxLipidomeSpecies
+from unoxlipidome_estimation import TheoLipidome
+
+usr_fa_lst = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'FA_list.xlsx')
+usr_lipid_classes = {
+    'x1': ['FA', 'CholesterolEster', 'LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS',
+           'Monoacylglycerol', 'Ceramide', 'Sphingolipid'],
+    'x2': ['PA', 'PC', 'PE', 'PG', 'PI', 'PS', 'Diacylglycerol'],
+    'x3': ['Triacylglycerol'],
+    'x4': ['Cardiolipin'],
+}
+usr_mod_dct = {
+    'm_ocp': ['Aldehyde', 'CarboxylicAcid'],
+    'm_oap': ['OH', 'OOH', 'KETO', 'EPOXY'],
+    'm_p': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J'],
+    'm_o': ['D-IsoK', 'E-IsoK', 'TXA', 'TXB'],
+}
+
+# totals of the default settings: oxFA, oxLipids with max 1 oxFA, oxLipids with all oxFA
+# published=True, the equations of the publication
+default_total_dct = {
+    ('bis-allylic', False): (733, 1219712, 13504494328),
+    ('db', False): (1467, 2441088, 204549162521),
+    ('allylic', False): (2844, 4732416, 2809273889381),
+    ('bis-allylic', True): (2241, 63144657, 26093428376454),
+    ('db', True): (8275, 233164675, 4732410425120600),
+    ('allylic', True): (32435, 913920995, 1109378192610577240),
+}
+# published=False, the corrected equations
+corrected_total_dct = {
+    ('bis-allylic', False): (733, 1219712, 13504495868),
+    ('db', False): (1467, 2441088, 204549164061),
+    ('allylic', False): (2844, 4732416, 2809273890921),
+    ('bis-allylic', True): (5418, 78956514, 437006056905936),
+    ('db', True): (26166, 381317118, 235069840886615616),
+    ('allylic', True): (129936, 1893557328, 142608470147007409056),
+}
+
+
+@pytest.fixture(scope='module', params=[True, False], ids=['published', 'corrected'])
+def oxlipidome(request):
+    return TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                          published=request.param)
+
+
+def get_total_dct(published):
+    return default_total_dct if published is True else corrected_total_dct
+
+
+@pytest.mark.parametrize('site, site_specific', sorted(default_total_dct))
+def test_default_oxlipidome_totals(oxlipidome, site, site_specific):
+    assert (oxlipidome.get_all_oxfa(site=site, site_specific=site_specific),
+            oxlipidome.get_all_class_1oxfa(site=site, site_specific=site_specific),
+            oxlipidome.get_all_class_alloxfa(site=site, site_specific=site_specific)
+            ) == get_total_dct(oxlipidome.published)[(site, site_specific)]
+
+
+def test_published_is_default():
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False)
+    assert oxlipidome.published is True
+    assert oxlipidome.get_all_class_alloxfa(site_specific=True) == default_total_dct[('bis-allylic', True)][2]
+    oxlipidome.published = False
+    assert oxlipidome.get_all_class_alloxfa(site_specific=True) == corrected_total_dct[('bis-allylic', True)][2]
+
+
+@pytest.mark.parametrize('site, site_specific', sorted(default_total_dct))
+def test_float_mode_close_to_exact(oxlipidome, site, site_specific):
+    float_lipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=False, verbose=False,
+                                    published=oxlipidome.published)
+    for method, total in zip(['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa'],
+                             get_total_dct(oxlipidome.published)[(site, site_specific)]):
+        assert getattr(float_lipidome, method)(site=site, site_specific=site_specific) == pytest.approx(total)
+
+
+@pytest.mark.parametrize('published, total_tuple', [(True, (10184, 137009)), (False, (10184, 72029))])
+def test_default_unoxlipidome_totals(published, total_tuple):
+    unoxlipidome = TheoLipidome(usr_fa_lst, usr_lipid_classes, exact=True, verbose=False, published=published)
+    assert (unoxlipidome.get_estimation(site_specific=False),
+            unoxlipidome.get_estimation(site_specific=True)) == total_tuple
+
+
+def test_other_classes_without_tg_and_cl():
+    x_dct = dict(usr_lipid_classes, x3=['TG_other'], x4=['CL_other'])
+    unoxlipidome = TheoLipidome(usr_fa_lst, x_dct, exact=True, verbose=False, published=False)
+    f = unoxlipidome.f
+    tg_cl_lipidome = TheoLipidome(usr_fa_lst, dict(x_dct, x3=[], x4=[]), exact=True, verbose=False, published=False)
+    assert unoxlipidome.get_estimation(site_specific=True) == (tg_cl_lipidome.get_estimation(site_specific=True)
+                                                               + f ** 3 + f ** 4)
+
+
+generator_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+generator_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH'], 'm_p': ['A'], 'm_o': []}
+generator_x_dct = {
+    'default': {'x1': ['LPC', 'Monoacylglycerol'], 'x2': ['PC', 'Diacylglycerol'],
+                'x3': ['Triacylglycerol', 'TG_other'], 'x4': ['Cardiolipin']},
+    'cl_in_x4': {'x1': ['LPC'], 'x2': ['PC'], 'x3': ['Triacylglycerol'], 'x4': ['CL']},
+    'no_x3': {'x1': [], 'x2': ['PC'], 'x3': [], 'x4': ['CL', 'CL_other']},
+    'other_x3': {'x1': [], 'x2': ['Diacylglycerol'], 'x3': ['TG_other'], 'x4': []},
+    'cardiolipin_in_x3': {'x1': [], 'x2': [], 'x3': ['TG_other', 'Cardiolipin'], 'x4': ['CL_other']},
+    'two_names': {'x1': [], 'x2': ['Diacylglycerol', 'DG'], 'x3': ['Triacylglycerol', 'TG'],
+                  'x4': ['CL', 'Cardiolipin']},
+}
+
+
+def get_published_delta(x_dct, f, f_ox, site_specific, lipidome):
+    # estimation - generated species of the terms of the publication that do not count species, see README.md
+    n_x2, n_x3, n_x4 = [len(x_dct[x]) for x in ['x2', 'x3', 'x4']]
+    if site_specific is False:
+        return -n_x4 * comb_exact(f + 3, 3) if lipidome == 'alloxfa' else 0
+    has_cl = 'Cardiolipin' in x_dct['x3'] or 'CL' in x_dct['x4']
+    f_all = f_ox + f
+    n_other = max(n_x4 - 1, 0)  # other lipid classes with 4 FA next to CL in the estimation
+    delta = 0
+    if lipidome == 'unox':
+        cl_term, other_term = (f**4 + f**2) // 2, f**4
+        if 'Triacylglycerol' not in x_dct['x3'] and 'TG' not in x_dct['x3']:
+            delta -= n_x3 * f**3
+    elif lipidome == '1oxfa':
+        cl_term, other_term = 2 * f_ox * f**3, 4 * f_ox * f**3
+        n_other = n_x4 - 1 if n_x3 > 1 else 0
+    else:
+        cl_term, other_term = (f_all**4 + f_all**2 - f**4 - f**2) // 2, f_all**4 - f**4
+        delta += n_x2 * (f_all**2 - f**2)
+        if has_cl:
+            delta += 2 * ((comb_exact(f_ox, 2) + f_ox) * (comb_exact(f, 2) + f) - (f_ox**2 * f**2 + f_ox * f) // 2)
+            delta += (comb_exact(f_ox, 2) + f_ox)**2 - f_ox - (f_ox**4 + f_ox**2) // 2
+    if has_cl and 'CL' in x_dct['x4']:
+        delta += (n_other - (n_x4 - 1)) * other_term
+    elif has_cl:
+        delta += cl_term + (n_other - n_x4) * other_term  # no CL species
+    return delta
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('site_specific', [False, True])
+@pytest.mark.parametrize('lipidome', ['alloxfa', '1oxfa', 'unox'])
+@pytest.mark.parametrize('x_key', sorted(generator_x_dct))
+def test_generated_species_match_estimators(published, site_specific, lipidome, x_key):
+    # every species is generated once, mirrored TG/CL and DG only in one orientation
+    x_dct = generator_x_dct[x_key]
+    species_generator = TheoOxLipidomeSpecies(generator_fa_lst, x_dct, generator_mod_dct, published=published)
+    species_lst = list(species_generator.iter_species(site_specific=site_specific, lipidome=lipidome))
+    assert len(set(species_lst)) == len(species_lst)
+    assert len(species_lst) == species_generator.get_count(site_specific=site_specific, lipidome=lipidome)
+    oxlipidome = TheoOxLipidome(generator_fa_lst, x_dct, generator_mod_dct, exact=True, verbose=False,
+                                published=published)
+    if lipidome == 'unox':
+        total = TheoLipidome(generator_fa_lst, x_dct, exact=True, verbose=False,
+                             published=published).get_estimation(site_specific=site_specific)
+    else:
+        method = 'get_all_class_alloxfa' if lipidome == 'alloxfa' else 'get_all_class_1oxfa'
+        total = getattr(oxlipidome, method)(site_specific=site_specific)
+    if published is True:
+        total -= get_published_delta(x_dct, oxlipidome.f, oxlipidome.get_all_oxfa(site_specific=site_specific),
+                                     site_specific, lipidome)
+    assert len(species_lst) == total
+
+
+def test_result_cache_holds_one_setting():
+    oxlipidome = TheoOxLipidome(usr_fa_lst, copy.deepcopy(usr_lipid_classes), usr_mod_dct, exact=True, verbose=False)
+    fingerprint = oxlipidome.get_fingerprint()
+    assert oxlipidome.get_fingerprint() is fingerprint  # kept until the settings are reassigned
+    total = oxlipidome.get_all_class_alloxfa(site='db', site_specific=True)
+    n_results = len(oxlipidome.result_cache)
+
+    oxlipidome.use_count_tables = False
+    assert oxlipidome.get_all_class_alloxfa(site='db', site_specific=True) == total
+    assert len(oxlipidome.result_cache) == n_results  # the results of the other setting are dropped
+
+    # changes in place are used after clear_result_cache
+    oxlipidome.x_dct['x2'].remove('PC')
+    oxlipidome.clear_result_cache()
+    assert oxlipidome.get_all_class_alloxfa(site='db', site_specific=True) < total
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import os
+
+import pytest
+
+import fa_list_loader
+from fa_list_loader import get_fa_db_summary, get_sidecar_path, load_fa_list, load_fa_summary
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], [None, None, None, None],
+              [float('nan'), '', 0, 0], ['FA20:4', 'C20H32O2', 20, 4], ['FA22:4', 'C22H36O2', 22, 4]]
+
+
+@pytest.mark.parametrize('fa_lst', [usr_fa_lst, [dict(zip(['FA', 'Elem', 'C', 'DB'], fa)) for fa in usr_fa_lst]])
+def test_records_summary_skips_rows_without_fa(fa_lst):
+    summary = load_fa_summary(fa_lst)
+    assert summary == get_fa_db_summary(load_fa_list(fa_lst)) == (4, {2: 1, 4: 2}, [2, 4])
+
+
+@pytest.mark.parametrize('fa_lst', [[['FA18:2', 'C18H32O2', 18, None]], [['FA18:2', 'C18H32O2', 18]],
+                                    [{'FA': 'FA18:2', 'Elem': 'C18H32O2', 'C': 18}]])
+def test_invalid_records(fa_lst):
+    with pytest.raises((TypeError, ValueError)):
+        load_fa_summary(fa_lst)
+    with pytest.raises((TypeError, ValueError)):
+        load_fa_list(fa_lst)
+
+
+def test_sidecar_in_cache_dir(tmp_path, lipidome_cache_dir):
+    csv_path = str(tmp_path / 'FA_list.csv')
+    load_fa_list(usr_fa_lst).to_csv(csv_path, index=False)
+    fa_df = load_fa_list(csv_path)
+    sidecar_path = get_sidecar_path(csv_path)
+    assert os.path.dirname(sidecar_path) == lipidome_cache_dir
+    assert os.path.isfile(sidecar_path)
+    assert os.listdir(str(tmp_path)) == ['FA_list.csv']
+
+    fa_list_loader._fa_df_memo.clear()
+    fa_list_loader._fa_summary_memo.clear()
+    assert load_fa_list(csv_path).equals(fa_df)
+    assert load_fa_summary(csv_path) == (4, {2: 1, 4: 2}, [2, 4])
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import csv
+import json
+
+import pytest
+
+from lipidome_batch import get_jobs, get_mod_tables, main, run_batch
+from lipidome_cli import run_estimation
+
+usr_fa_dct = {'liver': [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]],
+              'brain': [['FA18:1', 'C18H34O2', 18, 1], ['FA22:6', 'C22H32O2', 22, 6]]}
+usr_estimation_lst = [{'lipidome': 'unox', 'site_specific': True},
+                      {'lipidome': 'ox', 'site': 'db', 'site_specific': True},
+                      {'lipidome': 'ox', 'site': 'bis-allylic', 'site_specific': False}]
+result_key_lst = ['lipidome', 'site', 'site_specific', 'lipid', 'oxfa', 'oxlipid_1oxfa', 'oxlipid_alloxfa']
+
+
+def write_fa_list(fa_path, fa_lst):
+    with open(str(fa_path), 'w', newline='') as fa_obj:
+        writer = csv.writer(fa_obj)
+        writer.writerow(['FA', 'Elem', 'C', 'DB'])
+        writer.writerows(fa_lst)
+
+
+def get_cli_rows(config):
+    return [dict((key, result.get(key)) for key in result_key_lst) for result in run_estimation(config)['results']]
+
+
+def get_batch_rows(row_lst, job):
+    return [dict((key, row[key]) for key in result_key_lst) for row in row_lst if row['job'] == job]
+
+
+@pytest.fixture
+def fa_dir(tmp_path):
+    for name in usr_fa_dct:
+        write_fa_list(tmp_path / ('%s.csv' % name), usr_fa_dct[name])
+    return tmp_path
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_folder_equals_cli(fa_dir, n_workers):
+    config = {'estimations': usr_estimation_lst}
+    row_lst = run_batch(str(fa_dir), config, n_workers=n_workers, verbose=False)
+    assert len(row_lst) == len(usr_fa_dct) * len(usr_estimation_lst)
+    for job in get_jobs(str(fa_dir), config):
+        assert get_batch_rows(row_lst, job['name']) == get_cli_rows(job['config'])
+    assert all(row['error'] is None for row in row_lst)
+
+
+def test_manifest_equals_cli(fa_dir):
+    manifest = {'estimations': usr_estimation_lst,
+                'jobs': ['liver.csv',
+                         {'name': 'liver_corrected', 'fa_list': 'liver.csv', 'published': False},
+                         {'name': 'brain_oh', 'fa_list': 'brain.csv',
+                          'modifications': {'m_ocp': [], 'm_oap': ['OH'], 'm_p': [], 'm_o': []}},
+                         {'name': 'inline', 'fa_list': usr_fa_dct['brain']},
+                         {'name': 'missing', 'fa_list': 'missing.csv'}]}
+    manifest_path = fa_dir / 'manifest.json'
+    manifest_path.write_text(json.dumps(manifest))
+
+    job_lst = get_jobs(str(manifest_path))
+    assert [job['name'] for job in job_lst] == ['liver', 'liver_corrected', 'brain_oh', 'inline', 'missing']
+    # liver and inline share the default modifications
+    assert len(get_mod_tables(job_lst)) == 3
+
+    row_lst = run_batch(str(manifest_path), n_workers=1, verbose=False)
+    for job in job_lst[:-1]:
+        assert get_batch_rows(row_lst, job['name']) == get_cli_rows(job['config'])
+    assert get_batch_rows(row_lst, 'liver') != get_batch_rows(row_lst, 'liver_corrected')
+    missing_row_lst = [row for row in row_lst if row['job'] == 'missing']
+    assert len(missing_row_lst) == 1
+    assert missing_row_lst[0]['error'].startswith('FileNotFoundError')
+
+
+def test_duplicate_names(fa_dir):
+    manifest_path = fa_dir / 'manifest.json'
+    manifest_path.write_text(json.dumps({'jobs': ['liver.csv', {'name': 'liver', 'fa_list': 'brain.csv'}]}))
+    with pytest.raises(ValueError):
+        get_jobs(str(manifest_path))
+
+
+@pytest.mark.parametrize('output_name', ['results.csv', 'results.json'])
+def test_main_output(fa_dir, tmp_path_factory, output_name):
+    config_path = tmp_path_factory.mktemp('config') / 'config.json'
+    config_path.write_text(json.dumps({'estimations': usr_estimation_lst}))
+    output_path = tmp_path_factory.mktemp('output') / output_name
+    assert main([str(fa_dir), '--config', str(config_path), '--output', str(output_path), '--workers', '1']) == 0
+
+    if output_name.endswith('.json'):
+        row_lst = json.loads(output_path.read_text())
+        alloxfa_lst = [row['oxlipid_alloxfa'] for row in row_lst]
+    else:
+        with open(str(output_path), 'r', newline='') as output_obj:
+            alloxfa_lst = [int(row['oxlipid_alloxfa']) if row['oxlipid_alloxfa'] else None
+                           for row in csv.DictReader(output_obj)]
+    cli_row_lst = []
+    for name in sorted(usr_fa_dct):
+        cli_row_lst.extend(get_cli_rows({'fa_list': usr_fa_dct[name], 'estimations': usr_estimation_lst}))
+    assert alloxfa_lst == [row['oxlipid_alloxfa'] for row in cli_row_lst]
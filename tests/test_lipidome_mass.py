@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import numpy as np
+import pytest
+
+from lipidome_mass import build_mass_index, get_formula_mass, load_mass_index, parse_formula
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'DG'], 'x3': ['TG'], 'x4': ['CL']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+def get_mass_dct(mass_index, species_generator, **kwargs):
+    mass_arr = np.empty(len(mass_index))
+    mass_arr[mass_index.rank_arr] = mass_index.mass_arr
+    return dict(zip(species_generator.iter_species(**kwargs), mass_arr.tolist()))
+
+
+def test_formula_mass():
+    assert parse_formula('C16H32O2') == {'C': 16, 'H': 32, 'O': 2}
+    assert parse_formula('H-2O') == {'H': -2, 'O': 1}
+    assert get_formula_mass(parse_formula('H2O')) == pytest.approx(18.010565, abs=1e-6)
+
+
+@pytest.mark.parametrize('lipidome', ['unox', 'alloxfa'])
+def test_species_masses(lipidome):
+    mass_index = build_mass_index(usr_fa_lst, usr_lipid_classes, usr_mod_dct, lipidome=lipidome)
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    assert len(mass_index) == species_generator.get_count(lipidome=lipidome)
+    assert (np.diff(mass_index.mass_arr) >= 0).all()
+    assert sorted(mass_index.rank_arr.tolist()) == list(range(len(mass_index)))
+
+    mass_dct = get_mass_dct(mass_index, species_generator, lipidome=lipidome)
+    if lipidome == 'unox':
+        known_mass_dct = {'LPC 16:0': 495.332490, 'PC 16:0_18:2': 757.562156, 'DG 16:0_18:2': 592.506675}
+    else:
+        # + O, + O2 - H2 (PGA), FA20:4 cut after the 2nd C=C with aldehyde and one OH
+        known_mass_dct = {'LPC 18:2<OH>': 535.327404, 'LPC 20:4<A>': 573.306669,
+                          'LPC 20:4<Aldehyde@1,OH>': 411.165818}
+    for species in known_mass_dct:
+        assert mass_dct[species] == pytest.approx(known_mass_dct[species], abs=1e-5)
+
+
+def test_queries(tmp_path):
+    mass_index = build_mass_index(usr_fa_lst, usr_lipid_classes, usr_mod_dct, site='db', lipidome='1oxfa')
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    mass_dct = get_mass_dct(mass_index, species_generator, site='db', lipidome='1oxfa')
+
+    mz = 535.327404 + 1.007276
+    rank_arr, mass_arr = mass_index.query(mz, ppm=5, adduct='[M+H]+')
+    hit_lst = [species_generator.unrank(rank, site='db', lipidome='1oxfa') for rank in rank_arr.tolist()]
+    assert 'LPC 18:2<OH>' in hit_lst
+    assert sorted(hit_lst) == sorted(species for species in mass_dct
+                                     if abs(mass_dct[species] - (mz - 1.007276)) <= (mz - 1.007276) * 5e-6)
+    assert mass_index.count(mz, ppm=5, adduct='[M+H]+') == len(hit_lst)
+    assert mass_index.count(np.array([mz, 1.0]), ppm=5, adduct='[M+H]+').tolist() == [len(hit_lst), 0]
+
+    mass_index.save(str(tmp_path))
+    loaded_index = load_mass_index(str(tmp_path))
+    assert loaded_index.settings == mass_index.settings
+    assert loaded_index.settings['published'] is True
+    assert np.array_equal(loaded_index.rank_arr, mass_index.rank_arr)
+    assert loaded_index.count(mz, ppm=5, adduct='[M+H]+') == len(hit_lst)
+
+
+def test_published_switch():
+    for published in [True, False]:
+        mass_index = build_mass_index(usr_fa_lst, usr_lipid_classes, usr_mod_dct, site_specific=True,
+                                      published=published)
+        species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=published)
+        assert len(mass_index) == species_generator.get_count(site_specific=True)
+
+
+def test_missing_backbone():
+    with pytest.raises(ValueError):
+        build_mass_index(usr_fa_lst, {'x1': ['Unknown']}, usr_mod_dct)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import os
+import socket
+import threading
+
+import pytest
+
+from lipidome_cli import run_estimation
+from lipidome_server import EstimationService, LRUCache, make_server, query_server
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_estimation_lst = [{'lipidome': 'unox', 'site_specific': True},
+                      {'lipidome': 'ox', 'site': 'db', 'site_specific': True},
+                      {'lipidome': 'ox', 'site': 'bis-allylic', 'site_specific': False}]
+usr_config = {'fa_list': usr_fa_lst, 'estimations': usr_estimation_lst}
+
+
+def run_server(service, **server_kwargs):
+    server = make_server(service, **server_kwargs)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def test_tcp_round_trip():
+    service = EstimationService()
+    server = run_server(service, port=0)
+    try:
+        server_url = 'http://%s:%i' % server.server_address[:2]
+        assert query_server(server_url, usr_config) == run_estimation(usr_config)
+        assert query_server(server_url, usr_config) == run_estimation(usr_config)
+        stats = query_server(server_url, None, endpoint='/stats')
+        assert stats['results']['hits'] == len(usr_estimation_lst)
+        assert stats['lipidomes']['size'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not supported')
+def test_unix_socket_round_trip(tmp_path):
+    socket_path = str(tmp_path / 'lipidome.sock')
+    server = run_server(EstimationService(), socket_path=socket_path)
+    try:
+        assert query_server('unix:%s' % socket_path, usr_config) == run_estimation(usr_config)
+    finally:
+        server.shutdown()
+        server.server_close()
+    # the socket of the earlier server is replaced
+    server = make_server(EstimationService(), socket_path=socket_path)
+    server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not supported')
+def test_unix_socket_path_of_a_file(tmp_path):
+    file_path = tmp_path / 'results.json'
+    file_path.write_text('{}')
+    with pytest.raises(ValueError):
+        make_server(EstimationService(), socket_path=str(file_path))
+    assert os.path.isfile(str(file_path))
+
+
+def test_batch_errors():
+    service = EstimationService()
+    result_lst = service.estimate_batch([usr_config, dict(usr_config, modifications='oops'),
+                                         dict(usr_config, fa_list='missing_FA_list.xlsx')])
+    assert result_lst[0] == run_estimation(usr_config)
+    assert result_lst[1]['error'].startswith('TypeError')
+    assert result_lst[2]['error'].startswith('FileNotFoundError')
+
+
+def test_lru_eviction():
+    lru_cache = LRUCache(2)
+    lru_cache.put('a', 1)
+    lru_cache.put('b', 2)
+    assert lru_cache.get('a') == 1  # b is the least recently used
+    lru_cache.put('c', 3)
+    assert lru_cache.get('b') is None
+    assert (lru_cache.get('a'), lru_cache.get('c')) == (1, 3)
+    assert lru_cache.get_stats() == {'size': 2, 'max_size': 2, 'hits': 3, 'misses': 1}
+
+    service = EstimationService(max_lipidomes=1, max_results=2)
+    service.estimate(usr_config)
+    stats = service.get_stats()
+    assert stats['lipidomes']['size'] == 1
+    assert stats['results']['size'] == 2
+    # the first result was dropped and is calculated again
+    assert service.estimate(usr_config) == run_estimation(usr_config)
+    assert service.get_stats()['results']['misses'] == 2 * len(usr_estimation_lst)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+from lipidome_validation import run_validation
+
+
+def test_corrected_equations():
+    record_lst = run_validation(max_f=8, verbose=False)
+    assert record_lst
+    assert [record for record in record_lst if not record['ok']] == []
+
+
+def test_published_equations():
+    record_lst = run_validation(max_f=8, verbose=False, published=True)
+    # the published equations only differ in the oxidized species
+    failed_set = set(record['check'] for record in record_lst if not record['ok'])
+    assert failed_set <= {'get_oap', 'get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa'}
+    assert all(record['ok'] for record in record_lst if record['check'].startswith('TheoLipidome'))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import pytest
+
+from oxlipidome_distribution import OxLipidomeDistribution, key_mode_lst
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('key', key_mode_lst)
+def test_sums_equal_totals(key, published):
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                                published=published)
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=published)
+    distribution = OxLipidomeDistribution(oxlipidome, key=key)
+    for site in ['bis-allylic', 'db', 'allylic']:
+        for site_specific in [False, True]:
+            kwargs = {'site': site, 'site_specific': site_specific}
+            oxfa_dct = distribution.get_all_oxfa(**kwargs)
+            assert sum(oxfa_dct.values()) == oxlipidome.get_all_oxfa(**kwargs)
+            assert all(len(exponent) == len(distribution.key_names) for exponent in oxfa_dct)
+            for lipidome, method in [('1oxfa', 'get_all_class_1oxfa'), ('alloxfa', 'get_all_class_alloxfa')]:
+                total = species_generator.get_count(lipidome=lipidome, **kwargs)
+                if published is False:
+                    assert getattr(oxlipidome, method)(**kwargs) == total
+                assert sum(distribution.get_all_class(lipidome=lipidome, **kwargs).values()) == total
+                class_dct = distribution.get_class_dct(lipidome=lipidome, **kwargs)
+                assert sum(sum(class_dct[lipid_class].values()) for lipid_class in class_dct) == total
+                dist_df = distribution.get_distribution_df(lipidome=lipidome, **kwargs)
+                assert sum(dist_df['count']) == total
+
+
+@pytest.mark.parametrize('published, total_tuple', [(True, (912, 2640)), (False, (6216, 6216))])
+def test_sums_of_other_classes_with_4_fa(published, total_tuple):
+    # the publication counts the other lipid classes with 4 FA next to CL only with more than one class in x3
+    x_dct = {'x1': [], 'x2': ['PC'], 'x3': [], 'x4': ['CL', 'CL_other']}
+    oxlipidome = TheoOxLipidome(usr_fa_lst, x_dct, usr_mod_dct, exact=True, verbose=False, published=published)
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, x_dct, usr_mod_dct, published=published)
+    distribution = OxLipidomeDistribution(oxlipidome)
+    kwargs = {'site': 'bis-allylic', 'site_specific': True, 'lipidome': '1oxfa'}
+    assert (oxlipidome.get_all_class_1oxfa(site='bis-allylic', site_specific=True),
+            sum(distribution.get_all_class(**kwargs).values())) == total_tuple
+    assert species_generator.get_count(**kwargs) == total_tuple[1]
+
+
+def test_oxygen_of_one_fa():
+    mod_dct = {'m_ocp': [], 'm_oap': ['OH', 'OOH'], 'm_p': [], 'm_o': []}
+    oxlipidome = TheoOxLipidome([['FA18:2', 'C18H32O2', 18, 2]], {'x1': ['LPC']}, mod_dct, exact=True,
+                                verbose=False, published=False)
+    distribution = OxLipidomeDistribution(oxlipidome)
+    # 2 sites, each unmodified, OH or OOH
+    assert distribution.get_all_oxfa(site='db', site_specific=True) == {(1,): 2, (2,): 3, (3,): 2, (4,): 1}
+    # 1 or 2 of OH and OOH without site
+    assert distribution.get_all_oxfa(site='db', site_specific=False) == {(1,): 1, (2,): 2, (3,): 1, (4,): 1}
+    assert OxLipidomeDistribution(oxlipidome, weight_dct={'OH': 1, 'OOH': 0}).get_all_oxfa(
+        site='bis-allylic', site_specific=False) == {(0,): 1, (1,): 1}
+
+
+def test_unknown_oxygen():
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, dict(usr_mod_dct, m_o=['Unknown']), exact=True,
+                                verbose=False)
+    with pytest.raises(ValueError):
+        OxLipidomeDistribution(oxlipidome).get_all_oxfa(site='db')
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import numpy as np
+import pytest
+
+from oxlipidome_encoding import SpeciesEncoder, export_encoded, get_encoder, load_encoded, save_encoded
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('site_specific', [False, True])
+def test_round_trips(site_specific, published):
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=published)
+    encoder = SpeciesEncoder(species_generator, site='bis-allylic', site_specific=site_specific)
+    species_lst = list(species_generator.iter_species(site='bis-allylic', site_specific=site_specific))
+    encoded_arr = encoder.encode_range()
+    assert encoded_arr.shape[0] == encoder.get_count() == len(species_lst)
+    assert encoder.decode(encoded_arr) == species_lst
+    assert np.array_equal(np.concatenate(list(encoder.iter_encoded(chunk_size=999))), encoded_arr)
+
+    rank_arr = np.random.RandomState(1).randint(0, len(species_lst), 500)
+    assert np.array_equal(encoder.encode_ranks(rank_arr), encoded_arr[rank_arr])
+    sample_lst = [species_lst[rank] for rank in rank_arr[:50]]
+    assert encoder.decode(encoder.encode_species(sample_lst)) == sample_lst
+
+    key_arr = encoder.to_keys(encoded_arr)
+    assert np.unique(key_arr).shape[0] == len(species_lst)
+    assert np.array_equal(encoder.from_keys(key_arr), encoded_arr)
+
+
+def test_masks():
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    encoder = SpeciesEncoder(species_generator, site='db', site_specific=False)
+    encoded_arr = encoder.encode_range(stop=20000)
+    species_lst = encoder.decode(encoded_arr)
+    fa_mask_arr = encoder.get_fa_mask(encoded_arr, '20:4')
+    assert fa_mask_arr.tolist() == ['20:4' in species for species in species_lst]
+    mod_mask_arr = encoder.get_mod_mask(encoded_arr, 'TXA')
+    assert mod_mask_arr.tolist() == ['TXA' in species for species in species_lst]
+    with pytest.raises(ValueError):
+        encoder.get_fa_mask(encoded_arr, '22:6')
+
+
+@pytest.mark.parametrize('published', [True, False])
+def test_save_and_load(tmp_path, published):
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=published)
+    encoder = SpeciesEncoder(species_generator, site='bis-allylic', site_specific=True)
+    species_lst = list(species_generator.iter_species(site='bis-allylic', site_specific=True))
+
+    export_encoded(encoder, str(tmp_path / 'export'), chunk_size=1000)
+    encoded_arr, settings = load_encoded(str(tmp_path / 'export'))
+    assert settings['total'] == len(species_lst)
+    assert get_encoder(settings).decode(encoded_arr) == species_lst
+
+    save_encoded(str(tmp_path / 'save'), encoded_arr[:100], encoder)
+    saved_arr, settings = load_encoded(str(tmp_path / 'save'), mmap=False)
+    assert get_encoder(settings).decode(saved_arr) == species_lst[:100]
+
+    other_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=not published)
+    with pytest.raises(ValueError):
+        SpeciesEncoder(other_generator, site='bis-allylic', site_specific=True).check_settings(settings)
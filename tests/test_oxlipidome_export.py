@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import json
+import os
+
+import pytest
+
+from fa_list_loader import load_fa_list
+from oxlipidome_export import export_species, get_chunk_name, get_shard_count, manifest_name, read_species
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A'], 'm_o': ['TXA']}
+usr_settings = {'site': 'bis-allylic', 'site_specific': False, 'lipidome': 'alloxfa'}
+
+
+@pytest.fixture(scope='module')
+def species_lst():
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    return list(species_generator.iter_species(**usr_settings))
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_export_and_resume(tmp_path, species_lst, n_workers):
+    output_dir = str(tmp_path)
+    shard_size = 1000
+    manifest = export_species(usr_fa_lst, usr_lipid_classes, usr_mod_dct, output_dir, shard_size=shard_size,
+                              n_workers=n_workers, verbose=False, **usr_settings)
+    n_shards = get_shard_count(len(species_lst), shard_size)
+    assert manifest['n_shards'] == n_shards
+    assert manifest['done'] == list(range(n_shards))
+    assert list(read_species(output_dir)) == species_lst
+
+    # an interrupted run leaves missing chunks and temporary files
+    os.remove(os.path.join(output_dir, get_chunk_name(1, 'txt.gz')))
+    tmp_path = os.path.join(output_dir, get_chunk_name(1, 'txt.gz') + '.tmp')
+    with open(tmp_path, 'w') as tmp_obj:
+        tmp_obj.write('incomplete')
+    with pytest.raises(IOError):
+        list(read_species(output_dir))
+    manifest = export_species(usr_fa_lst, usr_lipid_classes, usr_mod_dct, output_dir, shard_size=shard_size,
+                              n_workers=n_workers, verbose=False, **usr_settings)
+    assert manifest['done'] == list(range(n_shards))
+    assert not os.path.isfile(tmp_path)
+    assert list(read_species(output_dir)) == species_lst
+
+
+def test_inline_fa_list_hash(tmp_path):
+    output_dir = str(tmp_path)
+    export_species(usr_fa_lst, usr_lipid_classes, usr_mod_dct, output_dir, shard_size=100000, n_workers=1,
+                   verbose=False, **usr_settings)
+    with open(os.path.join(output_dir, manifest_name), 'r') as manifest_obj:
+        assert json.load(manifest_obj)['settings']['fa_list'].startswith('sha1:')
+    with pytest.raises(ValueError):
+        export_species(usr_fa_lst[:2], usr_lipid_classes, usr_mod_dct, output_dir, shard_size=100000, n_workers=1,
+                       verbose=False, **usr_settings)
+
+
+def test_changed_fa_list_file(tmp_path):
+    output_dir = str(tmp_path / 'export')
+    csv_path = str(tmp_path / 'FA_list.csv')
+    load_fa_list(usr_fa_lst).to_csv(csv_path, index=False)
+    export_species(csv_path, usr_lipid_classes, usr_mod_dct, output_dir, shard_size=100000, n_workers=1,
+                   verbose=False, **usr_settings)
+    load_fa_list(usr_fa_lst[:2]).to_csv(csv_path, index=False)  # same path, other FA
+    with pytest.raises(ValueError):
+        export_species(csv_path, usr_lipid_classes, usr_mod_dct, output_dir, shard_size=100000, n_workers=1,
+                       verbose=False, **usr_settings)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import pandas as pd
+import pytest
+
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_fa_sites import FASiteOxLipidome
+
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A', 'B'], 'm_o': ['TXA']}
+
+
+def get_fa_df(**col_dct):
+    fa_df = pd.DataFrame({'FA': ['FA16:0', 'FA18:2', 'FA20:4', 'FA22:6'],
+                          'Elem': ['C16H32O2', 'C18H32O2', 'C20H32O2', 'C22H32O2'],
+                          'C': [16, 18, 20, 22], 'DB': [0, 2, 4, 6]})
+    for col, value_lst in col_dct.items():
+        fa_df[col] = value_lst
+    return fa_df
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('exact', [False, True])
+@pytest.mark.parametrize('site_specific', [False, True])
+@pytest.mark.parametrize('site', ['bis-allylic', 'db', 'allylic'])
+def test_default_columns_match_theo_oxlipidome(site, site_specific, exact, published):
+    fa_site_lipidome = FASiteOxLipidome(get_fa_df(), usr_lipid_classes, usr_mod_dct, exact=exact, verbose=False,
+                                        published=published)
+    oxlipidome = TheoOxLipidome(get_fa_df(), usr_lipid_classes, usr_mod_dct, exact=exact, verbose=False,
+                                published=published)
+    for method in ['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa']:
+        assert (getattr(fa_site_lipidome, method)(site=site, site_specific=site_specific)
+                == getattr(oxlipidome, method)(site=site, site_specific=site_specific))
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('use_count_tables', [False, True])
+@pytest.mark.parametrize('site_specific', [False, True])
+def test_fa_without_oap(site_specific, use_count_tables, published):
+    # no OAP allowed: only the OCP and cyclic products of the FA are left, never a negative number
+    fa_df = get_fa_df(Mod_oap=['-', '-', '-', '-'])
+    fa_site_lipidome = FASiteOxLipidome(fa_df, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                                        published=published)
+    fa_site_lipidome.use_count_tables = use_count_tables
+    fa_ox_lst = fa_site_lipidome.get_fa_ox_arr(site='db', site_specific=site_specific).tolist()
+    if site_specific is False:
+        # r + 1 segments of the OCP, 3 cyclic products of FA with >= 3 C=C
+        assert fa_ox_lst == [0, 1, 3 + 3, 5 + 3]
+    elif published is False:
+        # r + 1 segments of the OCP with all sites unmodified, (DB - 2) * 3 cyclic products
+        assert fa_ox_lst == [0, 1, 3 + 2 * 3, 5 + 4 * 3]
+    else:
+        # one OAP on each site: the segment without OAP is unmodified only
+        assert fa_ox_lst == [0, 1, 1 + 2 * 3, 1 + 4 * 3]
+
+    oxlipidome = TheoOxLipidome(get_fa_df(), usr_lipid_classes, dict(usr_mod_dct, m_oap=[]), exact=True,
+                                verbose=False, published=published)
+    oxlipidome.use_count_tables = use_count_tables
+    assert fa_site_lipidome.get_all_oxfa(site='db', site_specific=site_specific) == sum(fa_ox_lst)
+    assert oxlipidome.get_all_oxfa(site='db', site_specific=site_specific) == sum(fa_ox_lst)
+
+
+@pytest.mark.parametrize('published', [True, False])
+def test_fa_without_oap_in_one_row(published):
+    fa_df = get_fa_df(Mod_oap=['', '-', '', ''])
+    fa_site_lipidome = FASiteOxLipidome(fa_df, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                                        published=published)
+    oxlipidome = TheoOxLipidome(get_fa_df(), usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                                published=published)
+    fa_ox_lst = fa_site_lipidome.get_fa_ox_arr(site='db', site_specific=True).tolist()
+    assert fa_ox_lst[1] == 1
+    assert fa_ox_lst[2:] == [oxlipidome.get_oap(n_db, site_specific=True) + oxlipidome.get_ocp(n_db, site_specific=True)
+                             + oxlipidome.get_cyclic(n_db, site_specific=True) for n_db in [4, 6]]
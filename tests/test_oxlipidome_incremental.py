@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import random
+
+import pytest
+
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_incremental import IncrementalOxLipidome
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A'], 'm_o': ['TXA']}
+count_key_lst = ['oxfa', 'oxlipid_1oxfa', 'oxlipid_alloxfa']
+
+
+@pytest.mark.parametrize('published', [True, False])
+def test_steps_equal_new_estimator(published):
+    oxlipidome = IncrementalOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, verbose=False,
+                                       published=published)
+    fa_lst = list(usr_fa_lst)
+    added_mod_lst = []
+    added_class_lst = []
+    rng = random.Random(0)
+    for step in range(60):
+        last_total_lst = oxlipidome.totals
+        action = rng.choice(['add_fa', 'remove_fa', 'add_modification', 'remove_modification',
+                             'add_class', 'remove_class'])
+        if action == 'add_fa':
+            n_db = rng.randint(0, 6)
+            fa = ['FA22:%i' % n_db, 'C22H%iO2' % (44 - 2 * n_db), 22, n_db]
+            fa_lst.append(fa)
+            total_lst = oxlipidome.add_fa(fa)
+        elif action == 'remove_fa' and len(fa_lst) > 1:
+            total_lst = oxlipidome.remove_fa(fa_lst.pop(rng.randrange(len(fa_lst))))
+        elif action == 'remove_modification' and added_mod_lst:
+            total_lst = oxlipidome.remove_modification(*added_mod_lst.pop(rng.randrange(len(added_mod_lst))))
+        elif action == 'remove_class' and added_class_lst:
+            total_lst = oxlipidome.remove_class(*added_class_lst.pop(rng.randrange(len(added_class_lst))))
+        elif action == 'add_class':
+            added_class_lst.append((rng.choice(['x1', 'x2', 'x3', 'x4']), 'Class_%i' % step))
+            total_lst = oxlipidome.add_class(*added_class_lst[-1])
+        else:
+            added_mod_lst.append((rng.choice(['m_ocp', 'm_oap', 'm_p', 'm_o']), 'Mod_%i' % step))
+            total_lst = oxlipidome.add_modification(*added_mod_lst[-1])
+
+        new_lipidome = TheoOxLipidome(fa_lst, oxlipidome.x_dct, oxlipidome.m_dct, exact=True, verbose=False,
+                                      published=published)
+        for total, last_total in zip(total_lst, last_total_lst):
+            kwargs = {'site': total['site'], 'site_specific': total['site_specific']}
+            assert total['oxfa'] == new_lipidome.get_all_oxfa(**kwargs), step
+            assert total['oxlipid_1oxfa'] == new_lipidome.get_all_class_1oxfa(**kwargs), step
+            assert total['oxlipid_alloxfa'] == new_lipidome.get_all_class_alloxfa(**kwargs), step
+            for count_key in count_key_lst:
+                assert total['delta_' + count_key] == total[count_key] - last_total[count_key]
+
+
+def test_settings_not_changed_in_place():
+    x_dct = dict((x, list(usr_lipid_classes[x])) for x in usr_lipid_classes)
+    oxlipidome = IncrementalOxLipidome(usr_fa_lst, x_dct, usr_mod_dct, verbose=False)
+    oxlipidome.add_class('x2', 'PE')
+    oxlipidome.add_modification('m_oap', 'Keto')
+    assert x_dct == usr_lipid_classes
+    assert usr_mod_dct['m_oap'] == ['OH', 'OOH']
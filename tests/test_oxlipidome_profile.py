@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import pytest
+
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_profile import profile_method_lst, profile_oxlipidome
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+@pytest.mark.parametrize('method_lst', [profile_method_lst, ['get_all_class_alloxfa']])
+def test_terms_sum_to_totals(method_lst):
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False)
+    total = oxlipidome.get_all_class_alloxfa(site='db', site_specific=True)
+    result_cache = oxlipidome.result_cache
+    record_lst = profile_oxlipidome(oxlipidome, site_lst=['db'], site_specific_lst=[True], method_lst=method_lst)
+    assert oxlipidome.result_cache is result_cache
+
+    for method in profile_method_lst:
+        term_lst = [record for record in record_lst if record['method'] == method and record['x'] != 'total']
+        # the oxFA terms of the lipid classes are recorded as get_all_oxfa, once
+        assert bool(term_lst) is (method in method_lst or method == 'get_all_oxfa')
+        if term_lst:
+            assert sum(record['value'] for record in term_lst) == getattr(oxlipidome, method)(
+                site='db', site_specific=True)
+            assert sum(record['share'] for record in term_lst) == pytest.approx(1.0)
+            assert all(record['x'] == 'oxFA' for record in term_lst) is (method == 'get_all_oxfa')
+    assert [record['value'] for record in record_lst if record['x'] == 'total'][-1] == total
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import random
+
+import pytest
+
+from oxlipidome_species import TheoOxLipidomeSpecies
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC', 'MG'], 'x2': ['PC', 'DG'], 'x3': ['TG'], 'x4': ['CL']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+@pytest.mark.parametrize('published', [True, False])
+@pytest.mark.parametrize('site_specific', [False, True])
+@pytest.mark.parametrize('lipidome', ['unox', '1oxfa', 'alloxfa'])
+def test_rank_unrank(lipidome, site_specific, published):
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct, published=published)
+    kwargs = {'site': 'bis-allylic', 'site_specific': site_specific, 'lipidome': lipidome}
+    species_lst = list(species_generator.iter_species(**kwargs))
+    assert len(set(species_lst)) == len(species_lst) == species_generator.get_count(**kwargs)
+
+    rng = random.Random(1)
+    idx_lst = sorted(set([0, len(species_lst) - 1] + [rng.randrange(len(species_lst)) for _ in range(2000)]))
+    for idx in idx_lst:
+        species = species_generator.unrank(idx, **kwargs)
+        assert species == species_lst[idx]
+        assert species_generator.rank(species, **kwargs) == idx
+    for start, stop in [(0, 10), (len(species_lst) // 3, len(species_lst) // 3 + 500)]:
+        assert list(species_generator.iter_species(start=start, stop=stop, **kwargs)) == species_lst[start:stop]
+
+    with pytest.raises(IndexError):
+        species_generator.unrank(len(species_lst), **kwargs)
+
+
+def test_other_names_of_a_species():
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    kwargs = {'site': 'db', 'lipidome': 'alloxfa'}
+    # FA without sn positions in any order
+    assert (species_generator.rank('TG 16:0_18:2<OH>_20:4<TXA>', **kwargs)
+            == species_generator.rank('TG 20:4<TXA>_16:0_18:2<OH>', **kwargs))
+    # mirrored TG and CL
+    for species in species_generator.sample_species(50, site_specific=True, seed=2, **kwargs):
+        lipid_class, fa_part = species.split(' ', 1)
+        if lipid_class in ['TG', 'CL']:
+            mirror_species = '%s %s' % (lipid_class, '/'.join(fa_part.split('/')[::-1]))
+            assert (species_generator.rank(mirror_species, site_specific=True, **kwargs)
+                    == species_generator.rank(species, site_specific=True, **kwargs))
+
+    for species in ['PC 16:0_22:6', 'PE 16:0_18:2', 'PC16:0']:
+        with pytest.raises(ValueError):
+            species_generator.rank(species, **kwargs)
+
+
+def test_sample_species():
+    species_generator = TheoOxLipidomeSpecies(usr_fa_lst, usr_lipid_classes, usr_mod_dct)
+    kwargs = {'site': 'db', 'site_specific': True, 'lipidome': 'alloxfa'}
+    sample_lst = species_generator.sample_species(200, seed=3, **kwargs)
+    assert sample_lst == species_generator.sample_species(200, seed=random.Random(3), **kwargs)
+    species_set = set(species_generator.iter_species(**kwargs))
+    assert all(species in species_set for species in sample_lst)
+    assert len(set(sample_lst)) > 190
+
+    with pytest.raises(ValueError):
+        TheoOxLipidomeSpecies(usr_fa_lst[:1], usr_lipid_classes, usr_mod_dct).sample_species(1, **kwargs)
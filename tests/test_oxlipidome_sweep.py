@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import pytest
+
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_sweep import sweep_oxlipidome
+
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:2', 'C18H32O2', 18, 2], ['FA20:4', 'C20H32O2', 20, 4]]
+usr_lipid_classes = {'x1': ['LPC'], 'x2': ['PC', 'Diacylglycerol'], 'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde'], 'm_oap': ['OH', 'OOH'], 'm_p': ['A'], 'm_o': ['TXA']}
+
+
+def get_mod_dct(row):
+    return dict((mod_type, ['%s_%i' % (mod_type, i) for i in range(row[mod_type])])
+                for mod_type in ['m_ocp', 'm_oap', 'm_p', 'm_o'])
+
+
+@pytest.mark.parametrize('published', [True, False])
+def test_sweep_equals_scalar(published):
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False,
+                                published=published)
+    sweep_df = sweep_oxlipidome(oxlipidome, [0, 1, 2], [0, 1, 3], [0, 1], [0, 1])
+    assert len(sweep_df) == 216
+
+    for row in sweep_df.to_dict('records'):
+        scalar_lipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, get_mod_dct(row), exact=True, verbose=False,
+                                         published=published)
+        kwargs = {'site': row['site'], 'site_specific': row['site_specific']}
+        assert row['oxfa'] == scalar_lipidome.get_all_oxfa(**kwargs)
+        assert row['oxlipid_1oxfa'] == scalar_lipidome.get_all_class_1oxfa(**kwargs)
+        assert row['oxlipid_alloxfa'] == scalar_lipidome.get_all_class_alloxfa(**kwargs)
+
+
+def test_sweep_fa_lists():
+    oxlipidome_dct = {'all': TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False),
+                      'no_db': TheoOxLipidome(usr_fa_lst[:1], usr_lipid_classes, usr_mod_dct, exact=True,
+                                              verbose=False)}
+    sweep_df = sweep_oxlipidome(oxlipidome_dct, [1], [2], [1], [1], site_lst=['db'], site_specific_lst=[True])
+    assert sweep_df['fa_list'].tolist() == ['all', 'no_db']
+    assert sweep_df['oxfa'].tolist() == [oxlipidome_dct[label].get_all_oxfa(site='db', site_specific=True)
+                                         for label in ['all', 'no_db']]
+    assert sweep_df['oxfa'].tolist()[1] == 0
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018-2019  SysMedOs_team @ AG Bioanalytik, University of Leipzig:
+# SysMedOs_team: Zhixu Ni, Maria Fedorova
+# [The GNU General Public License version 2] (https://www.gnu.org/licenses/old-licenses/gpl-2.0.en.html)
+#
+# For more info please contact:
+#     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from oxlipidome_estimation import TheoOxLipidome
+from oxlipidome_fa_sites import FASiteOxLipidome
+from oxlipidome_sweep import sweep_oxlipidome
+from oxlipidome_tables import build_tables, load_tables, save_tables
+
+usr_lipid_classes = {'x1': ['LPC', 'Monoacylglycerol'], 'x2': ['PC', 'Diacylglycerol'],
+                     'x3': ['Triacylglycerol'], 'x4': ['Cardiolipin']}
+usr_mod_dct = {'m_ocp': ['Aldehyde', 'CarboxylicAcid'], 'm_oap': ['OH', 'OOH', 'KETO'],
+               'm_p': ['A', 'B'], 'm_o': ['TXA']}
+usr_fa_lst = [['FA16:0', 'C16H32O2', 16, 0], ['FA18:1', 'C18H34O2', 18, 1], ['FA18:2', 'C18H32O2', 18, 2],
+              ['FA20:4', 'C20H32O2', 20, 4], ['FA22:6', 'C22H32O2', 22, 6]]
+
+
+def get_totals(oxlipidome, site, site_specific):
+    return [getattr(oxlipidome, method)(site=site, site_specific=site_specific)
+            for method in ['get_all_oxfa', 'get_all_class_1oxfa', 'get_all_class_alloxfa']]
+
+
+def test_saved_tables_are_loaded(tmp_path):
+    table_path = str(tmp_path / 'tables.json.gz')
+    save_tables(build_tables(m_max=4, n_max=3, n_cyclic_max=2), table_path)
+    count_tables = load_tables(table_path)
+    assert count_tables.get_shape('oap') == (4, 5)
+    assert count_tables.get_shape('cyclic') == (3, 6)
+    assert count_tables.get('oap', 3, 4, site_specific=True) == 3 ** 4
+    assert count_tables.get('oap', 3, 5, site_specific=True) is None
+    assert count_tables.get_arr('oap', [2, 3], 4, site_specific=True).tolist() == [2 ** 4, 3 ** 4]
+    assert count_tables.get_arr('oap', [2, 4], 4, site_specific=True) is None
+    assert load_tables(str(tmp_path / 'missing.json.gz')) is None
+
+
+@pytest.mark.parametrize('lipidome_class', [TheoOxLipidome, FASiteOxLipidome])
+@pytest.mark.parametrize('site_specific', [False, True])
+@pytest.mark.parametrize('site', ['bis-allylic', 'db', 'allylic'])
+def test_tables_give_the_calculated_totals(lipidome_class, site, site_specific):
+    assert load_tables() is not None
+    table_lipidome = lipidome_class(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False)
+    oxlipidome = lipidome_class(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False)
+    oxlipidome.use_count_tables = False
+    assert table_lipidome.get_fingerprint() != oxlipidome.get_fingerprint()
+    assert get_totals(table_lipidome, site, site_specific) == get_totals(oxlipidome, site, site_specific)
+
+
+def test_sweep_in_exact_mode():
+    oxlipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, usr_mod_dct, exact=True, verbose=False)
+    assert oxlipidome.get_count_tables() is not None
+    sweep_df = sweep_oxlipidome(oxlipidome, [0, 1, 2], [0, 1, 4, 17], [0, 3], [0, 2])
+    assert len(sweep_df) == 3 * 4 * 2 * 2 * 3 * 2
+    for row in sweep_df.iloc[::7].itertuples():
+        mod_dct = {'m_ocp': ['ocp'] * row.m_ocp, 'm_oap': ['oap'] * row.m_oap,
+                   'm_p': ['p'] * row.m_p, 'm_o': ['o'] * row.m_o}
+        row_lipidome = TheoOxLipidome(usr_fa_lst, usr_lipid_classes, mod_dct, exact=True, verbose=False)
+        assert get_totals(row_lipidome, row.site, row.site_specific) == [
+            row.oxfa, row.oxlipid_1oxfa, row.oxlipid_alloxfa]
+
+
+def test_cli_without_numpy():
+    # configs with inline FA records run with the standard library only, also with the tables
+    code = ('import sys, lipidome_cli; '
+            'lipidome_cli.main(["--config", "-"]); '
+            'sys.exit(int(any(name in sys.modules for name in ["numpy", "pandas", "scipy"])))')
+    config = '{"fa_list": %s, "exact": true}' % str(usr_fa_lst).replace("'", '"')
+    process = subprocess.run([sys.executable, '-c', code], input=config.encode(), stdout=subprocess.PIPE,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert process.returncode == 0
+    assert b'"oxlipid_alloxfa"' in process.stdout
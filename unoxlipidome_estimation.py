@@ -8,8 +8,8 @@
 #     Developer Zhixu Ni: zhixu.ni@uni-leipzig.de
 from itertools import product
 
-import pandas as pd
-from scipy.special import comb
+from fa_list_loader import load_fa_summary
+from lipidome_utils import count_no_mirror, get_comb
 
 
 class TheoLipidome(object):
@@ -19,31 +19,36 @@ class TheoLipidome(object):
     This will use a modified permutation algorithm to make all modifications repeatable at all sites
     while remove mirrored products from TG and cardiolipin.
     LysoPL, MG, and DG also treated with special care for positions
+
+    published=True (default) uses the equations of the publication,
+    published=False the corrected equations that count each species once, see README.md.
     """
 
-    def __init__(self, fa_lst_path, x_dct):
+    def __init__(self, fa_lst_path, x_dct, exact=False, verbose=True, published=True):
         """
         Load default settings, see the __main__ function to modify the default values.
 
-        :param fa_lst_path: file path to default FA_list.xlsx file
-        :type fa_lst_path: str
+        :param fa_lst_path: file path to default FA_list.xlsx file, other FA lists supported by load_fa_list
+        :type fa_lst_path: str | pandas.DataFrame | list
         :param x_dct: default values for the number of lipid classes that have n FA residues
         :type x_dct: dict
+        :param exact: set to False to use float binomial coefficients from scipy.
+            set to True to use exact arbitrary-precision integers for all numbers
+        :type exact: bool
+        :param verbose: set to False to skip printing the FA list and loading status
+        :type verbose: bool
+        :param published: set to True to use the equations of the publication.
+            set to False to use the corrected equations, see README.md
+        :type published: bool
         """
-        fa_df = pd.read_excel(fa_lst_path, header=0)
-        print('Load FA list:')
-        print(fa_df)
-        self.f = fa_df.shape[0]  # total number of Free Fatty acids F
-        db_lst = fa_df['DB'].values.tolist()
-        n_db_lst = list(set(db_lst))
-        self.fa_dct = {}
-        self.n_lst = []
-        for n_db in n_db_lst:
-            if n_db > 0:
-                self.fa_dct[n_db] = db_lst.count(n_db)
-                self.n_lst.append(n_db)
+        # total number of Free Fatty acids F and number of FA for each number of C=C bond
+        self.f, self.fa_dct, self.n_lst = load_fa_summary(fa_lst_path, verbose=verbose)
         self.x_dct = x_dct
-        print('All settings loaded...')
+        self.exact = exact
+        self.published = published
+        self.comb = get_comb(exact)
+        if verbose is True:
+            print('All settings loaded...')
 
     def get_estimation(self, site_specific=False):
         """
@@ -60,11 +65,10 @@ class TheoLipidome(object):
         tot_lipid = 0
         if site_specific is False:
             tot_lipid += len(self.x_dct['x1']) * self.f
-            tot_lipid += len(self.x_dct['x2']) * comb(self.f + 1, 2)
-            tot_lipid += len(self.x_dct['x3']) * comb(self.f + 2, 3)
-            tot_lipid += len(self.x_dct['x4']) * comb(self.f + 3, 4)
+            tot_lipid += len(self.x_dct['x2']) * self.comb(self.f + 1, 2)
+            tot_lipid += len(self.x_dct['x3']) * self.comb(self.f + 2, 3)
+            tot_lipid += len(self.x_dct['x4']) * self.comb(self.f + 3, 4)
         else:
-            tot_lipid += len(self.x_dct['x2']) * (self.f ** 2 - self.f ** 2)
             n_x1 = len(self.x_dct['x1'])
             for x1 in self.x_dct['x1']:
                 if x1 in ['LPA', 'LPC', 'LPE', 'LPG', 'LPI', 'LPS']:
@@ -76,7 +80,7 @@ class TheoLipidome(object):
             tot_lipid += len(self.x_dct['x2']) * (self.f ** 2)
             # DG with -OH at sn1/sn3 is like PLs and calculated above
             if 'Diacylglycerol' in self.x_dct['x2'] or 'DG' in self.x_dct['x2']:
-                tot_lipid += comb(self.f, 2) + self.f
+                tot_lipid += self.comb(self.f, 2) + self.f
             else:
                 pass
 
@@ -86,10 +90,12 @@ class TheoLipidome(object):
                     tot_lipid += (len(self.x_dct['x3']) - 1) * (self.f ** 3)  # Other Lipid with 3 FA
                 else:
                     pass
-            else:
+            elif self.published is True:
                 tot_lipid += len(self.x_dct['x3']) * (self.f ** 3 - self.f ** 3)  # Other Lipid with 3 FA
+            else:
+                tot_lipid += len(self.x_dct['x3']) * (self.f ** 3)  # Other Lipid with 3 FA
 
-            if 'Cardiolipin' in self.x_dct['x3'] or 'CL' in self.x_dct['x4']:
+            if self.has_cardiolipin():
                 tot_lipid += self.get_product_no_mirror(4)
                 if len(self.x_dct['x4']) - 1 > 0:
                     tot_lipid += (len(self.x_dct['x4']) - 1) * (self.f ** 4)  # Other Lipid with 4 FA
@@ -100,7 +106,33 @@ class TheoLipidome(object):
 
         return int(tot_lipid)
 
-    def get_product_no_mirror(self, n_sn):
+    def has_cardiolipin(self):
+        """
+        Check if cardiolipin is counted with the mirrored products removed.
+        The publication looks up Cardiolipin in x3, so with published=True only CL in x4 is counted as cardiolipin.
+
+        :return: True if cardiolipin is counted without mirrored products
+        :rtype: bool
+        """
+        if self.published is True:
+            return 'Cardiolipin' in self.x_dct['x3'] or 'CL' in self.x_dct['x4']
+        else:
+            return 'Cardiolipin' in self.x_dct['x4'] or 'CL' in self.x_dct['x4']
+
+    def get_product_no_mirror(self, n_sn, enumerate_all=False):
+        """
+        Calculate Number of FA combinations on n_sn positions with mirrored products removed (TG and cardiolipin)
+
+        :param n_sn: number of sn positions
+        :type n_sn: int
+        :param enumerate_all: set to False to use the closed-form orbit count.
+            set to True to use the reference enumeration of all products (slow, only for small FA lists)
+        :type enumerate_all: bool
+        :return: Number of products without mirrored duplicates
+        :rtype: int
+        """
+        if enumerate_all is False:
+            return count_no_mirror(self.f, n_sn)
 
         fa_lst = range(self.f)
         all_lst = list(product(fa_lst, repeat=n_sn))